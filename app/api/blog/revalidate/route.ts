@@ -9,7 +9,10 @@ import { authOptions } from '@/lib/auth-options'
  *
  * Usage:
  * POST /api/blog/revalidate
- * Body: { slug?: string, path?: string }
+ * Body: { slug?: string, slugs?: string[], path?: string }
+ *
+ * `slugs` revalidates many posts in one request; the blog listing, sitemap
+ * and RSS are revalidated once for the whole list.
  */
 export async function POST(request: NextRequest) {
   try {
@@ -30,13 +33,22 @@ export async function POST(request: NextRequest) {
     }
 
     const body = await request.json()
-    const { slug, path } = body
-
-    if (slug) {
-      // Revalidate specific blog post
-      revalidatePath(`/blog/${slug}`)
+    const { slug, slugs, path } = body
+    const slugList: string[] = Array.from(
+      new Set(
+        [...(Array.isArray(slugs) ? slugs : []), slug].filter(
+          (s): s is string => typeof s === 'string' && s.length > 0
+        )
+      )
+    )
+
+    if (slugList.length > 0) {
+      // Revalidate specific blog posts, then the listing once
+      for (const s of slugList) {
+        revalidatePath(`/blog/${s}`)
+        revalidateTag(`blog-${s}`, 'page')
+      }
       revalidatePath('/blog')
-      revalidateTag(`blog-${slug}`, 'page')
     } else if (path) {
       // Revalidate specific path
       revalidatePath(path)
@@ -52,9 +64,13 @@ export async function POST(request: NextRequest) {
 
     return NextResponse.json({
       revalidated: true,
-      message: slug
-        ? `Revalidated blog post: ${slug}`
-        : 'Revalidated blog pages',
+      slugs: slugList,
+      message:
+        slugList.length === 1
+          ? `Revalidated blog post: ${slugList[0]}`
+          : slugList.length > 1
+            ? `Revalidated ${slugList.length} blog posts`
+            : 'Revalidated blog pages',
       timestamp: new Date().toISOString(),
     })
   } catch (error) {
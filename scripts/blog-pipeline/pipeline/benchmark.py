@@ -0,0 +1,94 @@
+"""Throughput benchmark for the rewrite stage.
+
+Runs synthetic raw articles through a rewriter at one or more concurrency
+levels and reports articles/minute, per-article latency percentiles and peak
+Python memory. Nothing is written to data/. Use with ``--provider mock`` to
+measure the pipeline's own overhead offline.
+"""
+from __future__ import annotations
+
+import random
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+
+from pipeline.rewriter.base import BaseRewriter
+
+_TOPICS = [
+    "tulsi for seasonal cough", "kadha recipes for winter", "steam inhalation for congestion",
+    "turmeric milk and immunity", "monsoon wellness routine", "ginger for sore throat",
+    "breathing exercises for sinus relief", "ayurvedic sleep habits",
+]
+
+
+def synthetic_articles(n: int, words: int = 900, seed: int = 0) -> list[dict]:
+    """Raw articles shaped like data/raw/*.json, with reproducible text."""
+    rng = random.Random(seed)
+    vocab = " ".join(_TOPICS).split()
+    articles = []
+    for i in range(n):
+        topic = rng.choice(_TOPICS)
+        paragraphs = [
+            " ".join(rng.choice(vocab) for _ in range(60)).capitalize() + "."
+            for _ in range(max(1, words // 60))
+        ]
+        articles.append({
+            "source_url": f"https://example.com/bench/{i}",
+            "source_name": "benchmark",
+            "raw_title": f"{topic.title()} ({i})",
+            "raw_content_text": "\n".join(paragraphs),
+            "category_hint": "wellness",
+        })
+    return articles
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_rewrite_benchmark(
+    make_rewriter: Callable[[int], BaseRewriter],
+    articles: list[dict],
+    concurrency: int,
+) -> dict:
+    """Rewrite ``articles`` with ``concurrency`` workers and return timing stats."""
+    rewriter = make_rewriter(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    def timed(article: dict) -> float:
+        start = time.perf_counter()
+        rewriter.rewrite(article)
+        return time.perf_counter() - start
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in as_completed([pool.submit(timed, a) for a in articles]):
+                try:
+                    latencies.append(future.result())
+                except Exception:
+                    errors += 1
+    finally:
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rewriter.close()
+
+    return {
+        "concurrency": concurrency,
+        "articles": len(articles),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 2),
+        "articles_per_min": round(len(latencies) / elapsed * 60, 1) if elapsed else 0.0,
+        "p50_s": round(statistics.median(latencies), 2) if latencies else 0.0,
+        "p95_s": round(_percentile(latencies, 95), 2),
+        "peak_mem_mb": round(peak / 1_000_000, 1),
+    }
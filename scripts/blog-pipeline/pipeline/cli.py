@@ -2,21 +2,14 @@
 from __future__ import annotations
 
 import json
-import re
 import glob as globmod
 from pathlib import Path
 
 import click
 
-from pipeline.settings import get_settings, ensure_dirs, RAW_DIR, REWRITTEN_DIR
+from pipeline.settings import get_settings, ensure_dirs, RAW_DIR, REWRITTEN_DIR, CHECKPOINT_DIR
 
-
-def _slug_for_filename(text: str) -> str:
-    """URL-friendly slug for use in filenames (no Supabase check)."""
-    s = text.lower().strip()
-    s = re.sub(r"[^\w\s-]", "", s)
-    s = re.sub(r"[\s_-]+", "-", s)
-    return s.strip("-")[:60] or "topic"
+PROVIDERS = ["ollama", "claude", "cli-agent", "mock", "router"]
 
 
 @click.group()
@@ -60,39 +53,224 @@ def fetch(urls: tuple, url_file: str | None, category: str):
 
 
 @cli.command()
-@click.option("--provider", type=click.Choice(["ollama", "claude", "cli-agent"]), default="cli-agent")
+@click.option("-w", "--workers", default=0, help="Processes for the checks (0 = CPU count)")
+@click.option("--dry-run", is_flag=True, help="Only report what would be rejected")
+def gate(workers: int, dry_run: bool):
+    """Reject low-value raw articles before they reach the LLM.
+
+    Raw articles already rewritten or published (same file name, or same
+    source_url) are left alone.
+    """
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    from pipeline.scraper.quality import assess_file
+    from pipeline.storage.dedup_store import get_published_sources, mark_rejected
+
+    # Like rewrite: a raw file's rewrite keeps its name, in rewritten/ or done/
+    processed = [
+        *Path(REWRITTEN_DIR).glob("*.json"),
+        *(Path(REWRITTEN_DIR) / "done").glob("*.json"),
+    ]
+    processed_stems = {f.stem for f in processed}
+    processed_urls = set(get_published_sources())
+    for f in processed:
+        try:
+            processed_urls.add(json.loads(f.read_text()).get("source_url", ""))
+        except (OSError, json.JSONDecodeError):
+            continue
+    processed_urls.discard("")
+
+    raw_files = [f for f in sorted(Path(RAW_DIR).glob("*.json")) if f.stem not in processed_stems]
+    if not raw_files:
+        click.echo("No raw articles to check.")
+        return
+
+    workers = workers or os.cpu_count() or 1
+    click.echo(f"Checking {len(raw_files)} raw articles ({workers} processes)...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(assess_file, raw_files, chunksize=16))
+
+    rejected = [
+        (path, reasons, url) for path, reasons, url in results if reasons and url not in processed_urls
+    ]
+    for path, reasons, _ in rejected:
+        click.echo(f"  Rejected {path.name}: {'; '.join(reasons)}")
+
+    if not dry_run and rejected:
+        rejected_dir = Path(RAW_DIR) / "rejected"
+        rejected_dir.mkdir(exist_ok=True)
+        for path, _, _ in rejected:
+            path.rename(rejected_dir / path.name)
+        mark_rejected([(path.name, url, reasons) for path, reasons, url in rejected])
+
+    verb = "Would reject" if dry_run else "Rejected"
+    click.echo(f"{verb} {len(rejected)} of {len(raw_files)} articles.")
+
+
+@cli.command()
+@click.option("--provider", type=click.Choice(PROVIDERS), default="cli-agent")
 @click.option("--model", default=None, help="Model name or CLI command (e.g. llama3, claude, agent)")
 @click.option("-n", "--limit", default=0, help="Max articles to rewrite (0 = all pending)")
-def rewrite(provider: str, model: str | None, limit: int):
+@click.option("-w", "--workers", default=1, help="Articles to rewrite concurrently")
+@click.option(
+    "--metadata",
+    "metadata_mode",
+    type=click.Choice(["llm", "local"]),
+    default="llm",
+    help="Generate SEO metadata with a second LLM call, or locally from the HTML",
+)
+@click.option(
+    "--metadata-batch",
+    default=1,
+    help="Articles per metadata request (ollama; 1 = one request per article)",
+)
+@click.option(
+    "--order",
+    type=click.Choice(["value", "name"]),
+    default="value",
+    help="Rewrite highest-value articles first, or in filename order",
+)
+@click.option("--budget-tokens", default=0, help="Stop once estimated tokens reach this (0 = no limit)")
+@click.option("--budget-usd", default=0.0, help="Stop once estimated cost reaches this (0 = no limit)")
+def rewrite(
+    provider: str,
+    model: str | None,
+    limit: int,
+    workers: int,
+    metadata_mode: str,
+    metadata_batch: int = 1,
+    order: str = "value",
+    budget_tokens: int = 0,
+    budget_usd: float = 0.0,
+):
     """Rewrite raw articles with LLM."""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from datetime import datetime, timezone
     from pipeline.rewriter.base import get_rewriter
+    from pipeline.rewriter.ranking import build_queue, apply_budget
+    from pipeline.storage.metrics_store import usage_since
 
     settings = get_settings()
-    rewriter = get_rewriter(provider, model, settings)
+    workers = max(1, workers)
 
     raw_files = sorted(Path(RAW_DIR).glob("*.json"))
     rewritten_stems = {f.stem for f in Path(REWRITTEN_DIR).glob("*.json")}
     pending = [f for f in raw_files if f.stem not in rewritten_stems]
 
+    skipped: list = []
+    queue = build_queue(
+        pending, provider, settings, metadata_mode=metadata_mode, order=order, skipped=skipped
+    )
+    for path, error in skipped:
+        click.echo(f"  Skipping unreadable {path.name}: {error}", err=True)
     if limit > 0:
-        pending = pending[:limit]
+        queue = queue[:limit]
+    selected = apply_budget(queue, budget_tokens, budget_usd)
+    if len(selected) < len(queue):
+        click.echo(f"Budget covers {len(selected)} of {len(queue)} pending articles.")
+    pending = [item.path for item in selected]
 
     if not pending:
         click.echo("No pending articles to rewrite.")
         return
 
-    click.echo(f"Rewriting {len(pending)} articles with {provider}...")
-    for raw_file in pending:
+    click.echo(
+        f"Estimated: {sum(i.input_tokens for i in selected):,} input + "
+        f"{sum(i.output_tokens for i in selected):,} output tokens, "
+        f"~${sum(i.cost_usd for i in selected):.2f}"
+    )
+
+    rewriter = get_rewriter(
+        provider,
+        model,
+        settings,
+        workers=workers,
+        metadata_mode=metadata_mode,
+        metadata_batch=metadata_batch,
+    )
+    batched = metadata_batch > 1 and metadata_mode == "llm" and rewriter.batches_metadata
+    if metadata_batch > 1 and metadata_mode == "llm" and not batched:
+        click.echo(f"  {provider} does not batch metadata; --metadata-batch is ignored.")
+
+    def save(raw_file: Path, result: dict) -> Path:
+        out_path = REWRITTEN_DIR / raw_file.name
+        out_path.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        return out_path
+
+    def rewrite_one(raw_file: Path):
         raw = json.loads(raw_file.read_text())
         click.echo(f"  Rewriting: {raw.get('raw_title', raw_file.stem)}")
-        try:
-            result = rewriter.rewrite(raw)
-            out_path = REWRITTEN_DIR / raw_file.name
-            out_path.write_text(json.dumps(result, indent=2, ensure_ascii=False))
-            click.echo(f"    -> {out_path.name}")
-        except Exception as e:
-            click.echo(f"    ERROR: {e}", err=True)
+        checkpoint = CHECKPOINT_DIR / raw_file.name
+        if batched:
+            # Content only; metadata is requested for several articles at once
+            return raw, rewriter.draft(raw, checkpoint), checkpoint
+        return save(raw_file, rewriter.rewrite(raw, checkpoint=checkpoint))
+
+    def flush(drafts: list) -> None:
+        results = rewriter.finish_batch([job for _, job in drafts])
+        for (raw_file, _), result in zip(drafts, results):
+            if isinstance(result, Exception):
+                click.echo(f"    ERROR ({raw_file.name}): {result}", err=True)
+            else:
+                click.echo(f"    -> {save(raw_file, result).name}")
+
+    started = datetime.now(timezone.utc).isoformat()
+
+    def check_budget(jobs: dict) -> None:
+        """Cancel queued articles that no longer fit next to the usage recorded so far."""
+        spent_tokens, spent_usd = usage_since(started)
+        unfinished = [item for item in selected if not jobs[item.path].done()]
+        # Running articles cannot be stopped, so their estimates are counted first
+        unfinished.sort(key=lambda item: not jobs[item.path].running())
+        fits = apply_budget(unfinished, budget_tokens, budget_usd, spent_tokens, spent_usd)
+        dropped = [item for item in unfinished[len(fits):] if jobs[item.path].cancel()]
+        if dropped:
+            click.echo(
+                f"  Recorded so far: {spent_tokens:,} tokens, ~${spent_usd:.2f}; "
+                f"skipping {len(dropped)} articles that no longer fit the budget."
+            )
+
+    click.echo(f"Rewriting {len(pending)} articles with {provider} ({workers} workers)...")
+    drafts: list = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            jobs = {item.path: pool.submit(rewrite_one, item.path) for item in selected}
+            futures = {future: path for path, future in jobs.items()}
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                if budget_tokens or budget_usd:
+                    check_budget(jobs)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    click.echo(f"    ERROR ({futures[future].name}): {e}", err=True)
+                    continue
+                if not batched:
+                    click.echo(f"    -> {result.name}")
+                    continue
+                drafts.append((futures[future], result))
+                if len(drafts) >= metadata_batch:
+                    flush(drafts)
+                    drafts = []
+        if drafts:
+            flush(drafts)
+    finally:
+        rewriter.close()
 
+    if provider == "router":
+        for row in rewriter.stats():
+            click.echo(
+                f"  {row['provider']}: {row['calls']} calls, {row['failures']} failed, "
+                f"avg {row['avg_latency_s']}s, p95 {row['p95_s']}s"
+            )
+
+    spent_tokens, spent_usd = usage_since(started)
+    click.echo(
+        f"Recorded: {spent_tokens:,} tokens, ~${spent_usd:.2f} "
+        f"(estimated {sum(i.tokens for i in selected):,} tokens, "
+        f"~${sum(i.cost_usd for i in selected):.2f})"
+    )
     click.echo("Rewrite complete.")
 
 
@@ -100,11 +278,39 @@ def rewrite(provider: str, model: str | None, limit: int):
 @click.option("--status", type=click.Choice(["draft", "published"]), default="draft")
 @click.option("--author-id", default=None, help="Author UUID")
 @click.option("-n", "--limit", default=0, help="Max articles to publish (0 = all pending)")
-def publish(status: str, author_id: str | None, limit: int):
+@click.option(
+    "--bulk",
+    is_flag=True,
+    help="Insert posts and tag links in batches, one transaction per batch",
+)
+@click.option("--batch-size", default=50, show_default=True, help="Posts per transaction with --bulk")
+@click.option("-w", "--workers", default=1, help="Articles (or --bulk batches) to publish concurrently")
+@click.option("--refresh", is_flag=True, help="Rebuild the local site mirror before publishing")
+@click.option("--images", is_flag=True, help="Re-host featured images (resized WebP/AVIF) before publishing")
+@click.option(
+    "--check-links",
+    type=click.Choice(["flag", "block"]),
+    default=None,
+    help="Check every href first; 'block' leaves articles with broken links unpublished",
+)
+def publish(
+    status: str,
+    author_id: str | None,
+    limit: int,
+    bulk: bool = False,
+    batch_size: int = 50,
+    workers: int = 1,
+    refresh: bool = False,
+    images: bool = False,
+    check_links: str | None = None,
+):
     """Publish rewritten articles to Supabase."""
-    from pipeline.publisher.supabase_client import publish_article
-    from pipeline.publisher.revalidator import trigger_revalidation
-    from pipeline.storage.dedup_store import mark_published
+    import threading
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from pipeline.publisher.supabase_client import PublisherSession
+    from pipeline.publisher.revalidator import RevalidationQueue
+    from pipeline.storage.dedup_store import get_journal, journal_done, journal_key, mark_published
+    from pipeline.storage.metrics_store import record_published
 
     settings = get_settings()
     author = author_id or settings.pipeline_default_author_id
@@ -120,50 +326,365 @@ def publish(status: str, author_id: str | None, limit: int):
         click.echo("No rewritten articles to publish.")
         return
 
-    click.echo(f"Publishing {len(rewritten_files)} articles as '{status}'...")
+    articles = [(f, json.loads(f.read_text())) for f in rewritten_files]
+    try:
+        # Caches and taken slugs come from the local mirror, synced incrementally
+        session = PublisherSession(settings, warm=True, mirror=True, refresh=refresh)
+        # Settle inserts a crashed run started but never confirmed
+        confirmed, dropped = session.reconcile_journal()
+        if confirmed or dropped:
+            click.echo(f"Journal: {confirmed} interrupted publishes confirmed, {dropped} dropped")
+        journal = get_journal([journal_key(a) for _, a in articles])
+        states = {f: journal.get(journal_key(a), {}).get("state") for f, a in articles}
+        # inserted: the post exists but its tags may not be linked yet
+        already = [(f, a) for f, a in articles if states[f] in ("done", "inserted")]
+        articles = [(f, a) for f, a in articles if states[f] not in ("done", "inserted")]
+        if check_links:
+            articles = _check_article_links(articles, settings, block=check_links == "block")
+        # Categories and tags for the whole batch: one select + one upsert each
+        session.prepare([article for _, article in articles])
+    except Exception as e:
+        click.echo(f"ERROR: {e}", err=True)
+        return
+
+    if images and not _rehost_images(articles, settings, session.supabase):
+        click.echo("ERROR: Fix the image store settings or publish without --images.", err=True)
+        return
+
+    workers = max(1, workers)
+    click.echo(f"Publishing {len(articles) + len(already)} articles as '{status}' ({workers} workers)...")
     published_slugs = []
-    for f in rewritten_files:
-        article = json.loads(f.read_text())
-        click.echo(f"  Publishing: {article.get('title', f.stem)}")
-        try:
-            slug = publish_article(article, author_id=author, status=status, settings=settings)
-            published_slugs.append(slug)
+    done_dir = REWRITTEN_DIR / "done"
+    done_dir.mkdir(exist_ok=True)
+    done_lock = threading.Lock()
+    # Published slugs are revalidated in debounced batches while the run goes on
+    revalidation = None
+    if status == "published":
+        if settings.revalidation_secret:
+            revalidation = RevalidationQueue(settings)
+        else:
+            click.echo("  Revalidation skipped: REVALIDATION_SECRET is not set", err=True)
+
+    def _published(f: Path, article: dict, slug: str) -> None:
+        # Moving the file and marking the URL happen together, once per success
+        with done_lock:
+            f.rename(done_dir / f.name)
             source_url = article.get("source_url", "")
             if source_url:
                 mark_published(source_url)
-            # Move processed file
-            done_dir = REWRITTEN_DIR / "done"
-            done_dir.mkdir(exist_ok=True)
-            f.rename(done_dir / f.name)
-            click.echo(f"    -> Published as /{slug}")
-        except Exception as e:
-            click.echo(f"    ERROR: {e}", err=True)
+            record_published([slug], [source_url or slug])
+            published_slugs.append(slug)
+            click.echo(f"  Published: {article.get('title', f.stem)} -> /{slug}")
+        if revalidation is not None:
+            revalidation.add(slug)
+
+    def publish_one(f: Path, article: dict) -> None:
+        slug = session.publish(
+            article, author_id=author, status=status, journal_key=journal_key(article), file=f.name
+        )
+        _published(f, article, slug)
+
+    def publish_batch(batch: list[tuple[Path, dict]]) -> None:
+        slugs = session.publish_bulk(
+            [a for _, a in batch],
+            author_id=author,
+            status=status,
+            journal_keys=[journal_key(a) for _, a in batch],
+            files=[f.name for f, _ in batch],
+        )
+        for (f, article), slug in zip(batch, slugs):
+            _published(f, article, slug)
+
+    # Already in Supabase according to the journal: link missing tags, finish the local side
+    for f, article in already:
+        entry = journal[journal_key(article)]
+        if entry["state"] == "inserted":
+            try:
+                session.link_tags(entry["post_id"], article.get("tags", []))
+                journal_done([(journal_key(article), entry["slug"], entry["post_id"])])
+            except Exception as e:
+                click.echo(f"    ERROR (tags of {article.get('title', f.stem)}): {e}", err=True)
+                continue
+        _published(f, article, entry["slug"])
+
+    if bulk:
+        batch_size = max(1, batch_size)
+        batches = [articles[i : i + batch_size] for i in range(0, len(articles), batch_size)]
+        jobs = [(publish_batch, (batch,), f"batch of {len(batch)}, rolled back") for batch in batches]
+    else:
+        jobs = [(publish_one, (f, article), article.get("title", f.stem)) for f, article in articles]
 
-    if published_slugs and status == "published":
-        click.echo("Triggering ISR revalidation...")
-        for slug in published_slugs:
+    # One failing article (or batch) never stops the others
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fn, *args): label for fn, args, label in jobs}
+        for future in as_completed(futures):
             try:
-                trigger_revalidation(slug, settings)
+                future.result()
             except Exception as e:
-                click.echo(f"  Revalidation error for {slug}: {e}", err=True)
+                click.echo(f"    ERROR ({futures[future]}): {e}", err=True)
+
+    if revalidation is not None:
+        revalidation.close()
+        if revalidation.sent:
+            click.echo(f"Revalidated {len(revalidation.sent)} posts (ISR).")
+        for slug in revalidation.failed:
+            click.echo(f"  Revalidation error for {slug}", err=True)
 
     click.echo(f"Published {len(published_slugs)} articles.")
 
 
+def _check_article_links(
+    articles: list[tuple[Path, dict]], settings, block: bool = False
+) -> list[tuple[Path, dict]]:
+    """Report broken links per article; with ``block`` drop those articles.
+
+    If the check itself fails, ``block`` holds every article back rather
+    than publishing them unchecked.
+    """
+    from pipeline.publisher.links import broken_links
+
+    try:
+        broken = broken_links([a for _, a in articles], settings.site_url)
+    except Exception as e:
+        click.echo(f"  Links not checked: {e}", err=True)
+        if block:
+            click.echo(f"Links checked: none, {len(articles)} held back")
+            return []
+        return articles
+    kept = []
+    for (f, article), bad in zip(articles, broken):
+        if bad:
+            action = "not published" if block else "flagged"
+            click.echo(f"  Broken links in {f.name} ({action}):", err=True)
+            for url, reason in bad:
+                click.echo(f"    {reason}  {url}", err=True)
+        if not (bad and block):
+            kept.append((f, article))
+    flagged = sum(1 for bad in broken if bad)
+    held = f", {len(articles) - len(kept)} held back" if block else ""
+    click.echo(f"Links checked: {flagged} articles with broken links{held}")
+    return kept
+
+
+def _rehost_images(articles: list[tuple[Path, dict]], settings, supabase=None) -> bool:
+    """Replace hot-linked featured images with optimised copies; saves changed files.
+
+    Returns False when the image store is unusable (nothing was changed).
+    """
+    from pipeline.publisher.images import get_image_store, optimise_featured_images
+
+    try:
+        store = get_image_store(settings, supabase)
+    except Exception as e:
+        click.echo(f"  Image store not usable: {e}", err=True)
+        return False
+    try:
+        replaced = optimise_featured_images([a for _, a in articles], store)
+    except Exception as e:
+        click.echo(f"  Images not re-hosted: {e}", err=True)
+        return True
+    new_urls = set(replaced.values())
+    for f, article in articles:
+        if article.get("featured_image") in new_urls:
+            f.write_text(json.dumps(article, indent=2, ensure_ascii=False))
+    click.echo(f"Re-hosted {len(replaced)} featured images ({len(new_urls)} unique).")
+    return True
+
+
 @cli.command()
-@click.option("--provider", type=click.Choice(["ollama", "claude", "cli-agent"]), default="cli-agent")
+def images():
+    """Re-host the featured images of rewritten articles (see publish --images)."""
+    files = sorted(Path(REWRITTEN_DIR).glob("*.json"))
+    if not files:
+        click.echo("No rewritten articles.")
+        return
+    _rehost_images([(f, json.loads(f.read_text())) for f in files], get_settings())
+
+
+@cli.command("check-links")
+def check_links_command():
+    """Check the links of rewritten articles (see publish --check-links)."""
+    files = sorted(Path(REWRITTEN_DIR).glob("*.json"))
+    if not files:
+        click.echo("No rewritten articles.")
+        return
+    _check_article_links([(f, json.loads(f.read_text())) for f in files], get_settings())
+
+
+@cli.command()
+@click.option("--provider", type=click.Choice(PROVIDERS), default="cli-agent")
+@click.option("--model", default=None, help="Model name or CLI command")
+@click.option("-n", "--limit", default=0, help="Max published sources to check (0 = all)")
+@click.option("-w", "--workers", default=4, help="Sources fetched (and posts rewritten) concurrently")
+@click.option(
+    "--metadata",
+    "metadata_mode",
+    type=click.Choice(["llm", "local"]),
+    default="llm",
+    help="Generate SEO metadata with a second LLM call, or locally from the HTML",
+)
+@click.option("--dry-run", is_flag=True, help="Only report which sources changed")
+def refresh(
+    provider: str,
+    model: str | None,
+    limit: int,
+    workers: int,
+    metadata_mode: str,
+    dry_run: bool,
+):
+    """Update published posts whose source article changed.
+
+    Refetches every published source URL, compares a hash of its text with
+    the one stored when it was scraped, and for changed sources only reruns
+    the rewrite and updates the existing post in place (no new post).
+    Scraped sources are re-extracted with their sources.yaml selectors, so
+    the text is comparable with what the spider hashed.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from pipeline.rewriter.base import get_rewriter
+    from pipeline.publisher.revalidator import RevalidationQueue
+    from pipeline.publisher.supabase_client import PublisherSession
+    from pipeline.scraper.fetch_urls import fetch_article
+    from pipeline.scraper.spiders.base_spider import load_sources
+    from pipeline.storage.dedup_store import (
+        content_hash,
+        get_journal,
+        get_published_sources,
+        set_content_hash,
+    )
+
+    settings = get_settings()
+    workers = max(1, workers)
+    sources = get_published_sources()
+    journal = get_journal(list(sources))
+    # Only posts whose id is known can be updated in place
+    urls = [u for u in sources if journal.get(u, {}).get("post_id")]
+    if limit > 0:
+        urls = urls[:limit]
+    if not urls:
+        click.echo("No published sources with a known post to refresh.")
+        return
+
+    # Category hints and the published article of each source, from done/
+    done_dir = REWRITTEN_DIR / "done"
+    published = {}
+    for f in done_dir.glob("*.json"):
+        article = json.loads(f.read_text())
+        if article.get("source_url"):
+            published[article["source_url"]] = (f, article)
+
+    try:
+        source_configs = {s.get("name"): s for s in load_sources()}
+    except FileNotFoundError:
+        source_configs = {}
+    extractors = {"direct-url", *source_configs}
+
+    def check(url: str):
+        category = published.get(url, (None, {}))[1].get("category_hint", "")
+        # Same extractor as the one that produced the stored hash
+        item = fetch_article(
+            url,
+            category_hint=category,
+            force=True,
+            source_config=source_configs.get(sources[url][0]),
+        )
+        if item is None:
+            return url, None, None
+        return url, item, content_hash(item.raw_content_text)
+
+    click.echo(f"Checking {len(urls)} published sources ({workers} workers)...")
+    changed = []
+    unchanged = failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(check, u) for u in urls]):
+            url, item, new_hash = future.result()
+            if item is None:
+                failed += 1
+            elif not sources[url][1] or sources[url][0] not in extractors:
+                # Scraped before hashes were stored, or by a source no longer in
+                # sources.yaml (its hash is not comparable): this fetch becomes the baseline
+                set_content_hash(url, new_hash, source=item.source_name)
+                unchanged += 1
+            elif new_hash == sources[url][1]:
+                unchanged += 1
+            else:
+                changed.append((url, item, new_hash))
+                click.echo(f"  Changed: {item.raw_title} ({url})")
+    click.echo(f"{len(changed)} changed, {unchanged} unchanged, {failed} could not be fetched.")
+    if dry_run or not changed:
+        return
+
+    try:
+        session = PublisherSession(settings, warm=True, mirror=True)
+        rows = (
+            session.supabase.table("blog_posts")
+            .select("id, slug, title, status")
+            .in_("id", [journal[url]["post_id"] for url, _, _ in changed])
+            .execute()
+        )
+    except Exception as e:
+        click.echo(f"ERROR: {e}", err=True)
+        return
+    posts = {row["id"]: row for row in rows.data or []}
+
+    rewriter = get_rewriter(provider, model, settings, workers=workers, metadata_mode=metadata_mode)
+    revalidation = RevalidationQueue(settings) if settings.revalidation_secret else None
+
+    def update_one(url: str, item, new_hash: str) -> str:
+        post = posts.get(journal[url]["post_id"])
+        if post is None:
+            raise RuntimeError("post no longer exists")
+        raw = item.to_dict()
+        click.echo(f"  Rewriting: {post['title']}")
+        result = rewriter.rewrite(raw, checkpoint=CHECKPOINT_DIR / f"refresh-{post['slug']}.json")
+        session.update(post["id"], result, title=post["title"])
+        set_content_hash(url, new_hash)
+        # Keep the published copy in done/ in step with the site
+        out_path = published.get(url, (done_dir / f"{post['slug']}.json", None))[0]
+        done_dir.mkdir(exist_ok=True)
+        result.update(slug=post["slug"], title=post["title"])
+        out_path.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        if revalidation is not None and post["status"] == "published":
+            revalidation.add(post["slug"])
+        return post["slug"]
+
+    updated = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(update_one, *job): job[0] for job in changed}
+            for future in as_completed(futures):
+                try:
+                    click.echo(f"    -> Updated /{future.result()}")
+                    updated += 1
+                except Exception as e:
+                    click.echo(f"    ERROR ({futures[future]}): {e}", err=True)
+    finally:
+        rewriter.close()
+        if revalidation is not None:
+            revalidation.close()
+            for slug in revalidation.failed:
+                click.echo(f"  Revalidation error for {slug}", err=True)
+
+    click.echo(f"Updated {updated} of {len(changed)} changed posts.")
+
+
+@cli.command()
+@click.option("--provider", type=click.Choice(PROVIDERS), default="cli-agent")
 @click.option("--model", default=None, help="Model name or CLI command")
 @click.option("--author-id", default=None, help="Author UUID")
 @click.option("--status", type=click.Choice(["draft", "published"]), default="draft")
 @click.option("--source", default=None, help="Source name from sources.yaml")
 @click.option("-n", "--limit", default=5, help="Max articles per step")
 def run(provider: str, model: str | None, author_id: str | None, status: str, source: str | None, limit: int):
-    """Run the full pipeline: scrape -> rewrite -> publish."""
+    """Run the full pipeline: scrape -> gate -> rewrite -> publish."""
     ctx = click.get_current_context()
 
     click.echo("=== SCRAPE ===")
     ctx.invoke(scrape, source=source, limit=limit)
 
+    click.echo("\n=== GATE ===")
+    ctx.invoke(gate)
+
     click.echo("\n=== REWRITE ===")
     ctx.invoke(rewrite, provider=provider, model=model, limit=limit)
 
@@ -174,10 +695,16 @@ def run(provider: str, model: str | None, author_id: str | None, status: str, so
 
 
 @cli.command()
-@click.argument("topic", required=True)
+@click.argument("topic", required=False)
+@click.option(
+    "--topics-file",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="File with one topic per line, optionally 'topic | category'",
+)
 @click.option(
     "--provider",
-    type=click.Choice(["ollama", "claude", "cli-agent"]),
+    type=click.Choice(PROVIDERS),
     default="cli-agent",
     help="LLM provider for writing the blog post",
 )
@@ -197,83 +724,418 @@ def run(provider: str, model: str | None, author_id: str | None, status: str, so
     default="",
     help="Category hint (e.g. immunity, cold_relief) for the post",
 )
+@click.option(
+    "--metadata",
+    "metadata_mode",
+    type=click.Choice(["llm", "local"]),
+    default="llm",
+    help="Generate SEO metadata with a second LLM call, or locally from the HTML",
+)
+@click.option("-w", "--workers", default=1, help="Topics to write concurrently (with --topics-file)")
+@click.option("--refresh", is_flag=True, help="Rebuild the local site mirror before checking topics")
 def write(
-    topic: str,
+    topic: str | None,
+    topics_file: Path | None,
     provider: str,
     model: str | None,
     author_id: str | None,
     no_publish: bool,
     category: str,
+    metadata_mode: str,
+    workers: int = 1,
+    refresh: bool = False,
 ):
-    """Write a blog draft from a topic using rewriter + prompts (products from config/products.json)."""
+    """Write blog drafts from a topic (or a topics file) using rewriter + prompts.
+
+    Products come from config/products.json. With --topics-file, topics run
+    through a worker pool; topics already written or already on the site are
+    skipped, and progress is saved so an interrupted batch can be rerun.
+    A topic counts as on the site when a post has its title or slug, checked
+    before writing and again on the drafted title and slug.
+    """
+    import threading
+    from concurrent.futures import ThreadPoolExecutor, as_completed
     from pipeline.rewriter.base import get_rewriter
-    from pipeline.publisher.supabase_client import publish_article
+    from pipeline.publisher.supabase_client import PublisherSession
+    from pipeline.storage.dedup_store import journal_key
+    from pipeline.storage.site_mirror import existing_slugs, existing_titles, normalize_title
+    from pipeline.storage.metrics_store import record_published
+    from pipeline.topics import TopicProgress, read_topics_file, topic_key
 
-    settings = get_settings()
-    rewriter = get_rewriter(provider, model, settings)
-
-    raw_article = {
-        "topic_only": True,
-        "topic": topic.strip(),
-        "raw_title": topic.strip(),
-        "raw_content_text": topic.strip(),
-        "category_hint": category.strip(),
-    }
-
-    click.echo(f"Writing blog post for topic: {topic}")
-    click.echo(f"Using provider: {provider} (products from config/products.json)")
-    click.echo("This may take 2–5 minutes depending on the LLM...")
-    try:
-        result = rewriter.rewrite(raw_article)
-    except Exception as e:
-        click.echo(f"ERROR: {e}", err=True)
-        import traceback
-        traceback.print_exc()
-        raise click.Abort()
-
-    slug = result.get("slug", "").strip() or _slug_for_filename(topic)
-    safe_name = f"{slug}.json"
-    out_path = Path(REWRITTEN_DIR) / safe_name
-    out_path.write_text(json.dumps(result, indent=2, ensure_ascii=False))
-    click.echo(f"Saved: {out_path}")
-
-    if no_publish:
-        click.echo("Skipping publish (--no-publish). Run: pipeline publish --status draft -n 1")
-        return
+    if topics_file:
+        topics = read_topics_file(topics_file)
+        topics = [(t, c or category.strip()) for t, c in topics]
+    elif topic:
+        topics = [(topic.strip(), category.strip())]
+    else:
+        raise click.UsageError("Pass a TOPIC or --topics-file")
 
+    settings = get_settings()
+    progress = TopicProgress()
     author = author_id or settings.pipeline_default_author_id
-    if not author:
+    publish = not no_publish
+    if publish and not author:
         click.echo(
             "ERROR: Set --author-id or PIPELINE_DEFAULT_AUTHOR_ID to publish draft.",
             err=True,
         )
-        click.echo("Draft saved to data/rewritten/; publish later with: pipeline publish -n 1")
+        click.echo("Drafts will be saved to data/rewritten/; publish later with: pipeline publish")
+        publish = False
+
+    session = None
+    if publish:
+        try:
+            session = PublisherSession(settings, warm=True, mirror=True, refresh=refresh)
+        except Exception as e:
+            click.echo(f"Publish disabled: {e}", err=True)
+            publish = False
+
+    # Skip topics already written (locally) or whose slug is already on the site
+    done_dir = Path(REWRITTEN_DIR) / "done"
+
+    def local_file(slug: str) -> Path | None:
+        for d in (Path(REWRITTEN_DIR), done_dir):
+            if (d / f"{slug}.json").exists():
+                return d / f"{slug}.json"
+        return None
+
+    def on_site(titles: list[str], slugs: list[str]) -> tuple[set[str], set[str]]:
+        """(normalized titles, slugs) among these that mirrored posts already use."""
+        if session is None:
+            return set(), set()
+        try:
+            return existing_titles(titles), existing_slugs(slugs)
+        except Exception as e:
+            click.echo(f"  Could not check existing posts: {e}", err=True)
+            return set(), set()
+
+    candidates = {t: progress.get(t).get("slug") or topic_key(t) for t, _ in topics}
+    remote_titles, remote_slugs = on_site([t for t, _ in topics], sorted(set(candidates.values())))
+
+    pending = []
+    for t, cat in topics:
+        slug = candidates[t]
+        entry = progress.get(t)
+        if (
+            slug in remote_slugs
+            or normalize_title(t) in remote_titles
+            or entry.get("status") in ("published", "on_site")
+        ):
+            click.echo(f"  Skipping (already on site): {t}")
+        elif entry.get("status") == "written" and local_file(slug) and not publish:
+            click.echo(f"  Skipping (already written): {t}")
+        else:
+            pending.append((t, cat))
+
+    if not pending:
+        click.echo("Nothing to write.")
         return
 
-    try:
-        published_slug = publish_article(result, author_id=author, status="draft", settings=settings)
-        click.echo(f"Published as DRAFT: /blog/{published_slug}")
+    rewriter = get_rewriter(
+        provider, model, settings, workers=max(1, workers), metadata_mode=metadata_mode
+    )
+    # Output names and drafted titles claimed by this run's workers
+    claim_lock = threading.Lock()
+    claimed_files: set[str] = set()
+    claimed_titles: set[str] = set()
+
+    def claim(slug: str, title: str) -> Path | None:
+        """Reserve a free output file for a draft; None if its title is taken."""
+        titles, slugs = on_site([title], [slug])
+        with claim_lock:
+            if titles or slugs or normalize_title(title) in claimed_titles:
+                return None
+            claimed_titles.add(normalize_title(title))
+            name, n = slug, 2
+            while name in claimed_files or local_file(name):
+                name, n = f"{slug}-{n}", n + 1
+            claimed_files.add(name)
+        return Path(REWRITTEN_DIR) / f"{name}.json"
+
+    def write_one(t: str, cat: str) -> str:
+        entry = progress.get(t)
+        existing = local_file(entry["slug"]) if entry.get("status") == "written" else None
+        if existing:
+            result, out_path = json.loads(existing.read_text()), existing
+        else:
+            click.echo(f"  Writing: {t}")
+            raw_article = {
+                "topic_only": True,
+                "topic": t,
+                "raw_title": t,
+                "raw_content_text": t,
+                "category_hint": cat,
+            }
+            result = rewriter.rewrite(raw_article, checkpoint=CHECKPOINT_DIR / f"{topic_key(t)}.json")
+            slug = result.get("slug", "").strip() or topic_key(t)
+            out_path = claim(slug, result.get("title", "") or t)
+            if out_path is None:
+                # The drafted post duplicates one on the site or in this batch
+                progress.mark(t, slug, "on_site")
+                click.echo(f"    Skipping (already on site or in this batch): {result.get('title', t)}")
+                return ""
+            out_path.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+            progress.mark(t, out_path.stem, "written")
+            click.echo(f"    Saved: {out_path}")
+
+        if not publish or out_path.parent == done_dir:
+            return result.get("slug", "")
+        published_slug = session.publish(
+            result,
+            author_id=author,
+            status="draft",
+            journal_key=journal_key(result),
+            file=out_path.name,
+        )
+        progress.mark(t, published_slug, "published")
+        record_published([published_slug], [f"topic:{t}"])
         # Move to done so it is not published again by a full publish run
-        done_dir = Path(REWRITTEN_DIR) / "done"
         done_dir.mkdir(exist_ok=True)
         out_path.rename(done_dir / out_path.name)
+        click.echo(f"    Published as DRAFT: /blog/{published_slug}")
+        return published_slug
+
+    click.echo(f"Writing {len(pending)} topic(s) with {provider} ({max(1, workers)} workers)")
+    click.echo("Each post may take 2–5 minutes depending on the LLM...")
+    failed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(write_one, t, cat): t for t, cat in pending}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    failed += 1
+                    click.echo(f"    ERROR ({futures[future]}): {e}", err=True)
+    finally:
+        rewriter.close()
+
+    click.echo(f"Done: {len(pending) - failed} written, {failed} failed.")
+    if failed:
+        click.echo("Rerun the same command to retry; finished topics are skipped.")
+        if len(topics) == 1:
+            raise click.Abort()
+
+
+@cli.command()
+@click.option("--provider", type=click.Choice(PROVIDERS), default="mock")
+@click.option("--model", default=None, help="Model name or CLI command")
+@click.option("-n", "--articles", default=20, help="Synthetic articles per run")
+@click.option("--concurrency", default="1,4,8", help="Comma-separated worker counts to compare")
+@click.option("--latency-ms", default=None, type=float, help="Mock median latency per call")
+@click.option("--error-rate", default=None, type=float, help="Mock share of calls that fail (0-1)")
+def bench(
+    provider: str,
+    model: str | None,
+    articles: int,
+    concurrency: str,
+    latency_ms: float | None,
+    error_rate: float | None,
+):
+    """Benchmark rewrite throughput on synthetic articles (nothing is saved)."""
+    from pipeline.benchmark import synthetic_articles, run_rewrite_benchmark
+    from pipeline.rewriter.base import get_rewriter
+    from pipeline.rewriter.scheduler import reset_schedulers
+    from pipeline.rewriter.usage import set_recording
+
+    settings = get_settings()
+    set_recording(False)
+    overrides = {}
+    if latency_ms is not None:
+        overrides["mock_latency_ms"] = latency_ms
+    if error_rate is not None:
+        overrides["mock_error_rate"] = error_rate
+    if overrides:
+        settings = settings.model_copy(update=overrides)
+
+    levels = [int(c) for c in concurrency.split(",") if c.strip()]
+    batch = synthetic_articles(articles)
+
+    def make_rewriter(workers: int):
+        reset_schedulers()
+        return get_rewriter(provider, model, settings, workers=workers)
+
+    click.echo(f"Benchmarking {provider} rewrite on {articles} synthetic articles...")
+    click.echo(f"  {'workers':>7}  {'art/min':>8}  {'p50 s':>6}  {'p95 s':>6}  {'errors':>6}  {'peak MB':>7}")
+    for workers in levels:
+        r = run_rewrite_benchmark(make_rewriter, batch, workers)
+        click.echo(
+            f"  {r['concurrency']:>7}  {r['articles_per_min']:>8}  {r['p50_s']:>6}  "
+            f"{r['p95_s']:>6}  {r['errors']:>6}  {r['peak_mem_mb']:>7}"
+        )
+
+
+@cli.command()
+@click.option("--refresh", is_flag=True, help="Rebuild the mirror from scratch (drops deleted posts)")
+def mirror(refresh: bool):
+    """Sync the local mirror of blog posts, categories and tags."""
+    from pipeline.publisher.supabase_client import _get_client
+    from pipeline.storage import site_mirror
+
+    try:
+        fetched = site_mirror.sync(_get_client(get_settings()), full=refresh)
     except Exception as e:
-        click.echo(f"Publish failed: {e}", err=True)
-        click.echo("Draft file left in data/rewritten/; fix credentials and run: pipeline publish -n 1")
+        click.echo(f"ERROR: {e}", err=True)
+        return
+    stats = site_mirror.get_stats()
+    click.echo(
+        f"Fetched {fetched['blog_posts']} posts, {fetched['blog_categories']} categories, "
+        f"{fetched['blog_tags']} tags."
+    )
+    click.echo(
+        f"Mirror: {stats['posts']} posts, {stats['categories']} categories, "
+        f"{stats['tags']} tags (posts up to {stats['synced_to'] or '-'})"
+    )
+
+
+@cli.command("seo-audit")
+@click.option("--site", is_flag=True, help="Also audit every post in Supabase blog_posts")
+@click.option("--format", "fmt", type=click.Choice(["csv", "json"]), default="csv")
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Report file (default data/seo_audit.csv or .json)",
+)
+@click.option("-w", "--workers", default=0, help="Processes for scoring (0 = CPU count)")
+@click.option("--top", default=10, help="Articles with the biggest cheap gains to print")
+def seo_audit(site: bool, fmt: str, output: Path | None, workers: int, top: int):
+    """Score every rewritten and published article and rank cheap SEO fixes."""
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    from pipeline.settings import DATA_DIR
+    from pipeline.publisher.seo_audit import (
+        POST_COLUMNS,
+        audit_file,
+        audit_post,
+        rank,
+        to_csv,
+        to_json,
+    )
+
+    files = sorted(Path(REWRITTEN_DIR).glob("*.json")) + sorted(
+        (Path(REWRITTEN_DIR) / "done").glob("*.json")
+    )
+    rows: list[dict] = []
+    if site:
+        from pipeline.publisher.supabase_client import _get_client
+        from pipeline.storage.site_mirror import PAGE_SIZE
+
+        try:
+            supabase = _get_client(get_settings())
+            start = 0
+            while True:
+                page = (
+                    supabase.table("blog_posts")
+                    .select(POST_COLUMNS)
+                    .order("id")
+                    .range(start, start + PAGE_SIZE - 1)
+                    .execute()
+                    .data
+                    or []
+                )
+                rows.extend(page)
+                if len(page) < PAGE_SIZE:
+                    break
+                start += PAGE_SIZE
+        except Exception as e:
+            click.echo(f"ERROR: {e}", err=True)
+            return
+
+    if not files and not rows:
+        click.echo("No articles to audit.")
+        return
+
+    workers = workers or os.cpu_count() or 1
+    click.echo(f"Auditing {len(files)} files and {len(rows)} site posts ({workers} processes)...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        audits = list(pool.map(audit_file, files, chunksize=16))
+        audits += list(pool.map(audit_post, rows, chunksize=16))
+
+    for bad in (a for a in audits if "error" in a):
+        click.echo(f"  Unreadable: {bad['source']} ({bad['error']})", err=True)
+    ranked = rank(audits)
+
+    output = output or DATA_DIR / f"seo_audit.{fmt}"
+    output.write_text(to_csv(ranked) if fmt == "csv" else to_json(ranked))
+
+    average = sum(a["score"] for a in ranked) / len(ranked) if ranked else 0
+    fixable = [a for a in ranked if a["cheap_gain"]]
+    click.echo(
+        f"Average score {average:.0f}/100; "
+        f"{len(fixable)} articles gain points from metadata fixes."
+    )
+    for audit in fixable[:top]:
+        click.echo(f"  {audit['score']:>3} +{audit['cheap_gain']:<3} {audit['slug'] or audit['source']}")
+        for fix in audit["fixes"]:
+            click.echo(f"        {fix}")
+    click.echo(f"Report: {output}")
 
 
 @cli.command()
 def status():
     """Show pipeline status and stats."""
-    from pipeline.storage.dedup_store import get_stats
+    from pipeline.storage.dedup_store import get_stats, get_rejection_reasons
+    from pipeline.storage.site_mirror import get_stats as site_mirror_stats
 
     raw_count = len(list(Path(RAW_DIR).glob("*.json")))
     rewritten_count = len(list(Path(REWRITTEN_DIR).glob("*.json")))
+    checkpoint_count = len(list(Path(CHECKPOINT_DIR).glob("*.json")))
     dedup = get_stats()
 
     click.echo("Pipeline Status:")
     click.echo(f"  Raw articles:       {raw_count}")
     click.echo(f"  Rewritten articles: {rewritten_count}")
+    click.echo(f"  Partial rewrites:   {checkpoint_count}")
     click.echo(f"  Total scraped:      {dedup['total_scraped']}")
     click.echo(f"  Published:          {dedup['published']}")
     click.echo(f"  Pending publish:    {dedup['pending']}")
+    click.echo(f"  Rejected by gate:   {dedup['rejected']}")
+    for reason, count in get_rejection_reasons().items():
+        click.echo(f"    {reason:<16} {count}")
+    mirror_stats = site_mirror_stats()
+    synced_to = mirror_stats["synced_to"] or "never synced"
+    click.echo(f"  Site mirror:        {mirror_stats['posts']} posts ({synced_to})")
+    if dedup["unconfirmed_publishes"]:
+        click.echo(f"  Unconfirmed publishes: {dedup['unconfirmed_publishes']} (settled by the next publish)")
+
+
+@cli.group()
+def stats():
+    """Reports from the local metrics database."""
+
+
+@stats.command("llm")
+@click.option("--days", default=30, help="How far back to report")
+@click.option(
+    "--by",
+    "group_by",
+    type=click.Choice(["day", "provider"]),
+    default="day",
+    help="Group rows by day or by provider/model",
+)
+def stats_llm(days: int, group_by: str):
+    """LLM calls, tokens, throughput and cost per published post."""
+    from pipeline.storage.metrics_store import usage_report
+
+    rows, published = usage_report(days=days, group_by=group_by)
+    if not rows:
+        click.echo(f"No LLM calls recorded in the last {days} days.")
+        return
+
+    click.echo(
+        f"{group_by.capitalize():<24} {'calls':>6} {'failed':>6} {'tokens in':>10} {'tokens out':>10} "
+        f"{'avg s':>7} {'tok/s':>7} {'cost $':>8} {'articles':>8} {'$/post':>7}"
+    )
+    for row in rows:
+        per_post = f"{row['cost_per_post']:.3f}" if row["cost_per_post"] is not None else "-"
+        click.echo(
+            f"{row['group'][:24]:<24} {row['calls']:>6} {row['failed']:>6} {row['input_tokens']:>10,} "
+            f"{row['output_tokens']:>10,} {row['avg_latency_s']:>7.1f} {row['tokens_per_s']:>7.1f} "
+            f"{row['cost_usd']:>8.3f} {row['articles']:>8} {per_post:>7}"
+        )
+    total_cost = sum(r["cost_usd"] for r in rows)
+    total_calls = sum(r["calls"] for r in rows)
+    per_post = f"${total_cost / published:.3f}/post" if published else "no posts published"
+    click.echo(f"Total: {total_calls} calls, ${total_cost:.2f}, {published} posts published, {per_post}")
@@ -7,6 +7,7 @@ from supabase import Client
 
 from pipeline.settings import CONFIG_DIR
 from pipeline.publisher.slug_generator import generate_slug
+from pipeline.storage.site_mirror import PAGE_SIZE
 
 
 def load_category_mapping() -> dict:
@@ -19,62 +20,121 @@ def load_category_mapping() -> dict:
     return config.get("mappings", {})
 
 
-def resolve_category(category_hint: str, supabase: Client) -> str | None:
-    """Resolve a category hint to a category UUID.
+def warm_cache(table: str, supabase: Client, cache: dict[str, str]) -> None:
+    """Load every slug -> id of ``table`` (blog_categories or blog_tags) into ``cache``."""
+    start = 0
+    while True:
+        result = (
+            supabase.table(table)
+            .select("id, slug")
+            .order("id")
+            .range(start, start + PAGE_SIZE - 1)
+            .execute()
+        )
+        rows = result.data or []
+        cache.update({row["slug"]: row["id"] for row in rows})
+        if len(rows) < PAGE_SIZE:
+            return
+        start += PAGE_SIZE
 
-    Looks up the category mapping, then finds or creates the category in Supabase.
-    Returns the category UUID or None.
+
+def resolve_slugs(
+    table: str, names_by_slug: dict[str, str], supabase: Client, cache: dict[str, str]
+) -> dict[str, str]:
+    """Ids for every slug in ``names_by_slug``, creating the missing rows.
+
+    One ``in_`` select for slugs not in ``cache`` and one upsert for those
+    still missing. The upsert ignores conflicts, so a row created meanwhile
+    by another publisher is picked up by a final select instead of duplicated.
     """
-    if not category_hint:
-        return None
+    missing = [slug for slug in names_by_slug if slug not in cache]
+    if missing:
+        result = supabase.table(table).select("id, slug").in_("slug", missing).execute()
+        cache.update({row["slug"]: row["id"] for row in result.data or []})
+        missing = [slug for slug in missing if slug not in cache]
+    if missing:
+        result = (
+            supabase.table(table)
+            .upsert(
+                [{"name": names_by_slug[slug], "slug": slug} for slug in missing],
+                on_conflict="slug",
+                ignore_duplicates=True,
+            )
+            .execute()
+        )
+        cache.update({row["slug"]: row["id"] for row in result.data or []})
+        missing = [slug for slug in missing if slug not in cache]
+    if missing:
+        result = supabase.table(table).select("id, slug").in_("slug", missing).execute()
+        cache.update({row["slug"]: row["id"] for row in result.data or []})
+    return {slug: cache[slug] for slug in names_by_slug if slug in cache}
+
 
-    mappings = load_category_mapping()
+def category_name_and_slug(category_hint: str, mappings: dict) -> tuple[str, str]:
     category_name = mappings.get(category_hint, category_hint.replace("-", " ").title())
-    slug = generate_slug(category_name)
+    return category_name, generate_slug(category_name)
+
+
+def resolve_categories(
+    category_hints: list[str],
+    supabase: Client,
+    mappings: dict | None = None,
+    cache: dict[str, str] | None = None,
+) -> dict[str, str]:
+    """Category UUID per hint for a whole batch of articles (empty hints are skipped)."""
+    if mappings is None:
+        mappings = load_category_mapping()
+    cache = {} if cache is None else cache
+    slug_by_hint = {}
+    names_by_slug = {}
+    for hint in filter(None, category_hints):
+        name, slug = category_name_and_slug(hint, mappings)
+        slug_by_hint[hint] = slug
+        names_by_slug[slug] = name
+    ids = resolve_slugs("blog_categories", names_by_slug, supabase, cache)
+    return {hint: ids[slug] for hint, slug in slug_by_hint.items() if slug in ids}
+
+
+def resolve_tag_names(
+    tag_names: list[str], supabase: Client, cache: dict[str, str] | None = None
+) -> dict[str, str]:
+    """Tag UUID per tag slug for a whole batch of articles."""
+    cache = {} if cache is None else cache
+    names_by_slug = {}
+    for name in tag_names:
+        name = name.strip()
+        if name:
+            names_by_slug.setdefault(generate_slug(name), name)
+    return resolve_slugs("blog_tags", names_by_slug, supabase, cache)
 
-    # Try to find existing category
-    result = supabase.table("blog_categories").select("id").eq("slug", slug).execute()
-    if result.data:
-        return result.data[0]["id"]
 
-    # Create new category
-    result = (
-        supabase.table("blog_categories")
-        .insert({"name": category_name, "slug": slug})
-        .execute()
-    )
-    if result.data:
-        return result.data[0]["id"]
+def resolve_category(
+    category_hint: str,
+    supabase: Client,
+    mappings: dict | None = None,
+    cache: dict[str, str] | None = None,
+) -> str | None:
+    """Resolve a category hint to a category UUID.
 
-    return None
+    Looks up the category mapping, then finds or creates the category in Supabase.
+    Returns the category UUID or None.
+    """
+    if not category_hint:
+        return None
+    return resolve_categories([category_hint], supabase, mappings, cache).get(category_hint)
 
 
-def resolve_tags(tag_names: list[str], supabase: Client) -> list[str]:
+def resolve_tags(
+    tag_names: list[str], supabase: Client, cache: dict[str, str] | None = None
+) -> list[str]:
     """Resolve tag names to tag UUIDs. Creates tags if they don't exist.
 
-    Returns list of tag UUIDs.
+    Returns list of tag UUIDs (in the order given, without duplicates).
     """
+    ids = resolve_tag_names(tag_names, supabase, cache)
     tag_ids = []
     for name in tag_names:
-        name = name.strip()
-        if not name:
-            continue
-
-        slug = generate_slug(name)
-
-        # Try to find existing tag
-        result = supabase.table("blog_tags").select("id").eq("slug", slug).execute()
-        if result.data:
-            tag_ids.append(result.data[0]["id"])
-            continue
-
-        # Create new tag
-        result = (
-            supabase.table("blog_tags")
-            .insert({"name": name, "slug": slug})
-            .execute()
-        )
-        if result.data:
-            tag_ids.append(result.data[0]["id"])
-
+        tag_id = ids.get(generate_slug(name.strip())) if name.strip() else None
+        if tag_id and tag_id not in tag_ids:
+            tag_ids.append(tag_id)
     return tag_ids
@@ -0,0 +1,280 @@
+"""Featured images: download, dedupe, recompress and upload.
+
+Scraped articles point ``featured_image`` at the source site. Before
+publishing, each image is downloaded (thread pool, one pooled client),
+deduplicated by content hash, resized to a few of the site's breakpoints
+(next.config deviceSizes) and re-encoded to WebP, plus AVIF when Pillow
+supports it, in a process pool. The variants are uploaded to a Supabase
+Storage bucket, or to data/images/ (served at IMAGE_BASE_URL) with the
+local store, and ``featured_image`` is rewritten to the largest variant.
+
+Without Pillow (a requirement, but imported lazily) images are still
+downloaded, deduplicated and re-hosted, just not resized or re-encoded,
+and a warning says so.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import mimetypes
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+
+from pipeline.settings import DATA_DIR, Settings
+
+try:
+    from PIL import Image
+except ImportError:  # warned about in optimise_featured_images()
+    Image = None
+
+# Widths from next.config.js deviceSizes that blog images are served at
+BREAKPOINTS = (640, 1080, 1920)
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+DOWNLOAD_WORKERS = 8
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+LOCAL_DIR = DATA_DIR / "images"
+
+
+def _avif_supported() -> bool:
+    return Image is not None and "AVIF" in Image.registered_extensions().values()
+
+
+def process_image(data: bytes) -> list[tuple[str, str, bytes]]:
+    """(file name, content type, bytes) of every variant of one image.
+
+    Runs in a worker process. Images narrower than a breakpoint are not
+    upscaled; the original width is used once instead.
+    """
+    if Image is None:
+        content_type = _sniff_type(data)
+        if content_type is None:
+            # Unknown format: keep the original URL rather than host an opaque blob
+            return []
+        return [(f"original{mimetypes.guess_extension(content_type)}", content_type, data)]
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        widths = sorted({min(width, image.width) for width in BREAKPOINTS})
+        formats = [("webp", "WEBP", "image/webp", {"quality": WEBP_QUALITY, "method": 4})]
+        if _avif_supported():
+            formats.append(("avif", "AVIF", "image/avif", {"quality": AVIF_QUALITY}))
+
+        variants = []
+        for width in widths:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for extension, pil_format, content_type, options in formats:
+                buffer = io.BytesIO()
+                resized.save(buffer, pil_format, **options)
+                variants.append((f"{width}.{extension}", content_type, buffer.getvalue()))
+        return variants
+
+
+def _sniff_type(data: bytes) -> str | None:
+    signatures = {
+        b"\xff\xd8\xff": "image/jpeg",
+        b"\x89PNG": "image/png",
+        b"GIF8": "image/gif",
+    }
+    for magic, content_type in signatures.items():
+        if data.startswith(magic):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _largest(names: list[str]) -> str:
+    """File name of the variant used as ``featured_image`` (widest WebP)."""
+    webp = [name for name in names if name.endswith(".webp") and name.split(".", 1)[0].isdigit()]
+    if not webp:
+        return names[0]
+    return max(webp, key=lambda name: int(name.split(".", 1)[0]))
+
+
+def _featured_name(data: bytes) -> str | None:
+    """Name ``process_image`` gives the variant ``_largest`` picks, read from the header."""
+    if Image is None:
+        content_type = _sniff_type(data)
+        return f"original{mimetypes.guess_extension(content_type)}" if content_type else None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            width = image.width
+    except Exception:
+        return None
+    return f"{min(width, max(BREAKPOINTS))}.webp"
+
+
+class LocalImageStore:
+    """Writes to data/images/, which the site serves at ``base_url``."""
+
+    def __init__(self, base_url: str, root: Path = LOCAL_DIR):
+        if not base_url.startswith(("http://", "https://")):
+            raise ValueError(
+                "IMAGE_BASE_URL must be the public http(s) URL serving data/images/ "
+                "when IMAGE_STORE=local"
+            )
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def existing(self, folder: str) -> list[str]:
+        directory = self.root / folder
+        return sorted(p.name for p in directory.iterdir()) if directory.is_dir() else []
+
+    def upload(self, path: str, data: bytes, content_type: str) -> None:
+        target = self.root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+
+    def public_url(self, path: str) -> str:
+        return f"{self.base_url}/{path}"
+
+
+class SupabaseImageStore:
+    """Uploads to a public Supabase Storage bucket."""
+
+    def __init__(self, supabase, bucket: str):
+        self.bucket = supabase.storage.from_(bucket)
+
+    def existing(self, folder: str) -> list[str]:
+        return [entry["name"] for entry in self.bucket.list(folder) or []]
+
+    def upload(self, path: str, data: bytes, content_type: str) -> None:
+        self.bucket.upload(
+            path,
+            data,
+            file_options={
+                "content-type": content_type,
+                "cache-control": "31536000",
+                "upsert": "true",
+            },
+        )
+
+    def public_url(self, path: str) -> str:
+        return self.bucket.get_public_url(path).rstrip("?")
+
+
+def get_image_store(settings: Settings, supabase=None):
+    """Store selected by IMAGE_STORE (``supabase`` or ``local``)."""
+    if settings.image_store == "local":
+        return LocalImageStore(settings.image_base_url)
+    if supabase is None:
+        from pipeline.publisher.supabase_client import _get_client
+
+        supabase = _get_client(settings)
+    return SupabaseImageStore(supabase, settings.image_bucket)
+
+
+def download_images(urls: list[str], workers: int = DOWNLOAD_WORKERS) -> dict[str, bytes | None]:
+    """url -> bytes (None when the download failed), fetched concurrently."""
+    headers = {"User-Agent": "Mozilla/5.0 (compatible; HeldeeLifeBlogPipeline/1.0)"}
+    with httpx.Client(
+        headers=headers,
+        follow_redirects=True,
+        timeout=httpx.Timeout(30.0, connect=10.0),
+        limits=httpx.Limits(max_connections=workers),
+    ) as client:
+
+        def fetch(url: str) -> bytes | None:
+            try:
+                response = client.get(url)
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                print(f"    Image download failed ({url}): {e}")
+                return None
+            if not response.headers.get("content-type", "image/").startswith("image/"):
+                print(f"    Not an image ({url}): {response.headers.get('content-type')}")
+                return None
+            if len(response.content) > MAX_IMAGE_BYTES:
+                print(f"    Image too large ({url}): {len(response.content)} bytes")
+                return None
+            return response.content
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return dict(zip(urls, pool.map(fetch, urls)))
+
+
+def optimise_featured_images(
+    articles: list[dict], store, processes: int | None = None
+) -> dict[str, str]:
+    """Re-host the featured image of every article; returns old -> new URL.
+
+    ``featured_image`` is rewritten in place. Images already hosted by
+    ``store``, or whose download or processing fails, are left untouched.
+    Identical images (same bytes, different URLs) are processed and
+    uploaded once, and images uploaded by an earlier run are not uploaded
+    again.
+    """
+    prefix = store.public_url("")
+    urls = sorted(
+        {
+            a["featured_image"]
+            for a in articles
+            if a.get("featured_image", "").startswith("http")
+            and not a["featured_image"].startswith(prefix)
+        }
+    )
+    if not urls:
+        return {}
+    if Image is None:
+        print(
+            "  WARNING: Pillow is not installed (pip install -r requirements.txt); "
+            "featured images are re-hosted without resizing or WebP/AVIF"
+        )
+
+    downloads = {url: data for url, data in download_images(urls).items() if data}
+    by_hash: dict[str, bytes] = {}
+    hash_of: dict[str, str] = {}
+    for url, data in downloads.items():
+        digest = hashlib.sha256(data).hexdigest()[:24]
+        by_hash.setdefault(digest, data)
+        hash_of[url] = digest
+
+    # Skip images this store already has from an earlier run. An interrupted
+    # upload leaves a partial folder, so the featured variant itself must exist.
+    def already_hosted(digest: str) -> str | None:
+        name = _featured_name(by_hash[digest])
+        return name if name and name in store.existing(f"blog/{digest}") else None
+
+    hosted: dict[str, str] = {}
+    todo = []
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+        for digest, name in zip(by_hash, pool.map(already_hosted, by_hash)):
+            if name:
+                hosted[digest] = f"blog/{digest}/{name}"
+            else:
+                todo.append(digest)
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = pool.map(_process_safely, [by_hash[d] for d in todo])
+            for digest, variants in zip(todo, results):
+                if not variants:
+                    continue
+                for name, content_type, data in variants:
+                    store.upload(f"blog/{digest}/{name}", data, content_type)
+                hosted[digest] = f"blog/{digest}/{_largest([name for name, _, _ in variants])}"
+
+    replaced = {
+        url: store.public_url(hosted[digest])
+        for url, digest in hash_of.items()
+        if digest in hosted
+    }
+    for article in articles:
+        new_url = replaced.get(article.get("featured_image", ""))
+        if new_url:
+            article["featured_image"] = new_url
+    return replaced
+
+
+def _process_safely(data: bytes) -> list[tuple[str, str, bytes]]:
+    try:
+        return process_image(data)
+    except Exception as e:
+        print(f"    Image processing failed: {e}")
+        return []
@@ -0,0 +1,102 @@
+"""Link validation for rewritten HTML before it is published.
+
+All ``href`` values of a batch are extracted, resolved against SITE_URL,
+deduplicated and checked concurrently over one pooled client: HEAD first,
+GET when the server refuses HEAD. Definitive answers (an HTTP status
+other than 429) are cached in data/link_cache.sqlite for CACHE_TTL_HOURS,
+so a product URL used by a hundred posts is requested once a day at most.
+Timeouts and connection errors are reported but checked again next run.
+"""
+from __future__ import annotations
+
+import html
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urldefrag
+
+import httpx
+
+from pipeline.storage import link_cache
+
+CACHE_TTL_HOURS = 24
+CHECK_WORKERS = 16
+# Statuses where HEAD is not supported or refused but GET may work
+HEAD_FALLBACK_STATUSES = {403, 405, 501}
+# Throttled: neither broken nor worth caching (transport errors are not cached either)
+RETRY_LATER_STATUSES = {429}
+
+_HREF_RE = re.compile(r"""<a\b[^>]*?\bhref\s*=\s*(["'])(.*?)\1""", re.IGNORECASE | re.DOTALL)
+
+
+def extract_links(content_html: str, base_url: str = "") -> list[str]:
+    """Absolute http(s) URLs linked from ``content_html``, in order, without duplicates."""
+    links = []
+    for _, href in _HREF_RE.findall(content_html or ""):
+        href = html.unescape(href.strip())
+        if not href or href.startswith(("#", "mailto:", "tel:", "javascript:")):
+            continue
+        url, _ = urldefrag(urljoin(base_url.rstrip("/") + "/", href) if base_url else href)
+        if url.startswith(("http://", "https://")) and url not in links:
+            links.append(url)
+    return links
+
+
+def _check(client: httpx.Client, url: str) -> tuple[bool, int | None, str]:
+    try:
+        response = client.head(url)
+        if response.status_code in HEAD_FALLBACK_STATUSES:
+            with client.stream("GET", url) as response:
+                pass
+    except httpx.HTTPError as e:
+        try:
+            with client.stream("GET", url) as response:
+                pass
+        except httpx.HTTPError:
+            return False, None, e.__class__.__name__
+    status = response.status_code
+    return status < 400 or status in RETRY_LATER_STATUSES, status, ""
+
+
+def check_links(
+    urls: list[str], workers: int = CHECK_WORKERS, ttl_hours: float = CACHE_TTL_HOURS
+) -> dict[str, tuple[bool, int | None, str]]:
+    """url -> (ok, status, error); cached results younger than ``ttl_hours`` are reused."""
+    urls = list(dict.fromkeys(urls))
+    results = link_cache.get_fresh(urls, ttl_hours)
+    todo = [url for url in urls if url not in results]
+    if todo:
+        headers = {"User-Agent": "Mozilla/5.0 (compatible; HeldeeLifeLinkCheck/1.0)"}
+        with httpx.Client(
+            headers=headers,
+            follow_redirects=True,
+            timeout=httpx.Timeout(15.0, connect=10.0),
+            limits=httpx.Limits(max_connections=workers),
+        ) as client, ThreadPoolExecutor(max_workers=workers) as pool:
+            checked = dict(zip(todo, pool.map(lambda url: _check(client, url), todo)))
+        link_cache.store(
+            {
+                url: r
+                for url, r in checked.items()
+                if r[1] is not None and r[1] not in RETRY_LATER_STATUSES
+            }
+        )
+        results.update(checked)
+    return results
+
+
+def broken_links(
+    articles: list[dict], site_url: str = "", workers: int = CHECK_WORKERS
+) -> list[list[tuple[str, str]]]:
+    """Per article, the (url, reason) of every broken link, checking each URL once."""
+    links = [extract_links(a.get("content_html", ""), site_url) for a in articles]
+    results = check_links([url for article_links in links for url in article_links], workers)
+    broken = []
+    for article_links in links:
+        broken.append(
+            [
+                (url, str(results[url][1] or results[url][2]))
+                for url in article_links
+                if not results[url][0]
+            ]
+        )
+    return broken
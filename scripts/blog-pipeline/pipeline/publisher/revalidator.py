@@ -1,9 +1,18 @@
 """ISR revalidation trigger via secret-based auth."""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import httpx
 
 from pipeline.settings import Settings
 
+# Slugs per request to /api/blog/revalidate
+BATCH_SIZE = 100
+# Concurrent per-slug requests when the site has no batch support
+FALLBACK_WORKERS = 8
+
 
 def trigger_revalidation(slug: str, settings: Settings) -> bool:
     """POST to /api/blog/revalidate with x-revalidation-secret header.
@@ -42,3 +51,116 @@ def trigger_full_revalidation(settings: Settings) -> bool:
     response.raise_for_status()
     data = response.json()
     return data.get("revalidated", False)
+
+
+def trigger_batch_revalidation(
+    slugs: list[str], settings: Settings, client: httpx.Client | None = None
+) -> list[str]:
+    """Revalidate many posts with one request per BATCH_SIZE slugs.
+
+    Deployments whose route predates ``slugs: []`` answer without echoing
+    the list (and fall back to a full blog revalidation, which covers the
+    posts too). If a batch request fails outright, the slugs are retried as
+    concurrent single-slug requests over one pooled client. Returns the
+    slugs that could not be revalidated.
+    """
+    if not settings.revalidation_secret:
+        raise ValueError("REVALIDATION_SECRET is required for revalidation")
+
+    slugs = list(dict.fromkeys(s for s in slugs if s))
+    if not slugs:
+        return []
+    url = f"{settings.site_url.rstrip('/')}/api/blog/revalidate"
+    headers = {"x-revalidation-secret": settings.revalidation_secret}
+    own_client = client is None
+    client = client or httpx.Client(timeout=httpx.Timeout(30.0, connect=10.0))
+
+    def post(body: dict) -> bool:
+        response = client.post(url, json=body, headers=headers)
+        response.raise_for_status()
+        return response.json().get("revalidated", False)
+
+    failed: list[str] = []
+    try:
+        for i in range(0, len(slugs), BATCH_SIZE):
+            batch = slugs[i : i + BATCH_SIZE]
+            try:
+                if post({"slugs": batch}):
+                    continue
+            except httpx.HTTPError:
+                pass
+            with ThreadPoolExecutor(max_workers=FALLBACK_WORKERS) as pool:
+                results = pool.map(lambda slug: _try(post, {"slug": slug}), batch)
+                failed.extend(slug for slug, ok in zip(batch, results) if not ok)
+    finally:
+        if own_client:
+            client.close()
+    return failed
+
+
+def _try(post, body: dict) -> bool:
+    try:
+        return post(body)
+    except httpx.HTTPError:
+        return False
+
+
+class RevalidationQueue:
+    """Collects slugs during a run and revalidates them in batches.
+
+    ``add()`` can be called from any thread; duplicate slugs are coalesced.
+    Pending slugs are sent once nothing has been added for ``debounce_s``
+    seconds, and on ``flush()``/``close()``. Use as a context manager.
+    """
+
+    def __init__(self, settings: Settings, debounce_s: float = 2.0):
+        self.settings = settings
+        self.debounce_s = debounce_s
+        self.sent: list[str] = []
+        self.failed: list[str] = []
+        self._pending: dict[str, None] = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self._client = httpx.Client(timeout=httpx.Timeout(30.0, connect=10.0))
+
+    def add(self, slug: str) -> None:
+        with self._lock:
+            self._pending[slug] = None
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce_s, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        # One send at a time; slugs are taken inside, so a flush (or close)
+        # waits for a send already in flight and returns after it
+        with self._send_lock:
+            with self._lock:
+                slugs, self._pending = list(self._pending), {}
+            if not slugs:
+                return
+            try:
+                failed = trigger_batch_revalidation(slugs, self.settings, client=self._client)
+            except Exception:
+                failed = slugs
+            self.failed.extend(failed)
+            failed = set(failed)
+            self.sent.extend(s for s in slugs if s not in failed)
+
+    def close(self) -> None:
+        """Send what is pending, wait for any debounced send, then close the client."""
+        self.flush()
+        with self._send_lock:
+            self._client.close()
+
+    def __enter__(self) -> RevalidationQueue:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,14 +1,46 @@
-"""SEO score calculation — mirrors lib/utils/blog.ts exactly."""
+"""SEO score and reading time for blog posts.
+
+calculate_seo_score() mirrors calculateSEOScore() in lib/utils/blog.ts
+exactly. calculate_reading_time() deliberately differs from
+calculateReadingTime(): blog.ts splits the raw HTML on whitespace, tags
+and attributes included, while this counts the visible words only, so a
+post edited and re-saved on the site can get a slightly higher estimate.
+"""
 from __future__ import annotations
 
+import html
 import math
 import re
 
+# Full-score ranges used by calculate_seo_score (inclusive)
+TITLE_LENGTH = (30, 60)
+META_DESCRIPTION_LENGTH = (120, 160)
+EXCERPT_MIN_LENGTH = 100
+KEYWORDS_MIN = 3
+
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_BLOCK_TAG_RE = re.compile(
+    r"</?(?:p|h[1-6]|li|ul|ol|blockquote|div|table|tr|td|th|figure|figcaption|br)\b[^>]*>",
+    re.IGNORECASE,
+)
+
+
+def html_to_text(content: str) -> str:
+    """Visible text of an HTML fragment, one block element per line."""
+    text = html.unescape(_TAG_RE.sub("", _BLOCK_TAG_RE.sub("\n", content)))
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
 
 def calculate_reading_time(content: str) -> int:
-    """Calculate reading time in minutes. Mirrors calculateReadingTime() in blog.ts."""
+    """Calculate reading time in minutes (200 WPM).
+
+    Unlike calculateReadingTime() in blog.ts, words are counted in the
+    visible text, so attributes and tags of the HTML body (``<a href=...>``)
+    do not inflate the estimate.
+    """
     words_per_minute = 200
-    words = len(content.split())
+    words = len(html_to_text(content).split())
     return math.ceil(words / words_per_minute)
 
 
@@ -33,13 +65,13 @@ def calculate_seo_score(
     score = 0
 
     # Title (0-25 points)
-    if title and 30 <= len(title) <= 60:
+    if title and TITLE_LENGTH[0] <= len(title) <= TITLE_LENGTH[1]:
         score += 25
     elif title and len(title) > 0:
         score += 15
 
     # Meta description (0-25 points)
-    if meta_description and 120 <= len(meta_description) <= 160:
+    if meta_description and META_DESCRIPTION_LENGTH[0] <= len(meta_description) <= META_DESCRIPTION_LENGTH[1]:
         score += 25
     elif meta_description and len(meta_description) > 0:
         score += 15
@@ -55,15 +87,62 @@ def calculate_seo_score(
         score += 10
 
     # Keywords (0-10 points)
-    if meta_keywords and len(meta_keywords) >= 3:
+    if meta_keywords and len(meta_keywords) >= KEYWORDS_MIN:
         score += 10
     elif meta_keywords and len(meta_keywords) > 0:
         score += 5
 
     # Excerpt (0-10 points)
-    if excerpt and len(excerpt) >= 100:
+    if excerpt and len(excerpt) >= EXCERPT_MIN_LENGTH:
         score += 10
     elif excerpt and len(excerpt) > 0:
         score += 5
 
     return min(score, 100)
+
+
+def seo_fixes(
+    title: str,
+    meta_description: str,
+    content: str,
+    featured_image: str,
+    meta_keywords: list[str],
+    excerpt: str,
+) -> list[tuple[str, int, bool]]:
+    """Ways to raise calculate_seo_score, as (fix, points gained, cheap).
+
+    Cheap fixes only touch metadata (title, meta description, keywords,
+    excerpt, image); lengthening the body needs another rewrite.
+    """
+    fixes = []
+    if not title:
+        fixes.append(("add a title of 30-60 chars", 25, True))
+    elif not TITLE_LENGTH[0] <= len(title) <= TITLE_LENGTH[1]:
+        fixes.append((f"title is {len(title)} chars, make it 30-60", 10, True))
+
+    low, high = META_DESCRIPTION_LENGTH
+    if not meta_description:
+        fixes.append(("add a meta description of 120-160 chars", 25, True))
+    elif not low <= len(meta_description) <= high:
+        fixes.append(
+            (f"meta description is {len(meta_description)} chars, make it 120-160", 10, True)
+        )
+
+    if len(content or "") < 500:
+        fixes.append((f"content is {len(content or '')} chars, needs 1000+", 20, False))
+    elif len(content) < 1000:
+        fixes.append((f"content is {len(content)} chars, needs 1000+", 10, False))
+
+    if not featured_image:
+        fixes.append(("add a featured image", 10, True))
+
+    keywords = len(meta_keywords or [])
+    if keywords < KEYWORDS_MIN:
+        gain = 5 if keywords else 10
+        fixes.append((f"{keywords} keywords, add at least {KEYWORDS_MIN}", gain, True))
+
+    if not excerpt:
+        fixes.append(("add an excerpt of 100+ chars", 10, True))
+    elif len(excerpt) < EXCERPT_MIN_LENGTH:
+        fixes.append((f"excerpt is {len(excerpt)} chars, make it 100+", 5, True))
+    return fixes
@@ -0,0 +1,94 @@
+"""Corpus-wide SEO audit of rewritten and published articles.
+
+Scores every article with the same rules as publish (``calculate_seo_score``),
+recomputes reading time from the visible text and lists the fixes that
+would raise the score, cheapest first. Audits are per article and
+picklable, so a process pool can fan them out over the corpus.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from pathlib import Path
+
+from pipeline.publisher.seo import calculate_reading_time, calculate_seo_score, seo_fixes
+
+# Columns of blog_posts an audit needs
+POST_COLUMNS = (
+    "slug, title, content, excerpt, featured_image, meta_description, meta_keywords, "
+    "reading_time, seo_score, status"
+)
+REPORT_FIELDS = [
+    "source",
+    "slug",
+    "title",
+    "score",
+    "cheap_gain",
+    "potential",
+    "reading_time",
+    "stored_reading_time",
+    "fixes",
+]
+
+
+def audit_article(article: dict, source: str) -> dict:
+    """Score, reading time and fixes of one article (rewritten JSON or blog_posts row)."""
+    fields = {
+        "title": article.get("title") or "",
+        "meta_description": article.get("meta_description") or "",
+        "content": article.get("content_html") or article.get("content") or "",
+        "featured_image": article.get("featured_image") or "",
+        "meta_keywords": article.get("meta_keywords") or [],
+        "excerpt": article.get("excerpt") or "",
+    }
+    score = calculate_seo_score(**fields)
+    fixes = sorted(seo_fixes(**fields), key=lambda fix: (not fix[2], -fix[1]))
+    return {
+        "source": source,
+        "slug": article.get("slug", ""),
+        "title": fields["title"],
+        "score": score,
+        "cheap_gain": sum(points for _, points, cheap in fixes if cheap),
+        "potential": min(100, score + sum(points for _, points, _ in fixes)),
+        "reading_time": calculate_reading_time(fields["content"]),
+        "stored_reading_time": article.get("reading_time"),
+        "fixes": [f"{fix} (+{points}{'' if cheap else ', rewrite'})" for fix, points, cheap in fixes],
+    }
+
+
+def audit_file(path: Path) -> dict:
+    """Audit of one rewritten JSON file; picklable for process pools."""
+    path = Path(path)
+    try:
+        article = json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError) as e:
+        return {"source": str(path), "error": e.__class__.__name__}
+    source = "published" if path.parent.name == "done" else "rewritten"
+    return audit_article(article, f"{source}:{path.name}")
+
+
+def audit_post(row: dict) -> dict:
+    """Audit of one blog_posts row; picklable for process pools."""
+    return audit_article(row, f"site:{row.get('status', '')}")
+
+
+def rank(audits: list[dict]) -> list[dict]:
+    """Biggest cheap gain first, then lowest score."""
+    return sorted(
+        (a for a in audits if "error" not in a),
+        key=lambda a: (-a["cheap_gain"], a["score"], a["slug"]),
+    )
+
+
+def to_csv(audits: list[dict]) -> str:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=REPORT_FIELDS)
+    writer.writeheader()
+    for audit in audits:
+        writer.writerow({**audit, "fixes": "; ".join(audit["fixes"])})
+    return out.getvalue()
+
+
+def to_json(audits: list[dict]) -> str:
+    return json.dumps(audits, indent=2, ensure_ascii=False)
@@ -1,8 +1,15 @@
 """Slug generation with uniqueness checking against Supabase."""
+from __future__ import annotations
 
 import re
+import threading
+from typing import Callable
+
 from supabase import Client
 
+# Base slugs per prefix query (keeps the PostgREST URL short)
+PREFIX_QUERY_CHUNK = 40
+
 
 def generate_slug(title: str) -> str:
     """Generate a URL-friendly slug from a title. Mirrors generateSlug() in blog.ts."""
@@ -13,20 +20,90 @@ def generate_slug(title: str) -> str:
     return slug
 
 
-def ensure_unique_slug(slug: str, supabase: Client) -> str:
-    """Check Supabase for slug collisions and append -2, -3, etc. if needed."""
-    candidate = slug
-    suffix = 1
+def fetch_taken_slugs(bases: list[str], supabase: Client) -> set[str]:
+    """Every existing slug starting with one of ``bases`` (one query per chunk of bases).
 
-    while True:
+    Bases are normalised first: a comma, dot or parenthesis would break the
+    ``or_`` filter, and ``%`` or ``_`` would widen the ``like`` pattern.
+    """
+    bases = sorted(set(filter(None, map(generate_slug, bases))))
+    taken: set[str] = set()
+    for i in range(0, len(bases), PREFIX_QUERY_CHUNK):
+        chunk = bases[i : i + PREFIX_QUERY_CHUNK]
         result = (
             supabase.table("blog_posts")
-            .select("id")
-            .eq("slug", candidate)
+            .select("slug")
+            .or_(",".join(f"slug.like.{base}*" for base in chunk))
             .execute()
         )
-        if not result.data:
-            return candidate
+        taken.update(row["slug"] for row in result.data or [])
+    return taken
+
 
+def next_free_slug(slug: str, taken: set[str]) -> str:
+    """``slug``, or ``slug-2``, ``slug-3``, ... whichever is first not in ``taken``."""
+    candidate = slug
+    suffix = 1
+    while candidate in taken:
         suffix += 1
         candidate = f"{slug}-{suffix}"
+    return candidate
+
+
+def is_slug_conflict(error: Exception) -> bool:
+    """True for a unique-constraint violation (Postgres 23505) on insert."""
+    return getattr(error, "code", None) == "23505" or "duplicate key" in str(error)
+
+
+class SlugAllocator:
+    """Hands out unique slugs for a batch of posts.
+
+    Existing slugs sharing a base prefix are fetched once; suffixes are then
+    computed locally and reserved in memory, so two posts of one batch never
+    get the same slug. The unique constraint on blog_posts.slug stays the
+    final check: after a conflict, ``conflict()`` marks the slug as taken and
+    the caller allocates again.
+    """
+
+    def __init__(self, supabase: Client, lookup: Callable[[list[str]], set[str]] | None = None):
+        self.supabase = supabase
+        # Where taken slugs come from first (e.g. the local site mirror)
+        self.lookup = lookup
+        self.taken: set[str] = set()
+        self._fetched: set[str] = set()
+        self._stale: set[str] = set()
+        self._lock = threading.Lock()
+
+    def prefetch(self, bases: list[str]) -> None:
+        """Load existing slugs for all ``bases`` of a batch up front."""
+        bases = [b for b in set(bases) if b and b not in self._fetched]
+        if not bases:
+            return
+        # After a conflict the lookup is out of date, so ask Supabase
+        remote = [b for b in bases if self.lookup is None or b in self._stale]
+        local = [b for b in bases if b not in remote]
+        taken = fetch_taken_slugs(remote, self.supabase) if remote else set()
+        if local:
+            taken |= self.lookup(local)
+        with self._lock:
+            self.taken.update(taken)
+            self._fetched.update(bases)
+
+    def allocate(self, base: str) -> str:
+        """Reserve and return the first free slug for ``base``."""
+        self.prefetch([base])
+        with self._lock:
+            slug = next_free_slug(base, self.taken)
+            self.taken.add(slug)
+            return slug
+
+    def release(self, slug: str) -> None:
+        """Give back a reserved slug whose insert failed."""
+        with self._lock:
+            self.taken.discard(slug)
+
+    def conflict(self, base: str) -> None:
+        """Forget what we knew about ``base`` after another writer took a slug."""
+        with self._lock:
+            self._fetched.discard(base)
+            self._stale.add(base)
@@ -5,9 +5,44 @@ from datetime import datetime, timezone
 from supabase import create_client, Client
 
 from pipeline.settings import Settings
+from pipeline.storage import site_mirror
+from pipeline.storage.dedup_store import (
+    get_pending_journal,
+    journal_begin,
+    journal_done,
+    journal_forget,
+    journal_inserted,
+)
 from pipeline.publisher.seo import calculate_seo_score, calculate_reading_time
-from pipeline.publisher.slug_generator import generate_slug, ensure_unique_slug
-from pipeline.publisher.category_manager import resolve_category, resolve_tags
+from pipeline.publisher.slug_generator import SlugAllocator, generate_slug, is_slug_conflict
+from pipeline.publisher.category_manager import (
+    category_name_and_slug,
+    load_category_mapping,
+    resolve_categories,
+    resolve_category,
+    resolve_slugs,
+    resolve_tag_names,
+    resolve_tags,
+    warm_cache,
+)
+
+
+# Postgres foreign_key_violation
+FK_VIOLATION = "23503"
+
+
+def _stale_reference(error: Exception) -> bool:
+    """True when a write referenced a category or tag id that no longer exists."""
+    return getattr(error, "code", None) == FK_VIOLATION
+
+
+def _rejected(error: Exception) -> bool:
+    """True when Supabase answered with an error, so the write did not happen.
+
+    PostgREST errors carry a ``code``; timeouts and dropped connections do
+    not, and the write may or may not have landed.
+    """
+    return is_slug_conflict(error) or getattr(error, "code", None) is not None
 
 
 def _get_client(settings: Settings) -> Client:
@@ -17,75 +52,389 @@ def _get_client(settings: Settings) -> Client:
     return create_client(settings.supabase_url, settings.supabase_service_role_key)
 
 
+class PublisherSession:
+    """State shared by every article of one publish run.
+
+    Owns the Supabase client, the parsed category mapping and slug -> id
+    caches for categories and tags, so each article costs its inserts and
+    nothing else once the caches are warm. With ``warm=True`` the caches are
+    loaded from blog_categories and blog_tags up front. Slugs come from a
+    shared SlugAllocator, so a batch never collides with itself. With
+    ``mirror=True`` the local site mirror is synced first (rebuilt with
+    ``refresh=True``) and caches and taken slugs come from it instead of
+    Supabase; inserts still hit Supabase. A category or tag deleted on the
+    site since the last full sync leaves a stale id in the caches: a write
+    that fails on the foreign key re-resolves the ids involved against
+    Supabase (``refresh_ids()``) and is retried once.
+    """
+
+    # Inserts retried after another writer took the allocated slug
+    SLUG_RETRIES = 3
+
+    def __init__(
+        self,
+        settings: Settings | None = None,
+        supabase: Client | None = None,
+        warm: bool = False,
+        mirror: bool = False,
+        refresh: bool = False,
+    ):
+        if supabase is None:
+            if settings is None:
+                from pipeline.settings import get_settings
+                settings = get_settings()
+            supabase = _get_client(settings)
+        self.supabase = supabase
+        self.category_mapping = load_category_mapping()
+        self.category_ids: dict[str, str] = {}
+        self.tag_ids: dict[str, str] = {}
+        self.mirror = mirror
+        self.synced: dict[str, int] = {}
+        if mirror:
+            self.synced = site_mirror.sync(self.supabase, full=refresh)
+        self.slugs = SlugAllocator(self.supabase, site_mirror.taken_slugs if mirror else None)
+        if warm and mirror:
+            self.category_ids.update(site_mirror.slug_ids("blog_categories"))
+            self.tag_ids.update(site_mirror.slug_ids("blog_tags"))
+        elif warm:
+            warm_cache("blog_categories", self.supabase, self.category_ids)
+            warm_cache("blog_tags", self.supabase, self.tag_ids)
+
+    def prepare(self, articles: list[dict]) -> None:
+        """Resolve (and create) the categories, tags and slugs of a whole batch at once."""
+        self.slugs.prefetch([self.base_slug(a) for a in articles])
+        resolve_categories(
+            [a.get("category_hint", "") for a in articles],
+            self.supabase,
+            mappings=self.category_mapping,
+            cache=self.category_ids,
+        )
+        resolve_tag_names(
+            [t for a in articles for t in a.get("tags", [])], self.supabase, cache=self.tag_ids
+        )
+
+    def refresh_ids(self, articles: list[dict]) -> None:
+        """Look the category and tag ids of ``articles`` up in Supabase again.
+
+        Cached ids are dropped first, so ``resolve_slugs`` selects (or
+        recreates) the rows; with the mirror on, the fresh ids replace the
+        stale ones there too.
+        """
+        categories = {}
+        for hint in filter(None, (a.get("category_hint", "") for a in articles)):
+            name, slug = category_name_and_slug(hint, self.category_mapping)
+            categories[slug] = name
+        tags = {}
+        for name in (t.strip() for a in articles for t in a.get("tags", [])):
+            if name:
+                tags.setdefault(generate_slug(name), name)
+        for table, names_by_slug, cache in (
+            ("blog_categories", categories, self.category_ids),
+            ("blog_tags", tags, self.tag_ids),
+        ):
+            for slug in names_by_slug:
+                cache.pop(slug, None)
+            ids = resolve_slugs(table, names_by_slug, self.supabase, cache)
+            if self.mirror:
+                site_mirror.store_ids(
+                    table, [(ids[slug], names_by_slug[slug], slug) for slug in ids]
+                )
+
+    def resolve_category(self, category_hint: str) -> str | None:
+        return resolve_category(
+            category_hint, self.supabase, mappings=self.category_mapping, cache=self.category_ids
+        )
+
+    def resolve_tags(self, tag_names: list[str]) -> list[str]:
+        return resolve_tags(tag_names, self.supabase, cache=self.tag_ids)
+
+    @staticmethod
+    def base_slug(article: dict) -> str:
+        return generate_slug(article.get("slug") or article["title"])
+
+    def build_post(self, article: dict, author_id: str, status: str = "draft") -> dict:
+        """blog_posts row for an article (without its slug)."""
+        # Resolve category
+        category_id = self.resolve_category(article.get("category_hint", ""))
+
+        # Calculate SEO metrics
+        content = article.get("content_html", "")
+        reading_time = calculate_reading_time(content)
+        seo_score = calculate_seo_score(
+            title=article.get("title", ""),
+            meta_description=article.get("meta_description", ""),
+            content=content,
+            featured_image=article.get("featured_image", ""),
+            meta_keywords=article.get("meta_keywords", []),
+            excerpt=article.get("excerpt", ""),
+        )
+
+        # Build post record
+        post_data = {
+            "title": article["title"],
+            "content": content,
+            "excerpt": article.get("excerpt", ""),
+            "featured_image": article.get("featured_image") or None,
+            "author_id": author_id,
+            "category_id": category_id,
+            "status": status,
+            "meta_title": article.get("meta_title", ""),
+            "meta_description": article.get("meta_description", ""),
+            "meta_keywords": article.get("meta_keywords", []),
+            "reading_time": reading_time,
+            "seo_score": seo_score,
+        }
+
+        # Set published_at if publishing immediately
+        if status == "published":
+            post_data["published_at"] = datetime.now(timezone.utc).isoformat()
+        return post_data
+
+    def reconcile_journal(self) -> tuple[int, int]:
+        """Settle journal entries left pending by an interrupted run.
+
+        Pending slugs are looked up in blog_posts (one query). A post with
+        the same slug and title is the one the run inserted: the entry moves
+        to ``inserted``, and publish links its tags and marks it done instead
+        of inserting it again. Anything else (no post, or a post of another
+        article under that slug) never landed and is dropped.
+        Returns (confirmed, dropped).
+        """
+        pending = get_pending_journal()
+        if not pending:
+            return 0, 0
+        result = (
+            self.supabase.table("blog_posts")
+            .select("id, slug, title")
+            .in_("slug", sorted({slug for slug, _ in pending.values()}))
+            .execute()
+        )
+        posts = {row["slug"]: row for row in result.data or []}
+        found, missing = [], []
+        for key, (slug, title) in pending.items():
+            post = posts.get(slug)
+            if post is not None and title is not None and post.get("title") == title:
+                found.append((key, slug, post["id"]))
+            else:
+                missing.append(key)
+        journal_inserted(found)
+        journal_forget(missing)
+        return len(found), len(missing)
+
+    def link_tags(self, post_id: str, tag_names: list[str]) -> None:
+        """Link a post to its tags; links that already exist are kept."""
+
+        def write() -> None:
+            tag_ids = self.resolve_tags(tag_names) if tag_names else []
+            if tag_ids:
+                tag_rows = [{"post_id": post_id, "tag_id": tid} for tid in tag_ids]
+                self.supabase.table("blog_post_tags").upsert(
+                    tag_rows, on_conflict="post_id,tag_id", ignore_duplicates=True
+                ).execute()
+
+        self._retry_stale([{"tags": tag_names}], write)
+
+    def _retry_stale(self, articles: list[dict], write):
+        """Run ``write()``; after a foreign key error, refresh the ids of ``articles`` and rerun it."""
+        try:
+            return write()
+        except Exception as e:
+            if not _stale_reference(e):
+                raise
+        self.refresh_ids(articles)
+        return write()
+
+    def publish(
+        self,
+        article: dict,
+        author_id: str,
+        status: str = "draft",
+        journal_key: str | None = None,
+        file: str = "",
+    ) -> str:
+        """Insert a rewritten article into blog_posts and link its tags.
+
+        With ``journal_key`` the insert is recorded in the publish journal:
+        intent (with the slug) before, post id after the insert, and done
+        once the tags are linked. Returns the slug of the published post.
+        """
+        supabase = self.supabase
+        base_slug = self.base_slug(article)
+        post_data = self.build_post(article, author_id, status)
+
+        # Insert post; the unique constraint on slug is the final check
+        attempt = 0
+        refreshed = False
+        while True:
+            slug = self.slugs.allocate(base_slug)
+            post_data["slug"] = slug
+            if journal_key:
+                journal_begin([(journal_key, file, slug, post_data["title"])])
+            try:
+                result = supabase.table("blog_posts").insert(post_data).execute()
+                break
+            except Exception as e:
+                self.slugs.release(slug)
+                if journal_key and _rejected(e):
+                    # Known not inserted; an unclear outcome stays pending for reconcile
+                    journal_forget([journal_key])
+                if _stale_reference(e) and not refreshed:
+                    refreshed = True
+                    self.refresh_ids([article])
+                    post_data["category_id"] = self.resolve_category(article.get("category_hint", ""))
+                    continue
+                if not is_slug_conflict(e) or attempt == self.SLUG_RETRIES:
+                    raise
+                attempt += 1
+                self.slugs.conflict(base_slug)
+        if not result.data:
+            if journal_key:
+                journal_forget([journal_key])
+            raise RuntimeError(f"Failed to insert blog post: {slug}")
+
+        post_id = result.data[0]["id"]
+        if journal_key:
+            journal_inserted([(journal_key, slug, post_id)])
+        if self.mirror:
+            site_mirror.add_posts([(post_id, slug, post_data["title"])])
+
+        # Associate tags; if this fails the next publish links them (journal: inserted)
+        self.link_tags(post_id, article.get("tags", []))
+
+        if journal_key:
+            journal_done([(journal_key, slug, post_id)])
+        return slug
+
+    # Columns replaced when a post is updated in place
+    UPDATE_FIELDS = (
+        "content",
+        "excerpt",
+        "meta_title",
+        "meta_description",
+        "meta_keywords",
+        "reading_time",
+        "seo_score",
+    )
+
+    def update(self, post_id: str, article: dict, title: str | None = None) -> dict:
+        """Replace content, SEO fields and tags of an existing post.
+
+        Slug, title, status and author stay as they are, so the URL and the
+        listing do not change; the SEO score is computed with the existing
+        ``title`` when given. Returns the updated blog_posts row.
+        """
+        post_data = self.build_post({**article, "title": title or article["title"]}, "", "draft")
+        fields = {key: post_data[key] for key in self.UPDATE_FIELDS}
+
+        def write_post():
+            category_id = self.resolve_category(article.get("category_hint", ""))
+            if category_id:
+                fields["category_id"] = category_id
+            return self.supabase.table("blog_posts").update(fields).eq("id", post_id).execute()
+
+        result = self._retry_stale([article], write_post)
+        if not result.data:
+            raise RuntimeError(f"Failed to update blog post: {post_id}")
+
+        def write_tags() -> None:
+            # Add the new tags before dropping the old, so a failure never leaves the post untagged
+            tag_ids = self.resolve_tags(article.get("tags", []))
+            stale = self.supabase.table("blog_post_tags").delete().eq("post_id", post_id)
+            if tag_ids:
+                tag_rows = [{"post_id": post_id, "tag_id": tid} for tid in tag_ids]
+                self.supabase.table("blog_post_tags").upsert(
+                    tag_rows, on_conflict="post_id,tag_id", ignore_duplicates=True
+                ).execute()
+                stale = stale.not_.in_("tag_id", tag_ids)
+            stale.execute()
+
+        self._retry_stale([article], write_tags)
+        return result.data[0]
+
+    def publish_bulk(
+        self,
+        articles: list[dict],
+        author_id: str,
+        status: str = "draft",
+        journal_keys: list[str] | None = None,
+        files: list[str] | None = None,
+    ) -> list[str]:
+        """Insert a batch of articles with one call to blog_bulk_insert_posts().
+
+        Posts and tag links are written in a single transaction, so a failure
+        stores nothing. Call ``prepare()`` first so categories and tags are
+        resolved. ``journal_keys`` work as in ``publish()``. Returns the slugs
+        in the order of ``articles``.
+        """
+        files = files or [""] * len(articles)
+        base_slugs = [self.base_slug(a) for a in articles]
+        posts = []
+        for article in articles:
+            post_data = self.build_post(article, author_id, status)
+            post_data["tag_ids"] = self.resolve_tags(article.get("tags", []))
+            posts.append(post_data)
+
+        attempt = 0
+        refreshed = False
+        while True:
+            slugs = [self.slugs.allocate(base) for base in base_slugs]
+            for post_data, slug in zip(posts, slugs):
+                post_data["slug"] = slug
+            if journal_keys:
+                journal_begin(
+                    list(zip(journal_keys, files, slugs, [p["title"] for p in posts]))
+                )
+            try:
+                result = self.supabase.rpc("blog_bulk_insert_posts", {"posts": posts}).execute()
+                break
+            except Exception as e:
+                # The transaction rolled back: none of the slugs were used
+                for slug in slugs:
+                    self.slugs.release(slug)
+                if journal_keys and _rejected(e):
+                    journal_forget(journal_keys)
+                if _stale_reference(e) and not refreshed:
+                    refreshed = True
+                    self.refresh_ids(articles)
+                    for article, post_data in zip(articles, posts):
+                        post_data["category_id"] = self.resolve_category(
+                            article.get("category_hint", "")
+                        )
+                        post_data["tag_ids"] = self.resolve_tags(article.get("tags", []))
+                    continue
+                if not is_slug_conflict(e) or attempt == self.SLUG_RETRIES:
+                    raise
+                attempt += 1
+                for base in base_slugs:
+                    self.slugs.conflict(base)
+                self.slugs.prefetch(base_slugs)
+
+        rows = sorted(result.data or [], key=lambda row: row["post_index"])
+        if len(rows) != len(posts):
+            raise RuntimeError(f"Bulk insert returned {len(rows)} of {len(posts)} posts")
+        if journal_keys:
+            journal_done(
+                [(key, row["post_slug"], row["post_id"]) for key, row in zip(journal_keys, rows)]
+            )
+        if self.mirror:
+            site_mirror.add_posts(
+                [(row["post_id"], row["post_slug"], p["title"]) for row, p in zip(rows, posts)]
+            )
+        return [row["post_slug"] for row in rows]
+
+
 def publish_article(
     article: dict,
     author_id: str,
     status: str = "draft",
     settings: Settings | None = None,
+    session: PublisherSession | None = None,
 ) -> str:
     """Insert a rewritten article into Supabase blog_posts.
 
-    Returns the slug of the published post.
+    Pass ``session`` to share one client and lookup caches across many
+    articles. Returns the slug of the published post.
     """
-    if settings is None:
-        from pipeline.settings import get_settings
-        settings = get_settings()
-
-    supabase = _get_client(settings)
-
-    # Generate unique slug
-    slug = article.get("slug") or generate_slug(article["title"])
-    slug = ensure_unique_slug(slug, supabase)
-
-    # Resolve category
-    category_id = resolve_category(article.get("category_hint", ""), supabase)
-
-    # Calculate SEO metrics
-    content = article.get("content_html", "")
-    reading_time = calculate_reading_time(content)
-    seo_score = calculate_seo_score(
-        title=article.get("title", ""),
-        meta_description=article.get("meta_description", ""),
-        content=content,
-        featured_image=article.get("featured_image", ""),
-        meta_keywords=article.get("meta_keywords", []),
-        excerpt=article.get("excerpt", ""),
-    )
-
-    # Build post record
-    post_data = {
-        "title": article["title"],
-        "slug": slug,
-        "content": content,
-        "excerpt": article.get("excerpt", ""),
-        "featured_image": article.get("featured_image") or None,
-        "author_id": author_id,
-        "category_id": category_id,
-        "status": status,
-        "meta_title": article.get("meta_title", ""),
-        "meta_description": article.get("meta_description", ""),
-        "meta_keywords": article.get("meta_keywords", []),
-        "reading_time": reading_time,
-        "seo_score": seo_score,
-    }
-
-    # Set published_at if publishing immediately
-    if status == "published":
-        post_data["published_at"] = datetime.now(timezone.utc).isoformat()
-
-    # Insert post
-    result = supabase.table("blog_posts").insert(post_data).execute()
-    if not result.data:
-        raise RuntimeError(f"Failed to insert blog post: {slug}")
-
-    post_id = result.data[0]["id"]
-
-    # Associate tags
-    tag_names = article.get("tags", [])
-    if tag_names:
-        tag_ids = resolve_tags(tag_names, supabase)
-        if tag_ids:
-            tag_rows = [{"post_id": post_id, "tag_id": tid} for tid in tag_ids]
-            supabase.table("blog_post_tags").insert(tag_rows).execute()
-
-    return slug
+    if session is None:
+        session = PublisherSession(settings)
+    return session.publish(article, author_id=author_id, status=status)
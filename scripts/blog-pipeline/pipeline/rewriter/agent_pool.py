@@ -0,0 +1,191 @@
+"""Pool of long-lived claude CLI processes for the cli-agent rewriter.
+
+Each worker is started in streaming mode
+(``--input-format stream-json --output-format stream-json``) and sits on stdin
+waiting for prompts, so the CLI's startup and auth cost is paid while the
+previous request is still running instead of on every call:
+- Prompts are written to stdin as one JSON user message per line
+- stdout is read line by line until the ``result`` event arrives
+- Dead or timed-out workers are killed and replaced with a fresh process
+- Workers are recycled after ``max_requests`` prompts so sessions don't bleed
+  context from one article into the next
+"""
+from __future__ import annotations
+
+import collections
+import json
+import queue
+import re
+import subprocess
+import threading
+import time
+
+# How the claude CLI reports a failed API request: "API Error: 429 {...json...}"
+_API_ERROR_RE = re.compile(r"^\s*API Error:\s*(\d{3})\b")
+# ``error.type`` of the API's JSON error body
+_API_ERROR_TYPE_RE = re.compile(r'"type"\s*:\s*"(rate_limit_error|overloaded_error)"')
+_API_ERROR_TYPES = {"rate_limit_error": 429, "overloaded_error": 529}
+# Subscription limit message: "Claude AI usage limit reached|<reset timestamp>"
+_USAGE_LIMIT_RE = re.compile(r"^\s*Claude AI usage limit reached\|")
+
+
+def api_status(text: str) -> int | None:
+    """HTTP status of an API error reported by the CLI, or None if it reported none."""
+    match = _API_ERROR_RE.match(text)
+    if match:
+        return int(match.group(1))
+    match = _API_ERROR_TYPE_RE.search(text)
+    if match:
+        return _API_ERROR_TYPES[match.group(1)]
+    if _USAGE_LIMIT_RE.match(text):
+        return 429
+    return None
+
+
+class CliAgentError(RuntimeError):
+    """A failed CLI call; ``status_code`` is the API status it reported (or None)."""
+
+    def __init__(self, message: str, detail: str = ""):
+        super().__init__(f"{message}: {detail[:500]}")
+        self.status_code = api_status(detail)
+
+
+class AgentWorker:
+    """One streaming CLI process plus the threads draining its output."""
+
+    def __init__(self, argv: list[str], env: dict | None = None):
+        self.proc = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            env=env,
+        )
+        self.served = 0
+        self.started_at = time.monotonic()
+        self._lines: queue.Queue = queue.Queue()
+        self._stderr_tail: collections.deque = collections.deque(maxlen=20)
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+        threading.Thread(target=self._read_stderr, daemon=True).start()
+
+    def _read_stdout(self) -> None:
+        for line in self.proc.stdout:
+            self._lines.put(line)
+        self._lines.put(None)  # EOF marker
+
+    def _read_stderr(self) -> None:
+        for line in self.proc.stderr:
+            self._stderr_tail.append(line.rstrip())
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def ask(self, prompt: str, timeout: float) -> dict:
+        """Send one prompt and block until its ``result`` event (or timeout)."""
+        message = {
+            "type": "user",
+            "message": {"role": "user", "content": [{"type": "text", "text": prompt}]},
+        }
+        self.proc.stdin.write(json.dumps(message) + "\n")
+        self.proc.stdin.flush()
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(self.proc.args, timeout)
+            try:
+                line = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                raise subprocess.TimeoutExpired(self.proc.args, timeout)
+            if line is None:
+                self.proc.wait()
+                stderr = "\n".join(self._stderr_tail)
+                raise CliAgentError(f"CLI agent exited with code {self.proc.returncode}", stderr)
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if event.get("type") == "result":
+                self.served += 1
+                if event.get("is_error"):
+                    raise CliAgentError("CLI agent error", str(event.get("result", "")))
+                return event
+
+    def close(self) -> None:
+        if self.proc.stdin and not self.proc.stdin.closed:
+            try:
+                self.proc.stdin.close()
+            except OSError:
+                pass
+        if self.alive():
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+class AgentPool:
+    """Fixed-size pool of warm AgentWorkers shared by concurrent callers."""
+
+    def __init__(
+        self,
+        argv: list[str],
+        size: int = 1,
+        timeout: float = 600,
+        max_requests: int = 1,
+        env: dict | None = None,
+    ):
+        self.argv = argv
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.max_requests = max(1, max_requests)
+        self.env = env
+        self._idle: queue.Queue = queue.Queue()
+        self._closed = False
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> AgentWorker:
+        return AgentWorker(self.argv, env=self.env)
+
+    def _acquire(self) -> AgentWorker:
+        """Take an idle worker, replacing it first if its process has died."""
+        worker = self._idle.get()
+        if not worker.alive():
+            worker.close()
+            worker = self._spawn()
+        return worker
+
+    def _release(self, worker: AgentWorker, healthy: bool) -> None:
+        if self._closed:
+            worker.close()
+            return
+        if not healthy or worker.served >= self.max_requests or not worker.alive():
+            worker.close()
+            worker = self._spawn()
+        self._idle.put(worker)
+
+    def run(self, prompt: str) -> dict:
+        """Run a prompt on the next free worker and return its result event."""
+        if self._closed:
+            raise RuntimeError("Agent pool is closed")
+        worker = self._acquire()
+        healthy = False
+        try:
+            event = worker.ask(prompt, self.timeout)
+            healthy = True
+            return event
+        finally:
+            self._release(worker, healthy)
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -1,44 +1,405 @@
 """Abstract rewriter interface and factory."""
 from __future__ import annotations
 
+import json
+import os
+import time
 from abc import ABC, abstractmethod
+from pathlib import Path
 
+from pipeline.rewriter import usage
+from pipeline.rewriter.schemas import RewrittenArticle
 from pipeline.settings import Settings
 
+# Mirrors RewrittenArticle.content_html min_length
+MIN_CONTENT_CHARS = 100
+REQUIRED_METADATA = ("title", "slug")
+
+
+def _article_key(raw_article: dict) -> str:
+    """Stable id of an article in usage records (source URL, or topic)."""
+    if raw_article.get("source_url"):
+        return raw_article["source_url"]
+    return f"topic:{raw_article.get('topic') or raw_article.get('raw_title', '')}"
+
+
+def _missing_metadata(metadata: dict) -> list[str]:
+    return [f for f in REQUIRED_METADATA if not str(metadata.get(f, "")).strip()]
+
+
+def _load_checkpoint(path: Path | None) -> dict:
+    if path is None or not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_checkpoint(path: Path | None, state: dict) -> None:
+    """Write the checkpoint atomically so a crash never leaves half a file."""
+    if path is None:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2, ensure_ascii=False))
+    os.replace(tmp, path)
+
 
 class BaseRewriter(ABC):
     """Abstract base class for LLM rewriters."""
 
+    # Provider name used for token counting and scheduling
+    provider = ""
+
+    # "llm" asks the model for metadata; "local" derives it from the HTML
+    metadata_mode = "llm"
+
+    # Context window in tokens (0 = the provider's default in prompts.CONTEXT_TOKENS)
+    context_tokens = 0
+
+    # Whether generate_metadata_batch packs several articles into one request
+    batches_metadata = False
+
     @abstractmethod
-    def rewrite(self, raw_article: dict) -> dict:
+    def _complete(self, system: str, user: str) -> str:
+        """Send one prompt to the provider and return the completion text."""
+        ...
+
+    def _call(self, system: str, user: str, step: str, article: str | None = None) -> str:
+        """``_complete`` plus a usage record (tokens, latency, cost) for ``step``."""
+        from pipeline.rewriter.prompts import count_tokens
+
+        if article is not None:
+            usage.set_article(article)
+        usage.take_usage()
+        started = time.monotonic()
+        text = ""
+        ok = False
+        try:
+            text = self._complete(system, user)
+            ok = True
+            return text
+        finally:
+            reported = usage.take_usage()
+            usage.record_call(
+                provider=reported.get("provider") or self.provider,
+                model=reported.get("model") or getattr(self, "model", ""),
+                step=step,
+                input_tokens=reported.get("input_tokens") or count_tokens(system + user, self.provider),
+                output_tokens=reported.get("output_tokens") or (count_tokens(text, self.provider) if ok else 0),
+                latency_s=time.monotonic() - started,
+                ok=ok,
+                cost_usd=reported.get("cost_usd"),
+            )
+
+    def rewrite(self, raw_article: dict, checkpoint: Path | None = None) -> dict:
         """Rewrite a raw article and return a dict matching RewrittenArticle schema.
 
-        Two-step process:
+        Two-step process (supports topic-only articles with no source):
         1. Rewrite content body
         2. Generate SEO metadata as JSON
+
+        With ``checkpoint``, each step's output is saved to that file as it
+        completes, and a rerun resumes from the last good step — a failed
+        metadata step never regenerates the content body. The checkpoint is
+        removed once the article validates.
         """
-        ...
+        usage.set_article(_article_key(raw_article))
+        state = self.draft(raw_article, checkpoint)
+
+        # Step 2: Generate metadata as JSON
+        metadata = state.get("metadata") or {}
+        if _missing_metadata(metadata):
+            if self.metadata_mode == "local":
+                metadata = self._local_metadata(raw_article, state["content_html"])
+            else:
+                metadata = self.generate_metadata(state["content_html"], metadata)
+            state["metadata"] = metadata
+            _save_checkpoint(checkpoint, state)
 
+        return self._finish(raw_article, state, checkpoint)
+
+    def draft(self, raw_article: dict, checkpoint: Path | None = None) -> dict:
+        """Step 1 only: return the checkpoint state with ``content_html`` filled in."""
+        usage.set_article(_article_key(raw_article))
+        state = _load_checkpoint(checkpoint)
+        content_html = state.get("content_html", "")
+        if len(content_html) < MIN_CONTENT_CHARS:
+            content_html = self.generate_content(raw_article)
+            if len(content_html) < MIN_CONTENT_CHARS:
+                raise ValueError(f"Rewritten content too short ({len(content_html)} chars)")
+            state = {"content_html": content_html, "provider": self._content_provider()}
+            _save_checkpoint(checkpoint, state)
+        return state
+
+    def finish_batch(self, jobs: list[tuple[dict, dict, Path | None]]) -> list[dict | Exception]:
+        """Step 2 for several drafted articles at once.
+
+        ``jobs`` are ``(raw_article, state, checkpoint)`` tuples from draft().
+        Returns the article dict, or the exception that article failed with,
+        in the same order as ``jobs``.
+        """
+        pending = {
+            str(i): state["content_html"]
+            for i, (_, state, _) in enumerate(jobs)
+            if _missing_metadata(state.get("metadata") or {})
+        }
+        if pending:
+            if self.metadata_mode == "local":
+                found = {i: self._local_metadata(jobs[int(i)][0], html) for i, html in pending.items()}
+            else:
+                usage.set_article("batch")
+                found = self.generate_metadata_batch(pending)
+            for i in pending:
+                _, state, checkpoint = jobs[int(i)]
+                state["metadata"] = found.get(i) or {}
+                _save_checkpoint(checkpoint, state)
+
+        results: list[dict | Exception] = []
+        for raw_article, state, checkpoint in jobs:
+            try:
+                results.append(self._finish(raw_article, state, checkpoint))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _finish(self, raw_article: dict, state: dict, checkpoint: Path | None) -> dict:
+        article = self.build_article(
+            raw_article,
+            state["content_html"],
+            state.get("metadata") or {},
+            provider=state.get("provider", self.provider),
+        )
+        if checkpoint is not None:
+            checkpoint.unlink(missing_ok=True)
+        return article
+
+    def _local_metadata(self, raw_article: dict, content_html: str) -> dict:
+        from pipeline.rewriter.local_metadata import generate_local_metadata
+        # A scraped headline is the source's own title: reusing it would be
+        # duplicate content, so rewrites take their title from the new HTML
+        title_hint = ""
+        if raw_article.get("topic_only"):
+            title_hint = raw_article.get("topic") or raw_article.get("raw_title", "")
+        return generate_local_metadata(content_html, title_hint=title_hint)
+
+    def generate_content(self, raw_article: dict) -> str:
+        """Step 1: the rewritten HTML body."""
+        system, rewrite_prompt = self._build_rewrite_prompt(raw_article)
+        return self._clean_content(self._call(system, rewrite_prompt, "content"))
+
+    def generate_metadata(self, content_html: str, partial: dict | None = None) -> dict:
+        """Step 2: SEO metadata for a rewritten body.
+
+        ``partial`` is metadata from an earlier attempt; if it is complete no
+        call is made. Missing or unparseable fields get one targeted repair
+        prompt, and a missing slug is finally derived from the title.
+        """
+        from pipeline.rewriter.prompts import (
+            get_system_prompt,
+            get_metadata_prompt,
+            get_metadata_repair_prompt,
+        )
+
+        system = get_system_prompt()
+        metadata = dict(partial or {})
+        if not metadata:
+            response = self._call(system, get_metadata_prompt(content_html, self.provider), "metadata")
+            metadata = self._parse_json(response)
+        else:
+            response = json.dumps(metadata)
+
+        missing = _missing_metadata(metadata)
+        if missing:
+            repair_prompt = get_metadata_repair_prompt(content_html, missing, response, self.provider)
+            repaired = self._parse_json(self._call(system, repair_prompt, "metadata_repair"))
+            metadata.update({k: v for k, v in repaired.items() if v})
+
+        if not metadata.get("slug") and metadata.get("title"):
+            from pipeline.publisher.slug_generator import generate_slug
+            metadata["slug"] = generate_slug(metadata["title"])
+        return metadata
+
+    def generate_metadata_batch(self, items: dict[str, str]) -> dict[str, dict]:
+        """Step 2 for several bodies (``{article_id: content_html}``).
+
+        The default makes one metadata call per article; providers with a high
+        fixed cost per request override this to pack several into one prompt.
+        Articles that fail are left out of the result.
+        """
+        results = {}
+        for article_id, content_html in items.items():
+            try:
+                results[article_id] = self.generate_metadata(content_html)
+            except Exception as e:
+                print(f"    Metadata failed for article {article_id}: {e}")
+        return results
+
+    def build_article(
+        self, raw_article: dict, content_html: str, metadata: dict, provider: str = ""
+    ) -> dict:
+        """Validate the two steps' output as a RewrittenArticle dict."""
+        article = RewrittenArticle(
+            title=metadata.get("title", raw_article.get("raw_title", "")),
+            slug=metadata.get("slug", ""),
+            content_html=content_html,
+            excerpt=metadata.get("excerpt", ""),
+            meta_title=metadata.get("meta_title", ""),
+            meta_description=metadata.get("meta_description", ""),
+            meta_keywords=metadata.get("meta_keywords", []),
+            tags=metadata.get("tags", []),
+            source_url=raw_article.get("source_url", ""),
+            source_name=raw_article.get("source_name", ""),
+            category_hint=raw_article.get("category_hint", ""),
+            featured_image=raw_article.get("raw_featured_image", ""),
+            provider=provider or self.provider,
+        )
+
+        return article.to_dict()
+
+    def close(self) -> None:
+        """Release any long-lived resources (processes, connections)."""
+
+    def _content_provider(self) -> str:
+        """Provider that produced the last body on this thread (recorded per article)."""
+        return self.provider
+
+    def _clean_content(self, text: str) -> str:
+        """Post-process the generated HTML body (providers override as needed)."""
+        return text
+
+    def _parse_json(self, text: str) -> dict:
+        """Extract JSON from LLM response, handling markdown code blocks."""
+        text = text.strip()
+        if "```json" in text:
+            text = text.split("```json")[1].split("```")[0]
+        elif "```" in text:
+            text = text.split("```")[1].split("```")[0]
+
+        try:
+            return json.loads(text.strip())
+        except json.JSONDecodeError:
+            start = text.find("{")
+            end = text.rfind("}")
+            if start != -1 and end != -1:
+                try:
+                    return json.loads(text[start : end + 1])
+                except json.JSONDecodeError:
+                    return {}
+            return {}
+
+    def _parse_json_array(self, text: str) -> list:
+        """Extract a JSON array from an LLM response (``[]`` if there is none)."""
+        text = text.strip()
+        if "```" in text:
+            text = text.split("```")[1].removeprefix("json")
+        start = text.find("[")
+        end = text.rfind("]")
+        if start == -1 or end == -1:
+            return []
+        try:
+            parsed = json.loads(text[start : end + 1])
+        except json.JSONDecodeError:
+            return []
+        return parsed if isinstance(parsed, list) else []
+
+    def _build_rewrite_prompt(self, raw_article: dict) -> tuple[str, str]:
+        """Return (system, rewrite prompt) for a raw article or topic.
+
+        Source text is compacted and fitted to the token budget; long sources
+        are summarised section by section with this rewriter's own model.
+        """
+        from pipeline.rewriter.prompts import (
+            get_system_prompt,
+            get_rewrite_prompt,
+            get_summary_system_prompt,
+            get_topic_rewrite_prompt,
+            prepare_source_content,
+            source_token_budget,
+        )
+
+        title = raw_article.get("raw_title", "")
+        category_hint = raw_article.get("category_hint", "")
+        system = get_system_prompt()
+        if raw_article.get("topic_only", False):
+            return system, get_topic_rewrite_prompt(raw_article.get("topic", title), category_hint)
+
+        content = prepare_source_content(
+            title,
+            raw_article.get("raw_content_text", ""),
+            provider=self.provider,
+            # Summaries run on worker threads, so pass the article along
+            summarize=lambda prompt, article=usage.current_article(): self._call(
+                get_summary_system_prompt(), prompt, "summary", article=article
+            ),
+            max_tokens=source_token_budget(self.provider, self.context_tokens),
+        )
+        return system, get_rewrite_prompt(title, content, category_hint)
+
+
+def get_rewriter(
+    provider: str,
+    model: str | None,
+    settings: Settings,
+    workers: int = 1,
+    metadata_mode: str = "llm",
+    metadata_batch: int = 1,
+) -> BaseRewriter:
+    """Factory function to create the appropriate rewriter.
+
+    ``workers`` is the number of concurrent rewrites the caller intends to run;
+    ``metadata_mode`` is "llm" (second LLM call) or "local" (derived from HTML);
+    ``metadata_batch`` is how many articles share one metadata request (Ollama).
+    """
+    rewriter = _create_rewriter(provider, model, settings, workers, metadata_batch)
+    rewriter.metadata_mode = metadata_mode
+    return rewriter
+
+
+def _create_rewriter(
+    provider: str, model: str | None, settings: Settings, workers: int, metadata_batch: int = 1
+) -> BaseRewriter:
+    from pipeline.rewriter.scheduler import get_scheduler
 
-def get_rewriter(provider: str, model: str | None, settings: Settings) -> BaseRewriter:
-    """Factory function to create the appropriate rewriter."""
     if provider == "ollama":
         from pipeline.rewriter.ollama_rewriter import OllamaRewriter
         return OllamaRewriter(
             base_url=settings.ollama_base_url,
             model=model or "llama3",
+            scheduler=get_scheduler(provider, settings, max_concurrency=workers),
+            keep_alive=settings.ollama_keep_alive,
+            num_ctx=settings.ollama_num_ctx,
+            metadata_batch_size=metadata_batch,
         )
     elif provider == "claude":
         from pipeline.rewriter.claude_rewriter import ClaudeRewriter
         return ClaudeRewriter(
             api_key=settings.anthropic_api_key,
             model=model or "claude-sonnet-4-20250514",
+            scheduler=get_scheduler(provider, settings, max_concurrency=workers),
         )
     elif provider == "cli-agent":
         from pipeline.rewriter.cli_agent_rewriter import CliAgentRewriter
         return CliAgentRewriter(
             command=model or "claude",  # model param doubles as CLI command
             timeout=600,
+            pool_size=workers,
+            use_pool=settings.cli_agent_pool,
+            session_reuse=settings.cli_agent_session_reuse,
+            scheduler=get_scheduler(provider, settings, max_concurrency=workers),
+        )
+    elif provider == "router":
+        from pipeline.rewriter.router_rewriter import RouterRewriter
+        return RouterRewriter.from_spec(model or "", settings, workers)
+    elif provider == "mock":
+        from pipeline.rewriter.mock_rewriter import MockRewriter
+        return MockRewriter(
+            latency_ms=settings.mock_latency_ms,
+            latency_sigma=settings.mock_latency_sigma,
+            error_rate=settings.mock_error_rate,
+            output_tokens=settings.mock_output_tokens,
+            scheduler=get_scheduler(provider, settings, max_concurrency=workers),
         )
     else:
         raise ValueError(f"Unknown provider: {provider}")
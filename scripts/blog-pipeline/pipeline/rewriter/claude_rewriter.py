@@ -1,90 +1,50 @@
 """Claude API-based LLM rewriter."""
+from __future__ import annotations
 
-import json
 import anthropic
 
 from pipeline.rewriter.base import BaseRewriter
-from pipeline.rewriter.prompts import (
-    get_system_prompt,
-    get_rewrite_prompt,
-    get_topic_rewrite_prompt,
-    get_metadata_prompt,
-)
-from pipeline.rewriter.schemas import RewrittenArticle
+from pipeline.rewriter.prompts import count_tokens
+from pipeline.rewriter.scheduler import CallScheduler
+from pipeline.rewriter.usage import report_usage
 
 
 class ClaudeRewriter(BaseRewriter):
     """Rewriter using Anthropic Claude API."""
 
-    def __init__(self, api_key: str, model: str = "claude-sonnet-4-20250514"):
+    provider = "claude"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "claude-sonnet-4-20250514",
+        scheduler: CallScheduler | None = None,
+    ):
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY is required for Claude rewriter")
-        self.client = anthropic.Anthropic(api_key=api_key)
+        # Retries are owned by the scheduler, not the SDK
+        self.client = anthropic.Anthropic(api_key=api_key, max_retries=0)
         self.model = model
+        self.scheduler = scheduler or CallScheduler("claude")
 
     def _chat(self, system: str, user: str) -> str:
         """Send a message to Claude API."""
-        message = self.client.messages.create(
-            model=self.model,
-            max_tokens=4096,
-            system=system,
-            messages=[{"role": "user", "content": user}],
-        )
-        return message.content[0].text
-
-    def rewrite(self, raw_article: dict) -> dict:
-        """Two-step rewrite: content then metadata. Supports topic-only (no source)."""
-        title = raw_article.get("raw_title", "")
-        content = raw_article.get("raw_content_text", "")
-        topic_only = raw_article.get("topic_only", False)
-        topic = raw_article.get("topic", title)
-
-        system = get_system_prompt()
-        if topic_only:
-            rewrite_prompt = get_topic_rewrite_prompt(topic)
-        else:
-            rewrite_prompt = get_rewrite_prompt(title, content[:5000])
-
-        # Step 1: Rewrite content
-        rewritten_html = self._chat(system, rewrite_prompt)
-
-        # Step 2: Generate metadata
-        meta_prompt = get_metadata_prompt(rewritten_html)
-        meta_response = self._chat(system, meta_prompt)
-
-        # Parse metadata JSON
-        metadata = self._parse_json(meta_response)
-
-        article = RewrittenArticle(
-            title=metadata.get("title", title),
-            slug=metadata.get("slug", ""),
-            content_html=rewritten_html,
-            excerpt=metadata.get("excerpt", ""),
-            meta_title=metadata.get("meta_title", ""),
-            meta_description=metadata.get("meta_description", ""),
-            meta_keywords=metadata.get("meta_keywords", []),
-            tags=metadata.get("tags", []),
-            source_url=raw_article.get("source_url", ""),
-            source_name=raw_article.get("source_name", ""),
-            category_hint=raw_article.get("category_hint", ""),
-            featured_image=raw_article.get("raw_featured_image", ""),
-        )
-
-        return article.to_dict()
-
-    def _parse_json(self, text: str) -> dict:
-        """Extract JSON from LLM response, handling markdown code blocks."""
-        text = text.strip()
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0]
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0]
 
-        try:
-            return json.loads(text.strip())
-        except json.JSONDecodeError:
-            start = text.find("{")
-            end = text.rfind("}")
-            if start != -1 and end != -1:
-                return json.loads(text[start : end + 1])
-            return {}
+        def send() -> str:
+            message = self.client.messages.create(
+                model=self.model,
+                max_tokens=4096,
+                system=system,
+                messages=[{"role": "user", "content": user}],
+            )
+            report_usage(
+                model=self.model,
+                input_tokens=message.usage.input_tokens,
+                output_tokens=message.usage.output_tokens,
+            )
+            return message.content[0].text
+
+        return self.scheduler.call(send, est_tokens=count_tokens(system + user, self.provider) + 4096)
+
+    def _complete(self, system: str, user: str) -> str:
+        return self._chat(system, user)
@@ -5,6 +5,9 @@ Uses the pattern from docs/agent-cli/AGENT_DRIVER_INTEGRATION_GUIDE.md:
 - Close stdin immediately (non-interactive)
 - Collect stdout JSON, parse result
 - No API keys needed — CLI handles its own auth
+
+For the claude CLI, prompts are served by a pool of warm streaming processes
+(see agent_pool.py) so the per-call startup cost is paid off the critical path.
 """
 from __future__ import annotations
 
@@ -12,15 +15,13 @@ import json
 import os
 import subprocess
 import re
+import threading
 
+from pipeline.rewriter.agent_pool import AgentPool, CliAgentError
 from pipeline.rewriter.base import BaseRewriter
-from pipeline.rewriter.prompts import (
-    get_system_prompt,
-    get_rewrite_prompt,
-    get_topic_rewrite_prompt,
-    get_metadata_prompt,
-)
-from pipeline.rewriter.schemas import RewrittenArticle
+from pipeline.rewriter.prompts import count_tokens
+from pipeline.rewriter.scheduler import CallScheduler
+from pipeline.rewriter.usage import report_usage
 
 # Instruction prepended to all prompts to prevent tool use
 _TEXT_ONLY_INSTRUCTION = (
@@ -33,10 +34,28 @@ _TEXT_ONLY_INSTRUCTION = (
 class CliAgentRewriter(BaseRewriter):
     """Rewriter that spawns claude/agent CLI as a subprocess."""
 
-    def __init__(self, command: str = "claude", timeout: int = 600):
+    provider = "cli-agent"
+
+    def __init__(
+        self,
+        command: str = "claude",
+        timeout: int = 600,
+        pool_size: int = 1,
+        use_pool: bool = True,
+        session_reuse: int = 1,
+        scheduler: CallScheduler | None = None,
+    ):
         self.command = command
         self.timeout = timeout
         self.cli_type = self._detect_cli(command)
+        self.pool_size = pool_size
+        # Only the claude CLI supports streaming JSON input
+        self.use_pool = use_pool and self.cli_type == "claude"
+        self.session_reuse = session_reuse
+        self._pool: AgentPool | None = None
+        self._pool_context: str | None = None
+        self._pool_lock = threading.Lock()
+        self.scheduler = scheduler or CallScheduler("cli-agent", max_concurrency=pool_size)
 
     def _detect_cli(self, command: str) -> str:
         basename = os.path.basename(command).lower()
@@ -67,14 +86,64 @@ class CliAgentRewriter(BaseRewriter):
             args.extend(["--trust", "--force"])
         return args
 
-    def _run_cli(self, prompt: str, system_context: str | None = None) -> str:
-        """Spawn the CLI agent and return the result text."""
-        args = self._build_args(prompt, system_context)
+    def _build_pool_args(self, system_context: str | None = None) -> list:
+        """Arguments for a long-lived claude process fed prompts over stdin."""
+        args = [
+            "-p",
+            "--input-format", "stream-json",
+            "--output-format", "stream-json",
+            "--verbose",
+            "--allowedTools", "",
+        ]
+        if system_context:
+            args.extend(["--append-system-prompt", system_context])
+        return args
 
+    def _clean_env(self) -> dict:
         # Build clean env — unset CLAUDECODE to allow nested CLI spawning
         env = os.environ.copy()
         env.pop("CLAUDECODE", None)
         env.pop("CLAUDE_CODE", None)
+        return env
+
+    def _get_pool(self, system_context: str | None) -> AgentPool | None:
+        """Return the warm pool for this system context, creating it on first use.
+
+        The system prompt is fixed per process, so calls with a different
+        context fall back to a one-shot subprocess.
+        """
+        if not self.use_pool:
+            return None
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = AgentPool(
+                    [self.command] + self._build_pool_args(system_context),
+                    size=self.pool_size,
+                    timeout=self.timeout,
+                    max_requests=self.session_reuse,
+                    env=self._clean_env(),
+                )
+                self._pool_context = system_context
+            if system_context != self._pool_context:
+                return None
+            return self._pool
+
+    def _run_cli(self, prompt: str, system_context: str | None = None) -> str:
+        """Run a CLI prompt through the shared call scheduler (retries, backoff)."""
+        return self.scheduler.call(
+            lambda: self._run_cli_once(prompt, system_context),
+            est_tokens=count_tokens((system_context or "") + prompt, self.provider) * 2,
+        )
+
+    def _run_cli_once(self, prompt: str, system_context: str | None = None) -> str:
+        """Run a prompt through the warm pool, or a one-shot CLI subprocess."""
+        pool = self._get_pool(system_context)
+        if pool is not None:
+            event = pool.run(_TEXT_ONLY_INSTRUCTION + prompt)
+            self._report_usage(event)
+            return event.get("result", "")
+
+        args = self._build_args(prompt, system_context)
 
         proc = subprocess.run(
             [self.command] + args,
@@ -82,7 +151,7 @@ class CliAgentRewriter(BaseRewriter):
             text=True,
             timeout=self.timeout,
             stdin=subprocess.DEVNULL,
-            env=env,
+            env=self._clean_env(),
         )
 
         stdout = proc.stdout.strip()
@@ -93,11 +162,15 @@ class CliAgentRewriter(BaseRewriter):
         except json.JSONDecodeError:
             # Not JSON — return raw stdout
             if proc.returncode != 0:
-                raise RuntimeError(
-                    f"CLI agent exited with code {proc.returncode}: {proc.stderr[:500]}"
+                raise CliAgentError(
+                    f"CLI agent exited with code {proc.returncode}", proc.stderr or stdout
                 )
             return stdout
 
+        self._report_usage(parsed)
+        if isinstance(parsed, dict) and parsed.get("is_error"):
+            raise CliAgentError("CLI agent error", str(parsed.get("result", "")))
+
         # Claude Code format: {"result": "...", "session_id": "..."}
         if "result" in parsed:
             return parsed["result"]
@@ -114,48 +187,33 @@ class CliAgentRewriter(BaseRewriter):
         # Fallback
         return stdout
 
-    def rewrite(self, raw_article: dict) -> dict:
-        """Two-step rewrite using CLI agent: content then metadata. Supports topic-only."""
-        title = raw_article.get("raw_title", "")
-        content = raw_article.get("raw_content_text", "")
-        topic_only = raw_article.get("topic_only", False)
-        topic = raw_article.get("topic", title)
-
-        system = get_system_prompt()
-        if topic_only:
-            rewrite_prompt = get_topic_rewrite_prompt(topic)
-        else:
-            rewrite_prompt = get_rewrite_prompt(title, content[:5000])
-
-        # Step 1: Rewrite content
-        rewritten_html = self._run_cli(rewrite_prompt, system_context=system)
-
-        # Clean HTML: strip code blocks and preamble/postamble text
-        rewritten_html = self._clean_html(rewritten_html)
-
-        # Step 2: Generate metadata as JSON
-        meta_prompt = get_metadata_prompt(rewritten_html)
-        meta_response = self._run_cli(meta_prompt, system_context=system)
-        metadata = self._parse_json(meta_response)
-
-        article = RewrittenArticle(
-            title=metadata.get("title", title),
-            slug=metadata.get("slug", ""),
-            content_html=rewritten_html,
-            excerpt=metadata.get("excerpt", ""),
-            meta_title=metadata.get("meta_title", ""),
-            meta_description=metadata.get("meta_description", ""),
-            meta_keywords=metadata.get("meta_keywords", []),
-            tags=metadata.get("tags", []),
-            source_url=raw_article.get("source_url", ""),
-            source_name=raw_article.get("source_name", ""),
-            category_hint=raw_article.get("category_hint", ""),
-            featured_image=raw_article.get("raw_featured_image", ""),
+    def _report_usage(self, event: dict) -> None:
+        """Pass the CLI's token counts and cost (if it reports them) to usage accounting."""
+        if not isinstance(event, dict):
+            return
+        counts = event.get("usage") or {}
+        input_tokens = sum(
+            counts.get(k) or 0
+            for k in ("input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+        )
+        report_usage(
+            model=event.get("model") or self.command,
+            input_tokens=input_tokens or None,
+            output_tokens=counts.get("output_tokens"),
+            cost_usd=event.get("total_cost_usd", event.get("cost_usd")),
         )
 
-        return article.to_dict()
+    def _complete(self, system: str, user: str) -> str:
+        return self._run_cli(user, system_context=system)
+
+    def close(self) -> None:
+        """Shut down the warm CLI processes."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
 
-    def _clean_html(self, text: str) -> str:
+    def _clean_content(self, text: str) -> str:
         """Strip markdown code blocks and preamble/postamble from HTML content."""
         text = text.strip()
 
@@ -190,23 +248,3 @@ class CliAgentRewriter(BaseRewriter):
                     text = text[:last_close]
 
         return text.strip()
-
-    def _parse_json(self, text: str) -> dict:
-        """Extract JSON from LLM response, handling markdown code blocks."""
-        text = text.strip()
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0]
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0]
-
-        try:
-            return json.loads(text.strip())
-        except json.JSONDecodeError:
-            start = text.find("{")
-            end = text.rfind("}")
-            if start != -1 and end != -1:
-                try:
-                    return json.loads(text[start : end + 1])
-                except json.JSONDecodeError:
-                    return {}
-            return {}
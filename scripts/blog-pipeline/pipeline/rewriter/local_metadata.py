@@ -0,0 +1,194 @@
+"""Deterministic SEO metadata from rewritten HTML (no LLM call).
+
+Used by ``--metadata local`` in place of the metadata prompt:
+- title / meta_title: the topic for topic-only runs, else the first h1/h2
+  of the rewritten HTML (or its lead sentence), fitted to 30-60 chars
+- excerpt / meta_description: opening sentences, fitted to the score ranges
+- meta_keywords: TF-IDF over unigrams and bigrams against a document-frequency
+  index of previously rewritten articles
+- tags: the allowed tag names from the metadata prompt, matched by keywords
+
+Length targets come from publisher/seo.py so local metadata scores full marks.
+"""
+from __future__ import annotations
+
+import json
+import math
+import re
+import threading
+from collections import Counter
+
+from pipeline.publisher.seo import (
+    TITLE_LENGTH,
+    META_DESCRIPTION_LENGTH,
+    EXCERPT_MIN_LENGTH,
+    html_to_text,
+)
+from pipeline.publisher.slug_generator import generate_slug
+from pipeline.settings import REWRITTEN_DIR
+
+KEYWORD_COUNT = 6
+MAX_TAGS = 3
+
+_STOPWORDS = set(
+    """a about above after again against all also am an and any are as at be because been
+    before being below between both but by can could did do does doing down during each few
+    for from further had has have having he her here hers him his how i if in into is it its
+    itself just like many may me might more most much must my no nor not now of off on once
+    only or other our out over own same she should so some such than that the their them then
+    there these they this those through to too under until up very was we were what when where
+    which while who whom why will with would you your yours one two get make use used using
+    help helps can also well even way ways day days time times often try keep many every
+    brings bring shows show offers offer gives give takes take comes come goes made makes""".split()
+)
+
+# Allowed tags (from the metadata prompt) and the words that signal them
+TAG_KEYWORDS = {
+    "Ayurveda": ["ayurveda", "ayurvedic", "dosha", "vata", "pitta", "kapha", "tulsi", "ashwagandha"],
+    "Nutrition": ["diet", "food", "nutrition", "vitamin", "protein", "fibre", "fiber", "meal"],
+    "Yoga": ["yoga", "asana", "pranayama", "breathing", "stretch"],
+    "Immunity": ["immunity", "immune", "infection", "defence", "defense"],
+    "Respiratory Health": ["cough", "congestion", "nasal", "sinus", "lungs", "breathing", "throat"],
+    "Wellness": ["wellness", "wellbeing", "well-being", "health", "healthy"],
+    "Natural Remedies": ["remedy", "remedies", "kadha", "herbal", "herbs", "ginger", "turmeric", "honey"],
+    "Seasonal Health": ["monsoon", "winter", "summer", "season", "seasonal", "weather"],
+    "Mindful Living": ["stress", "mindful", "mindfulness", "sleep", "meditation", "calm"],
+    "Holistic Health": ["holistic", "balance", "lifestyle", "routine", "habits"],
+}
+
+_WORD_RE = re.compile(r"[a-z][a-z'-]+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def _terms(text: str) -> list[str]:
+    """Unigram and bigram terms without stopwords."""
+    words = [w.strip("'-") for w in _WORD_RE.findall(text.lower())]
+    terms = [w for w in words if len(w) > 2 and w not in _STOPWORDS]
+    bigrams = [
+        f"{a} {b}"
+        for a, b in zip(words, words[1:])
+        if a not in _STOPWORDS and b not in _STOPWORDS and len(a) > 2 and len(b) > 2
+    ]
+    return terms + bigrams
+
+
+class KeywordCorpus:
+    """Document frequencies of terms across previously rewritten articles."""
+
+    def __init__(self, documents: list[str] | None = None):
+        self.doc_count = 0
+        self.df: Counter = Counter()
+        for doc in documents or []:
+            self.add(doc)
+
+    def add(self, text: str) -> None:
+        self.doc_count += 1
+        self.df.update(set(_terms(text)))
+
+    def idf(self, term: str) -> float:
+        return math.log((1 + self.doc_count) / (1 + self.df.get(term, 0))) + 1
+
+    @classmethod
+    def from_rewritten(cls) -> "KeywordCorpus":
+        """Build from data/rewritten/ and data/rewritten/done/."""
+        corpus = cls()
+        for path in list(REWRITTEN_DIR.glob("*.json")) + list((REWRITTEN_DIR / "done").glob("*.json")):
+            try:
+                corpus.add(html_to_text(json.loads(path.read_text()).get("content_html", "")))
+            except (OSError, json.JSONDecodeError):
+                continue
+        return corpus
+
+
+_corpus: KeywordCorpus | None = None
+_corpus_lock = threading.Lock()
+
+
+def get_corpus() -> KeywordCorpus:
+    """Corpus index shared by a run (built on first use)."""
+    global _corpus
+    with _corpus_lock:
+        if _corpus is None:
+            _corpus = KeywordCorpus.from_rewritten()
+        return _corpus
+
+
+def extract_keywords(text: str, corpus: KeywordCorpus, k: int = KEYWORD_COUNT) -> list[str]:
+    """Top-k TF-IDF terms; bigrams win over the unigrams they contain."""
+    tf = Counter(_terms(text))
+    scored = sorted(tf, key=lambda t: (-(tf[t] * corpus.idf(t) * (1.5 if " " in t else 1)), t))
+    keywords: list[str] = []
+    for term in scored:
+        if any(term in kept or kept in term for kept in keywords):
+            continue
+        keywords.append(term)
+        if len(keywords) == k:
+            break
+    return keywords
+
+
+def fit_length(text: str, low: int, high: int, filler: str = "") -> str:
+    """Cut ``text`` at a word boundary to <= ``high``; pad with ``filler`` below ``low``."""
+    text = " ".join(text.split())
+    if len(text) < low and filler:
+        text = f"{text}{filler}"
+    if len(text) <= high:
+        return text
+    head = text[: high + 1]
+    if " " not in head:
+        # One long word: no boundary to cut at
+        return text[:high]
+    return head.rsplit(" ", 1)[0].rstrip(" ,;:—-")
+
+
+def _lead_sentences(text: str, low: int, high: int) -> str:
+    """Opening sentences of the body fitted to [low, high] characters."""
+    out = ""
+    for sentence in _SENTENCE_RE.split(text.replace("\n", " ")):
+        candidate = f"{out} {sentence}".strip()
+        if len(candidate) > high:
+            if len(out) < low:
+                out = fit_length(candidate, low, high - 3).rstrip(".") + "..."
+            break
+        out = candidate
+        if len(out) >= low:
+            break
+    return out
+
+
+def _tags(text: str) -> list[str]:
+    words = Counter(_WORD_RE.findall(text.lower()))
+    scores = {tag: sum(words[w] for w in kws) for tag, kws in TAG_KEYWORDS.items()}
+    ranked = [t for t in sorted(scores, key=lambda t: -scores[t]) if scores[t] > 0]
+    return ranked[:MAX_TAGS] or ["Wellness"]
+
+
+def generate_local_metadata(
+    content_html: str,
+    title_hint: str = "",
+    corpus: KeywordCorpus | None = None,
+) -> dict:
+    """Metadata dict with the same fields as the LLM metadata prompt."""
+    text = html_to_text(content_html)
+    headings = re.findall(r"<h[12][^>]*>(.*?)</h[12]>", content_html, flags=re.IGNORECASE | re.DOTALL)
+    if title_hint:
+        base_title = title_hint
+    elif headings:
+        base_title = re.sub(r"<[^>]+>", "", headings[0])
+    else:
+        base_title = _SENTENCE_RE.split(text.strip().replace("\n", " "), 1)[0].rstrip(".!?")
+
+    title = fit_length(base_title, *TITLE_LENGTH, filler=" — An Ayurvedic Guide")
+    paragraphs = [line for line in text.splitlines() if len(line) > 60] or [text]
+    excerpt = _lead_sentences(paragraphs[0], EXCERPT_MIN_LENGTH, META_DESCRIPTION_LENGTH[1])
+    meta_description = _lead_sentences(" ".join(paragraphs[:3]), *META_DESCRIPTION_LENGTH)
+
+    return {
+        "title": title,
+        "slug": generate_slug(title),
+        "excerpt": excerpt,
+        "meta_title": title,
+        "meta_description": meta_description,
+        "meta_keywords": extract_keywords(text, corpus or get_corpus()),
+        "tags": _tags(text),
+    }
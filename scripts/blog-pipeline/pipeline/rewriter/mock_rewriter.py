@@ -0,0 +1,114 @@
+"""Deterministic offline rewriter for tests and benchmarks.
+
+Produces realistic HTML bodies, metadata JSON and section summaries without
+any network or model. Latency follows a log-normal distribution around
+``latency_ms`` and a configurable share of calls fail with a retryable
+429/529-style error, so the scheduler's retry path is exercised too. Output
+for a given prompt and seed is always the same.
+"""
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import math
+import random
+import time
+
+from pipeline.rewriter.base import BaseRewriter
+from pipeline.rewriter.prompts import count_tokens
+from pipeline.rewriter.scheduler import CallScheduler
+
+_WORDS = (
+    "tulsi ginger turmeric immunity kadha breathing monsoon routine sleep herbs "
+    "warm water honey steam congestion balance digestion season remedy daily "
+    "ayurveda wellness habits body natural relief throat family kitchen"
+).split()
+
+
+class MockProviderError(RuntimeError):
+    """Simulated provider throttling error (carries an HTTP-like status code)."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Mock provider returned {status_code}")
+        self.status_code = status_code
+
+
+class MockRewriter(BaseRewriter):
+    """Rewriter returning synthetic output after a simulated delay."""
+
+    provider = "mock"
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        output_tokens: int = 1200,
+        seed: int = 0,
+        scheduler: CallScheduler | None = None,
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.output_tokens = output_tokens
+        self.seed = seed
+        self.scheduler = scheduler or CallScheduler("mock", base_delay=0.1)
+
+    def _rng(self, prompt: str, attempt: int = 0) -> random.Random:
+        digest = hashlib.md5(f"{self.seed}:{attempt}:{prompt}".encode()).hexdigest()
+        return random.Random(int(digest[:16], 16))
+
+    def _complete(self, system: str, user: str) -> str:
+        # Each retry of this call draws a fresh (but reproducible) outcome; the
+        # count lives in the call, so concurrent calls of one prompt never share it
+        attempts = itertools.count()
+        return self.scheduler.call(
+            lambda: self._respond(user, next(attempts)),
+            est_tokens=count_tokens(system + user, self.provider),
+        )
+
+    def _respond(self, prompt: str, attempt: int = 0) -> str:
+        rng = self._rng(prompt, attempt)
+
+        mu = math.log(max(self.latency_ms, 1.0) / 1000.0)
+        time.sleep(rng.lognormvariate(mu, self.latency_sigma))
+        if rng.random() < self.error_rate:
+            raise MockProviderError(rng.choice([429, 529]))
+
+        if '"slug"' in prompt:
+            return self._metadata(rng)
+        if prompt.startswith("Condense this section"):
+            return self._sentences(rng, self.output_tokens // 8)
+        return self._html(rng)
+
+    def _sentences(self, rng: random.Random, words: int) -> str:
+        out = []
+        while words > 0:
+            n = rng.randint(8, 16)
+            sentence = " ".join(rng.choice(_WORDS) for _ in range(n))
+            out.append(sentence.capitalize() + ".")
+            words -= n
+        return " ".join(out)
+
+    def _html(self, rng: random.Random) -> str:
+        words = int(self.output_tokens * 0.75)
+        parts = []
+        for _ in range(max(2, words // 150)):
+            parts.append(f"<h2>{' '.join(rng.choice(_WORDS) for _ in range(4)).title()}</h2>")
+            parts.append(f"<p>{self._sentences(rng, 75)}</p>")
+            parts.append(f"<p>{self._sentences(rng, 75)}</p>")
+        return "\n".join(parts)
+
+    def _metadata(self, rng: random.Random) -> str:
+        topic = " ".join(rng.choice(_WORDS) for _ in range(3))
+        title = f"Ayurvedic Guide to {topic.title()}"[:60]
+        return json.dumps({
+            "title": title,
+            "slug": "-".join(title.lower().split()),
+            "excerpt": self._sentences(rng, 20)[:160],
+            "meta_title": title,
+            "meta_description": self._sentences(rng, 25)[:160],
+            "meta_keywords": rng.sample(_WORDS, 6),
+            "tags": rng.sample(["Ayurveda", "Immunity", "Wellness", "Natural Remedies"], 2),
+        })
@@ -1,98 +1,109 @@
 """Ollama-based LLM rewriter using local models."""
+from __future__ import annotations
 
-import json
 import httpx
 
-from pipeline.rewriter.base import BaseRewriter
-from pipeline.rewriter.prompts import (
-    get_system_prompt,
-    get_rewrite_prompt,
-    get_topic_rewrite_prompt,
-    get_metadata_prompt,
-)
-from pipeline.rewriter.schemas import RewrittenArticle
+from pipeline.rewriter.base import BaseRewriter, _missing_metadata
+from pipeline.rewriter.prompts import count_tokens
+from pipeline.rewriter.scheduler import CallScheduler
+from pipeline.rewriter.usage import report_usage
 
 
 class OllamaRewriter(BaseRewriter):
     """Rewriter using local Ollama API."""
 
-    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama3"):
+    provider = "ollama"
+    batches_metadata = True
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        model: str = "llama3",
+        scheduler: CallScheduler | None = None,
+        keep_alive: str = "30m",
+        num_ctx: int = 0,
+        metadata_batch_size: int = 1,
+    ):
         self.base_url = base_url.rstrip("/")
         self.model = model
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.context_tokens = num_ctx
+        self.metadata_batch_size = max(1, metadata_batch_size)
         self.api_url = f"{self.base_url}/api/chat"
+        self.scheduler = scheduler or CallScheduler("ollama")
 
     def _chat(self, system: str, user: str) -> str:
         """Send a chat completion request to Ollama."""
-        response = httpx.post(
-            self.api_url,
-            json={
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": user},
-                ],
-                "stream": False,
-            },
-            timeout=300.0,
-        )
-        response.raise_for_status()
-        return response.json()["message"]["content"]
-
-    def rewrite(self, raw_article: dict) -> dict:
-        """Two-step rewrite: content then metadata. Supports topic-only (no source)."""
-        title = raw_article.get("raw_title", "")
-        content = raw_article.get("raw_content_text", "")
-        topic_only = raw_article.get("topic_only", False)
-        topic = raw_article.get("topic", title)
+
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            "stream": False,
+            # Same keep_alive and num_ctx on every request, so Ollama never
+            # unloads or reloads the model mid-run
+            "keep_alive": self.keep_alive,
+        }
+        if self.num_ctx:
+            payload["options"] = {"num_ctx": self.num_ctx}
+
+        def send() -> str:
+            response = httpx.post(self.api_url, json=payload, timeout=300.0)
+            response.raise_for_status()
+            data = response.json()
+            report_usage(
+                model=self.model,
+                input_tokens=data.get("prompt_eval_count"),
+                output_tokens=data.get("eval_count"),
+            )
+            return data["message"]["content"]
+
+        return self.scheduler.call(send, est_tokens=count_tokens(system + user, self.provider) * 2)
+
+    def _complete(self, system: str, user: str) -> str:
+        return self._chat(system, user)
+
+    def generate_metadata_batch(self, items: dict[str, str]) -> dict[str, dict]:
+        """Metadata for up to ``metadata_batch_size`` articles per request.
+
+        The batch response is a JSON array keyed by article id. Items that are
+        missing, unparseable or lack required fields fall back to the single
+        metadata call (with its repair prompt).
+        """
+        if self.metadata_batch_size <= 1:
+            return super().generate_metadata_batch(items)
+
+        from pipeline.rewriter.prompts import get_system_prompt, get_metadata_batch_prompt
 
         system = get_system_prompt()
-        if topic_only:
-            rewrite_prompt = get_topic_rewrite_prompt(topic)
-        else:
-            rewrite_prompt = get_rewrite_prompt(title, content[:5000])
-
-        # Step 1: Rewrite content
-        rewritten_html = self._chat(system, rewrite_prompt)
-
-        # Step 2: Generate metadata
-        meta_prompt = get_metadata_prompt(rewritten_html)
-        meta_response = self._chat(system, meta_prompt)
-
-        # Parse metadata JSON
-        metadata = self._parse_json(meta_response)
-
-        article = RewrittenArticle(
-            title=metadata.get("title", title),
-            slug=metadata.get("slug", ""),
-            content_html=rewritten_html,
-            excerpt=metadata.get("excerpt", ""),
-            meta_title=metadata.get("meta_title", ""),
-            meta_description=metadata.get("meta_description", ""),
-            meta_keywords=metadata.get("meta_keywords", []),
-            tags=metadata.get("tags", []),
-            source_url=raw_article.get("source_url", ""),
-            source_name=raw_article.get("source_name", ""),
-            category_hint=raw_article.get("category_hint", ""),
-            featured_image=raw_article.get("raw_featured_image", ""),
-        )
-
-        return article.to_dict()
-
-    def _parse_json(self, text: str) -> dict:
-        """Extract JSON from LLM response, handling markdown code blocks."""
-        text = text.strip()
-        # Try to find JSON in code blocks
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0]
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0]
-
-        try:
-            return json.loads(text.strip())
-        except json.JSONDecodeError:
-            # Try to find the first { ... } block
-            start = text.find("{")
-            end = text.rfind("}")
-            if start != -1 and end != -1:
-                return json.loads(text[start : end + 1])
-            return {}
+        ids = list(items)
+        results: dict[str, dict] = {}
+        for start in range(0, len(ids), self.metadata_batch_size):
+            chunk = {i: items[i] for i in ids[start : start + self.metadata_batch_size]}
+            try:
+                response = self._call(
+                    system, get_metadata_batch_prompt(chunk, self.provider), "metadata_batch"
+                )
+                parsed = self._parse_json_array(response)
+            except Exception as e:
+                print(f"    Batched metadata failed ({len(chunk)} articles): {e}")
+                parsed = []
+
+            batch: dict[str, dict] = {}
+            for item in parsed:
+                if isinstance(item, dict) and str(item.get("id", "")) in chunk:
+                    batch[str(item.pop("id"))] = item
+
+            for article_id, content_html in chunk.items():
+                metadata = batch.get(article_id) or {}
+                if not _missing_metadata(metadata):
+                    results[article_id] = metadata
+                    continue
+                try:
+                    results[article_id] = self.generate_metadata(content_html, metadata or None)
+                except Exception as e:
+                    print(f"    Metadata failed for article {article_id}: {e}")
+        return results
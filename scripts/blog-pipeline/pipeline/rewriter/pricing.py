@@ -0,0 +1,20 @@
+"""Token prices per provider, for cost estimates and usage accounting."""
+from __future__ import annotations
+
+from pipeline.settings import Settings
+
+
+def prices(provider: str, settings: Settings) -> tuple[float, float]:
+    """(input, output) USD per million tokens; local providers are free.
+
+    The router is priced as its most expensive possible route.
+    """
+    if provider in ("claude", "cli-agent", "router"):
+        return settings.anthropic_input_usd_per_mtok, settings.anthropic_output_usd_per_mtok
+    return 0.0, 0.0
+
+
+def usd_cost(provider: str, input_tokens: int, output_tokens: int, settings: Settings) -> float:
+    """Estimated USD cost of a call (or a sum of calls)."""
+    input_price, output_price = prices(provider, settings)
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
@@ -0,0 +1,113 @@
+"""Keyword/category index over products.json for per-article product selection.
+
+Instead of injecting the whole catalogue into every rewrite prompt, the index
+scores products against the article's title, topic and category hint and
+only the top-k are formatted into the prompt. Formatted snippets are memoised
+per selection, so repeated selections cost a dict lookup.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "the", "for", "of", "in", "on", "to", "with", "your", "you",
+    "how", "what", "why", "is", "are", "best", "tips", "ml", "mix", "pack",
+}
+
+# Score weights: a category match outranks incidental keyword overlap
+_CATEGORY_WEIGHT = 5.0
+_KEYWORD_WEIGHT = 1.0
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens without stopwords."""
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+
+
+class ProductIndex:
+    """Inverted index from keywords and categories to products."""
+
+    def __init__(self, config: dict, default_k: int = 3):
+        self.brand = config.get("brand_name", "HeldeeLife")
+        self.brand_url = config.get("brand_url", "https://www.heldeelife.com")
+        self.products = config.get("products", [])
+        self.default_k = default_k
+        self._by_category: dict[str, list[int]] = {}
+        self._by_keyword: dict[str, set[int]] = {}
+
+        for i, p in enumerate(self.products):
+            category = p.get("category", "")
+            if category:
+                self._by_category.setdefault(category, []).append(i)
+            text = " ".join(
+                [p.get("name", ""), p.get("short_name", ""), category.replace("_", " ")]
+                + list(p.get("keywords", []))
+            )
+            for word in set(tokenize(text)):
+                self._by_keyword.setdefault(word, set()).add(i)
+
+        # Rare words say more about a product than words shared by many
+        n = max(1, len(self.products))
+        self._weights = {
+            word: _KEYWORD_WEIGHT * (1 + (n - len(ids)) / n)
+            for word, ids in self._by_keyword.items()
+        }
+        self._format = lru_cache(maxsize=256)(self._format_uncached)
+
+    def _scores(self, text: str, category_hint: str = "") -> dict[int, float]:
+        scores: dict[int, float] = {}
+        for word in set(tokenize(f"{text} {category_hint.replace('_', ' ')}")):
+            for i in self._by_keyword.get(word, ()):
+                scores[i] = scores.get(i, 0.0) + self._weights[word]
+        for i in self._by_category.get(category_hint, ()):
+            scores[i] = scores.get(i, 0.0) + _CATEGORY_WEIGHT
+        return scores
+
+    def select(self, text: str, category_hint: str = "", k: int | None = None) -> tuple[int, ...]:
+        """Indices of the top-k products for an article (empty if nothing matches)."""
+        k = k or self.default_k
+        scores = self._scores(text, category_hint)
+        ranked = sorted(scores, key=lambda i: (-scores[i], i))
+        return tuple(ranked[:k])
+
+    def match_score(self, text: str, category_hint: str = "") -> float:
+        """How well the best product fits an article, from 0 (none) to 1."""
+        scores = self._scores(text, category_hint)
+        if not scores:
+            return 0.0
+        return min(1.0, max(scores.values()) / (_CATEGORY_WEIGHT + 2 * _KEYWORD_WEIGHT))
+
+    def format_for_prompt(self, text: str, category_hint: str = "", k: int | None = None) -> str:
+        """Prompt snippet listing the products selected for this article.
+
+        Falls back to the first ``k * 2`` catalogue entries when nothing matches.
+        """
+        selected = self.select(text, category_hint, k)
+        if not selected:
+            selected = tuple(range(min(len(self.products), (k or self.default_k) * 2)))
+        return self._format(selected)
+
+    def format_all(self) -> str:
+        """Prompt snippet listing the whole catalogue."""
+        return self._format(tuple(range(len(self.products))))
+
+    def _format_uncached(self, selected: tuple[int, ...]) -> str:
+        if not selected:
+            return f"Brand: {self.brand} — {self.brand_url}"
+        lines = [
+            f"Brand: {self.brand} — {self.brand_url}",
+            "",
+            "Choose 1–3 products that match the article topic (use category to match):",
+            "",
+        ]
+        for i in selected:
+            p = self.products[i]
+            name = p.get("name", p.get("short_name", ""))
+            url = p.get("url", self.brand_url)
+            short = p.get("short_name", name)
+            category = p.get("category", "")
+            cat_hint = f" [topic: {category}]" if category else ""
+            lines.append(f"  - {name} (in text use '{short}') — {url}{cat_hint}")
+        return "\n".join(lines)
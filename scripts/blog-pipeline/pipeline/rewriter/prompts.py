@@ -2,16 +2,65 @@
 from __future__ import annotations
 
 import json
+import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable
 import yaml
 
+from pipeline.publisher.seo import html_to_text
+from pipeline.rewriter.product_index import ProductIndex
 from pipeline.settings import CONFIG_DIR
 
 _prompts_cache: dict | None = None
 _products_cache: dict | None = None
+_product_index: ProductIndex | None = None
 
+# Products injected per rewrite prompt, and how much of the source is matched against
+PRODUCTS_PER_PROMPT = 3
+PRODUCT_MATCH_CHARS = 1000
 
-def _load_prompts() -> dict:
+# Token budgets for text injected into prompts
+SOURCE_TOKEN_BUDGET = 1500  # source text floor, when the context window is small
+METADATA_TOKEN_BUDGET = 900
+METADATA_BATCH_TOKEN_BUDGET = 450  # per article in a batched metadata prompt
+SUMMARY_SECTION_TOKENS = 1200
+SUMMARY_WORKERS = 4
+
+# Average characters per token by provider (close enough for budgeting)
+_CHARS_PER_TOKEN = {"claude": 3.5, "cli-agent": 3.5, "ollama": 4.0}
+
+# Context window by provider (Ollama: the server's default unless OLLAMA_NUM_CTX is set)
+CONTEXT_TOKENS = {"claude": 200_000, "cli-agent": 200_000, "ollama": 4096}
+DEFAULT_CONTEXT_TOKENS = 8192
+# Kept free in the rewrite prompt's context: the post (800-1500 words) and products
+REWRITE_OUTPUT_TOKENS = 2000
+PRODUCTS_PROMPT_TOKENS = 150
+
+_BOILERPLATE_RE = re.compile(
+    r"^(share( this)?|tweet|pin it|print|subscribe|sign up|log ?in|advertisement|"
+    r"read more|related( articles| posts)?|you may also like|recommended|"
+    r"follow us|click here|accept( all)? cookies?|skip to|back to top|"
+    r"©|copyright|all rights reserved|medically reviewed by|fact checked by)(?![a-z])",
+    re.IGNORECASE,
+)
+_CAPTION_RE = re.compile(
+    r"^(image|photo|illustration|credit|source|via)\s*[:|]|"
+    r"(getty images|shutterstock|istock|unsplash)",
+    re.IGNORECASE,
+)
+_DEFAULT_SUMMARY_SYSTEM_PROMPT = (
+    "You condense source articles for a writer. Be faithful and terse; "
+    "never add facts, advice or opinions of your own."
+)
+_DEFAULT_SUMMARY_PROMPT = (
+    "Condense this section of the article \"{title}\" to at most {max_words} words. "
+    "Keep every fact, figure, recommendation and conclusion; drop repetition and filler. "
+    "Output plain text only.\n\nSection:\n{section}"
+)
+
+
+def load_prompts() -> dict:
     global _prompts_cache
     if _prompts_cache is None:
         prompts_path = CONFIG_DIR / "prompts.yaml"
@@ -33,35 +82,182 @@ def _load_products_config() -> dict:
     return _products_cache
 
 
-def get_products_for_prompt() -> str:
-    """Format products from products.json for the rewrite prompt (name, URL, category for topic matching)."""
-    cfg = _load_products_config()
-    brand = cfg.get("brand_name", "HeldeeLife")
-    brand_url = cfg.get("brand_url", "https://www.heldeelife.com")
-    products = cfg.get("products", [])
-    lines = [
-        f"Brand: {brand} — {brand_url}",
-        "",
-        "Choose 1–3 products that match the article topic (use category to match):",
-        "",
-    ]
-    for p in products:
-        name = p.get("name", p.get("short_name", ""))
-        url = p.get("url", brand_url)
-        short = p.get("short_name", name)
-        category = p.get("category", "")
-        cat_hint = f" [topic: {category}]" if category else ""
-        lines.append(f"  - {name} (in text use '{short}') — {url}{cat_hint}")
-    return "\n".join(lines) if lines else f"Brand: {brand} — {brand_url}"
+def get_product_index() -> ProductIndex:
+    global _product_index
+    if _product_index is None:
+        _product_index = ProductIndex(_load_products_config(), default_k=PRODUCTS_PER_PROMPT)
+    return _product_index
+
+
+def get_products_for_prompt(text: str = "", category_hint: str = "") -> str:
+    """Format the products relevant to an article for the rewrite prompt.
+
+    Products are ranked by keyword/category match against ``text`` (title,
+    topic, opening of the source) and ``category_hint``; only the top
+    PRODUCTS_PER_PROMPT are included. Without any text the full catalogue
+    is listed.
+    """
+    index = get_product_index()
+    if not text and not category_hint:
+        return index.format_all()
+    return index.format_for_prompt(text, category_hint)
+
+
+def count_tokens(text: str, provider: str = "") -> int:
+    """Estimate the token count of ``text`` for a provider's tokenizer."""
+    return int(len(text) / _CHARS_PER_TOKEN.get(provider, 4.0)) + 1
+
+
+def compact_source_text(text: str) -> str:
+    """Drop low-value lines from scraped article text.
+
+    Removes repeated lines, share/subscribe/cookie boilerplate, image
+    captions and runs of short link-like lines (nav menus, link lists).
+    """
+    kept: list[str] = []
+    seen: set[str] = set()
+    short_run: list[str] = []
+
+    def flush_short_run() -> None:
+        # 5+ consecutive 1–4 word lines with no sentence punctuation = link list
+        if len(short_run) < 5:
+            kept.extend(short_run)
+        short_run.clear()
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        key = re.sub(r"\W+", " ", line.lower()).strip()
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        if len(line.split()) <= 8 and _BOILERPLATE_RE.match(line):
+            continue
+        if _CAPTION_RE.search(line):
+            continue
+        if len(line.split()) <= 4 and not re.search(r"[.!?:]$", line):
+            short_run.append(line)
+            continue
+        flush_short_run()
+        kept.append(line)
+    flush_short_run()
+    return "\n".join(kept)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, provider: str = "") -> str:
+    """Cut ``text`` to ``max_tokens``, keeping the opening and the conclusion."""
+    if count_tokens(text, provider) <= max_tokens:
+        return text
+    max_chars = int(max_tokens * _CHARS_PER_TOKEN.get(provider, 4.0))
+    head = int(max_chars * 0.7)
+    tail = max_chars - head
+    return f"{text[:head].rstrip()}\n[...]\n{text[-tail:].lstrip()}"
+
+
+def _split_sections(text: str, section_tokens: int, provider: str) -> list[str]:
+    """Group paragraphs into sections of roughly ``section_tokens`` each."""
+    sections: list[str] = []
+    current: list[str] = []
+    size = 0
+    for para in text.split("\n"):
+        para_tokens = count_tokens(para, provider)
+        if current and size + para_tokens > section_tokens:
+            sections.append("\n".join(current))
+            current, size = [], 0
+        current.append(para)
+        size += para_tokens
+    if current:
+        sections.append("\n".join(current))
+    return sections
+
+
+def context_window(provider: str = "", context_tokens: int = 0) -> int:
+    """``context_tokens`` if set, else the provider's context window."""
+    return context_tokens or CONTEXT_TOKENS.get(provider, DEFAULT_CONTEXT_TOKENS)
+
+
+def source_token_budget(provider: str = "", context_tokens: int = 0) -> int:
+    """Tokens of source text that fit one rewrite prompt.
+
+    The context window minus the system and rewrite prompts, products and
+    room for the post, but at least SOURCE_TOKEN_BUDGET. Only sources longer
+    than this are condensed, so large-context models get the whole article.
+    """
+    prompts = load_prompts()
+    overhead = (
+        count_tokens(prompts["system_prompt"], provider)
+        + count_tokens(prompts["rewrite_prompt"], provider)
+        + PRODUCTS_PROMPT_TOKENS
+        + REWRITE_OUTPUT_TOKENS
+    )
+    return max(SOURCE_TOKEN_BUDGET, context_window(provider, context_tokens) - overhead)
+
+
+def fit_to_budget(
+    text: str,
+    max_tokens: int,
+    provider: str = "",
+    summarize: Callable[[str], str] | None = None,
+    title: str = "",
+) -> str:
+    """Bound ``text`` to ``max_tokens``.
+
+    Long text is map-reduced when ``summarize`` (a prompt -> completion
+    callable) is given: sections are condensed in parallel and joined in
+    order. Otherwise, or if the summaries are still too long, the opening
+    and conclusion are kept.
+    """
+    if count_tokens(text, provider) <= max_tokens:
+        return text
+    if summarize is not None:
+        sections = _split_sections(text, SUMMARY_SECTION_TOKENS, provider)
+        max_words = max(40, int(max_tokens * 0.75 / len(sections)))
+        template = load_prompts().get("section_summary_prompt") or _DEFAULT_SUMMARY_PROMPT
+        prompts = [
+            template.format(title=title, section=section, max_words=max_words).strip()
+            for section in sections
+        ]
+        with ThreadPoolExecutor(max_workers=min(SUMMARY_WORKERS, len(prompts))) as pool:
+            text = "\n".join(s.strip() for s in pool.map(summarize, prompts))
+    return truncate_to_tokens(text, max_tokens, provider)
+
+
+def prepare_source_content(
+    title: str,
+    content: str,
+    provider: str = "",
+    summarize: Callable[[str], str] | None = None,
+    max_tokens: int = 0,
+) -> str:
+    """Compact scraped text and fit it to ``max_tokens`` for the rewrite prompt.
+
+    ``max_tokens`` defaults to ``source_token_budget(provider)``.
+    """
+    return fit_to_budget(
+        compact_source_text(content),
+        max_tokens or source_token_budget(provider),
+        provider=provider,
+        summarize=summarize,
+        title=title,
+    )
 
 
 def get_system_prompt() -> str:
-    return _load_prompts()["system_prompt"].strip()
+    return load_prompts()["system_prompt"].strip()
+
+
+def get_summary_system_prompt() -> str:
+    """System prompt of the section summaries (not the blog writer's)."""
+    prompts = load_prompts()
+    return (prompts.get("section_summary_system_prompt") or _DEFAULT_SUMMARY_SYSTEM_PROMPT).strip()
 
 
-def get_rewrite_prompt(title: str, content: str) -> str:
-    template = _load_prompts()["rewrite_prompt"]
-    products_for_prompt = get_products_for_prompt()
+def get_rewrite_prompt(title: str, content: str, category_hint: str = "") -> str:
+    template = load_prompts()["rewrite_prompt"]
+    products_for_prompt = get_products_for_prompt(
+        f"{title}\n{content[:PRODUCT_MATCH_CHARS]}", category_hint
+    )
     return template.format(
         title=title,
         content=content,
@@ -69,23 +265,54 @@ def get_rewrite_prompt(title: str, content: str) -> str:
     ).strip()
 
 
-def get_topic_rewrite_prompt(topic: str) -> str:
+def get_topic_rewrite_prompt(topic: str, category_hint: str = "") -> str:
     """Prompt for writing a new blog post from a topic only (no source article).
     Products from products.json are injected so they feel like part of the blog."""
-    template = _load_prompts().get("topic_rewrite_prompt")
+    template = load_prompts().get("topic_rewrite_prompt")
     if not template:
         # Fallback: use rewrite prompt with topic as minimal "content"
         return get_rewrite_prompt(
             title=topic,
             content=f"Write a comprehensive, original blog post about: {topic}",
+            category_hint=category_hint,
         )
-    products_for_prompt = get_products_for_prompt()
+    products_for_prompt = get_products_for_prompt(topic, category_hint)
     return template.format(
         topic=topic.strip(),
         products_for_prompt=products_for_prompt,
     ).strip()
 
 
-def get_metadata_prompt(content: str) -> str:
-    template = _load_prompts()["metadata_prompt"]
-    return template.format(content=content[:3000]).strip()
+def get_metadata_repair_prompt(
+    content: str, fields: list[str], response: str, provider: str = ""
+) -> str:
+    """Ask again for only the metadata fields that were missing or unparseable."""
+    template = load_prompts()["metadata_repair_prompt"]
+    text = truncate_to_tokens(html_to_text(content), METADATA_TOKEN_BUDGET, provider)
+    return template.format(
+        fields=", ".join(f'"{f}"' for f in fields),
+        content=text,
+        response=response[:2000],
+    ).strip()
+
+
+def get_metadata_prompt(content: str, provider: str = "") -> str:
+    """Metadata prompt over the rewritten post's text, bounded to METADATA_TOKEN_BUDGET."""
+    template = load_prompts()["metadata_prompt"]
+    text = truncate_to_tokens(html_to_text(content), METADATA_TOKEN_BUDGET, provider)
+    return template.format(content=text).strip()
+
+
+def get_metadata_batch_prompt(items: dict[str, str], provider: str = "") -> str:
+    """One metadata prompt for several posts (``{article_id: content_html}``).
+
+    Each post is bounded to METADATA_BATCH_TOKEN_BUDGET so a batch stays inside
+    the model's context window.
+    """
+    template = load_prompts()["metadata_batch_prompt"]
+    articles = "\n\n".join(
+        f"### Article {article_id}\n"
+        + truncate_to_tokens(html_to_text(content), METADATA_BATCH_TOKEN_BUDGET, provider)
+        for article_id, content in items.items()
+    )
+    return template.format(count=len(items), articles=articles).strip()
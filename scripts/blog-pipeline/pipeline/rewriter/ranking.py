@@ -0,0 +1,244 @@
+"""Value ranking and cost estimates for the rewrite queue.
+
+Pending raw articles are scored from 0 to 1 on:
+- freshness: ``raw_published_date``, halving every FRESHNESS_HALF_LIFE_DAYS
+- category gap: categories with few published (site mirror) or rewritten posts
+  score higher
+- length: enough text to rewrite from, without a very long source to condense
+- product match: how well the best product in products.json fits the article
+
+and rewritten best-first. Each article also gets a token and cost estimate
+(rewrite call, section summaries for long sources, metadata call) so a run can
+stop at a token or dollar budget; while it runs, the budget is re-checked
+against the usage actually recorded in data/metrics.sqlite.
+"""
+from __future__ import annotations
+
+import json
+import math
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+from pipeline.publisher.category_manager import category_name_and_slug, load_category_mapping
+from pipeline.rewriter.pricing import usd_cost
+from pipeline.rewriter.prompts import (
+    METADATA_TOKEN_BUDGET,
+    PRODUCT_MATCH_CHARS,
+    PRODUCTS_PROMPT_TOKENS,
+    REWRITE_OUTPUT_TOKENS,
+    SUMMARY_SECTION_TOKENS,
+    count_tokens,
+    get_product_index,
+    get_summary_system_prompt,
+    load_prompts,
+    source_token_budget,
+)
+from pipeline.settings import REWRITTEN_DIR, Settings
+from pipeline.storage import site_mirror
+
+WEIGHTS = {"freshness": 0.3, "category_gap": 0.25, "length": 0.2, "product_match": 0.25}
+FRESHNESS_HALF_LIFE_DAYS = 60
+UNKNOWN_FRESHNESS = 0.3
+
+# Expected output of the metadata call (JSON)
+METADATA_OUTPUT_TOKENS = 250
+
+
+@dataclass
+class QueueItem:
+    """A pending raw article with its value score and cost estimate."""
+
+    path: Path
+    value: float
+    input_tokens: int
+    output_tokens: int
+    cost_usd: float
+
+    @property
+    def tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+def _parse_date(value: str) -> datetime | None:
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def freshness_score(raw: dict, now: datetime) -> float:
+    published = _parse_date(raw.get("raw_published_date", ""))
+    if published is None:
+        return UNKNOWN_FRESHNESS
+    age_days = max(0.0, (now - published).total_seconds() / 86400)
+    return 0.5 ** (age_days / FRESHNESS_HALF_LIFE_DAYS)
+
+
+def length_score(words: int) -> float:
+    """Ramp up to 400 words, flat to 2500, then ease down (long sources cost more)."""
+    if words < 150:
+        return 0.1
+    if words < 400:
+        return 0.1 + 0.9 * (words - 150) / 250
+    if words <= 2500:
+        return 1.0
+    return max(0.6, 1.0 - (words - 2500) / 10000)
+
+
+def category_slug(category_hint: str, mappings: dict) -> str:
+    """Site category slug a raw article's ``category_hint`` is published under."""
+    return category_name_and_slug(category_hint, mappings)[1]
+
+
+def category_counts(mappings: dict | None = None) -> Counter:
+    """Posts per category slug: published ones and rewritten ones awaiting publish.
+
+    Published posts come from the site mirror (``mirror sync``), so posts
+    created or deleted outside the pipeline count too. Until the mirror has
+    been synced, the published files in data/rewritten/done stand in for it.
+    """
+    mappings = load_category_mapping() if mappings is None else mappings
+    counts: Counter = Counter(site_mirror.category_post_counts())
+    paths = list(REWRITTEN_DIR.glob("*.json"))
+    if not counts:
+        paths += list((REWRITTEN_DIR / "done").glob("*.json"))
+    for path in paths:
+        try:
+            hint = json.loads(path.read_text()).get("category_hint", "")
+        except (OSError, json.JSONDecodeError):
+            continue
+        counts[category_slug(hint, mappings)] += 1
+    return counts
+
+
+def category_gap_score(category: str, counts: Counter) -> float:
+    """1 for a category with no posts yet, 0 for the best-covered one."""
+    most = max(counts.values(), default=0)
+    if not most:
+        return 1.0
+    return 1.0 - counts.get(category, 0) / most
+
+
+def value_score(raw: dict, counts: Counter, now: datetime, mappings: dict | None = None) -> float:
+    text = raw.get("raw_content_text", "")
+    title = raw.get("raw_title", "")
+    category = raw.get("category_hint", "")
+    parts = {
+        "freshness": freshness_score(raw, now),
+        "category_gap": category_gap_score(category_slug(category, mappings or {}), counts),
+        "length": length_score(len(text.split())),
+        "product_match": get_product_index().match_score(
+            f"{title}\n{text[:PRODUCT_MATCH_CHARS]}", category
+        ),
+    }
+    return sum(WEIGHTS[k] * v for k, v in parts.items())
+
+
+def estimate_article_tokens(
+    raw: dict, provider: str, metadata_mode: str = "llm", context_tokens: int = 0
+) -> tuple[int, int]:
+    """(input, output) tokens expected to rewrite one raw article."""
+    prompts = load_prompts()
+    system = count_tokens(prompts["system_prompt"], provider)
+    source = count_tokens(raw.get("raw_content_text", ""), provider)
+    budget = source_token_budget(provider, context_tokens)
+
+    input_tokens = system + count_tokens(prompts["rewrite_prompt"], provider) + PRODUCTS_PROMPT_TOKENS
+    output_tokens = REWRITE_OUTPUT_TOKENS
+    if source > budget:
+        # Sections are condensed first: the whole source goes in, the budget comes out
+        sections = math.ceil(source / SUMMARY_SECTION_TOKENS)
+        summary_system = count_tokens(get_summary_system_prompt(), provider)
+        input_tokens += source + sections * (summary_system + 60)
+        output_tokens += budget
+        source = budget
+    input_tokens += source
+
+    if metadata_mode == "llm":
+        input_tokens += (
+            system
+            + count_tokens(prompts["metadata_prompt"], provider)
+            + min(METADATA_TOKEN_BUDGET, REWRITE_OUTPUT_TOKENS)
+        )
+        output_tokens += METADATA_OUTPUT_TOKENS
+    return input_tokens, output_tokens
+
+
+def build_queue(
+    paths: list[Path],
+    provider: str,
+    settings: Settings,
+    metadata_mode: str = "llm",
+    order: str = "value",
+    skipped: list[tuple[Path, str]] | None = None,
+) -> list[QueueItem]:
+    """Score and estimate ``paths``; ``order`` is "value" (best first) or "name".
+
+    Files that cannot be read or parsed are left out of the queue and
+    appended to ``skipped`` as (path, error).
+    """
+    mappings = load_category_mapping()
+    counts = category_counts(mappings)
+    context_tokens = settings.ollama_num_ctx if provider == "ollama" else 0
+    now = datetime.now(timezone.utc)
+    queue = []
+    for path in paths:
+        try:
+            raw = json.loads(path.read_text())
+        except (OSError, json.JSONDecodeError) as e:
+            if skipped is not None:
+                skipped.append((path, str(e)))
+            continue
+        input_tokens, output_tokens = estimate_article_tokens(
+            raw, provider, metadata_mode, context_tokens
+        )
+        queue.append(
+            QueueItem(
+                path=path,
+                value=value_score(raw, counts, now, mappings),
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                cost_usd=usd_cost(provider, input_tokens, output_tokens, settings),
+            )
+        )
+    if order == "value":
+        queue.sort(key=lambda item: (-item.value, item.path.name))
+    else:
+        queue.sort(key=lambda item: item.path.name)
+    return queue
+
+
+def apply_budget(
+    queue: list[QueueItem],
+    budget_tokens: int = 0,
+    budget_usd: float = 0.0,
+    spent_tokens: int = 0,
+    spent_usd: float = 0.0,
+) -> list[QueueItem]:
+    """Longest prefix of ``queue`` whose estimates fit the budgets (0 = no limit).
+
+    ``spent_tokens``/``spent_usd`` is usage already recorded against the
+    budgets, so a running rewrite can re-check what is left with real numbers.
+    """
+    selected = []
+    tokens = spent_tokens
+    cost = spent_usd
+    for item in queue:
+        if budget_tokens and tokens + item.tokens > budget_tokens:
+            break
+        if budget_usd and cost + item.cost_usd > budget_usd:
+            break
+        tokens += item.tokens
+        cost += item.cost_usd
+        selected.append(item)
+    return selected
@@ -0,0 +1,247 @@
+"""Rewriter that spreads calls over several providers.
+
+``--provider router --model "ollama:llama3,cli-agent:claude@2"`` builds one
+rewriter per entry (``provider:model@capacity``) and routes every LLM call:
+- To the provider with the best observed latency x error rate that still has
+  a free slot (providers without samples are tried first)
+- On failure, to the next provider, until every route has been tried
+- When hedging is on and a call runs past the provider's p95 latency, a
+  duplicate is sent to the next best provider and the first answer wins
+
+Each article records the provider that wrote its body. Usage is stored per
+route call, so hedge duplicates and failed attempts are counted too.
+"""
+from __future__ import annotations
+
+import collections
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from pipeline.rewriter.base import BaseRewriter
+from pipeline.rewriter.prompts import context_window, count_tokens
+from pipeline.rewriter.usage import current_article, record_call, set_article, take_usage
+from pipeline.settings import Settings
+
+# EWMA smoothing for latency and error rate
+_ALPHA = 0.2
+# Error rate weighs heavily: a provider failing half its calls costs 3x latency
+_ERROR_PENALTY = 4.0
+# Latency samples kept per provider for the hedging percentile
+_LATENCY_WINDOW = 50
+# Latency assumed for a route that has only ever failed
+_UNKNOWN_LATENCY = 60.0
+
+
+class Route:
+    """One provider behind the router plus its observed health."""
+
+    def __init__(self, name: str, rewriter: BaseRewriter, capacity: int, min_samples: int = 5):
+        self.name = name
+        self.rewriter = rewriter
+        self.capacity = max(1, capacity)
+        self.min_samples = min_samples
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self._samples: collections.deque = collections.deque(maxlen=_LATENCY_WINDOW)
+
+    def score(self) -> float:
+        """Lower is better; untried routes score 0 so each gets sampled."""
+        if not self.calls:
+            return 0.0
+        latency = self.latency if self._samples else _UNKNOWN_LATENCY
+        return latency * (1 + _ERROR_PENALTY * self.error_rate)
+
+    def p95(self) -> float | None:
+        """95th percentile latency, once enough successful calls were seen."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self.calls += 1
+        self.error_rate = (1 - _ALPHA) * self.error_rate + _ALPHA * (0.0 if ok else 1.0)
+        if ok:
+            self._samples.append(seconds)
+            self.latency = seconds if len(self._samples) == 1 else (1 - _ALPHA) * self.latency + _ALPHA * seconds
+        else:
+            self.failures += 1
+
+
+class RouterRewriter(BaseRewriter):
+    """Routes each LLM call to one of several rewriters."""
+
+    provider = "router"
+
+    def __init__(self, routes: list[Route], hedge: bool = True):
+        if not routes:
+            raise ValueError("Router needs at least one provider")
+        self.routes = routes
+        self.hedge = hedge and len(routes) > 1
+        # Any route may serve a prompt, so it must fit the smallest context
+        self.context_tokens = min(
+            context_window(r.rewriter.provider, r.rewriter.context_tokens) for r in routes
+        )
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(
+            max_workers=sum(r.capacity for r in routes) * 2,
+            thread_name_prefix="router",
+        )
+
+    @classmethod
+    def from_spec(cls, spec: str, settings: Settings, workers: int = 1) -> "RouterRewriter":
+        """Build from ``provider:model@capacity`` entries separated by commas.
+
+        Model and capacity are optional; capacity defaults to ``workers``.
+        """
+        from pipeline.rewriter.base import _create_rewriter
+
+        routes = []
+        for entry in filter(None, (e.strip() for e in (spec or "").split(","))):
+            capacity = workers
+            if "@" in entry:
+                entry, cap = entry.rsplit("@", 1)
+                capacity = int(cap)
+            name, _, model = entry.partition(":")
+            if name == cls.provider:
+                raise ValueError("Router routes cannot be routers")
+            rewriter = _create_rewriter(name, model or None, settings, capacity)
+            routes.append(Route(f"{name}:{model}" if model else name, rewriter, capacity))
+        if not routes:
+            raise ValueError('Router needs --model like "ollama:llama3,cli-agent:claude"')
+        return cls(routes, hedge=settings.router_hedge)
+
+    # --- routing ---
+
+    def _pick(self, exclude: set[str], block: bool = True) -> Route | None:
+        """Reserve a slot on the best route not in ``exclude``."""
+        with self._cond:
+            while True:
+                candidates = [r for r in self.routes if r.name not in exclude]
+                if not candidates:
+                    return None
+                free = [r for r in candidates if r.in_flight < r.capacity]
+                if free:
+                    route = min(free, key=lambda r: (r.score(), r.in_flight))
+                    route.in_flight += 1
+                    return route
+                if not block:
+                    return None
+                self._cond.wait()
+
+    def _call(self, system: str, user: str, step: str, article: str | None = None) -> str:
+        # Every route call is recorded by _run, so skip the base class's single record
+        if article is not None:
+            set_article(article)
+        self._local.step = step
+        return self._complete(system, user)
+
+    def _run(self, route: Route, system: str, user: str, step: str, article: str) -> str:
+        """Run one call on a reserved route and record how it went.
+
+        Runs on a worker thread, so the step and article are passed in.
+        """
+        set_article(article)
+        take_usage()
+        started = time.monotonic()
+        text = ""
+        ok = False
+        try:
+            text = route.rewriter._complete(system, user)
+            ok = True
+            return text
+        finally:
+            latency = time.monotonic() - started
+            with self._cond:
+                route.in_flight -= 1
+                route.record(latency, ok)
+                self._cond.notify_all()
+            reported = take_usage()
+            record_call(
+                provider=route.name,
+                model=reported.get("model") or getattr(route.rewriter, "model", ""),
+                step=step,
+                input_tokens=reported.get("input_tokens") or count_tokens(system + user, route.rewriter.provider),
+                output_tokens=reported.get("output_tokens") or (count_tokens(text, route.rewriter.provider) if ok else 0),
+                latency_s=latency,
+                ok=ok,
+                cost_usd=reported.get("cost_usd"),
+            )
+
+    def _complete(self, system: str, user: str) -> str:
+        step = getattr(self._local, "step", "")
+        article = current_article()
+        tried: set[str] = set()
+        pending: dict = {}
+        error: Exception | None = None
+
+        def submit(route: Route) -> None:
+            tried.add(route.name)
+            pending[self._executor.submit(self._run, route, system, user, step, article)] = route
+
+        while True:
+            if not pending:
+                route = self._pick(tried)
+                if route is None:
+                    raise error or RuntimeError("No provider available")
+                submit(route)
+
+            # Wait for an answer, or until the slowest in-flight call passes its p95
+            hedge_after = None
+            if self.hedge and len(pending) == 1:
+                hedge_after = next(iter(pending.values())).p95()
+            done, _ = wait(pending, timeout=hedge_after, return_when=FIRST_COMPLETED)
+
+            if not done:
+                backup = self._pick(tried, block=False)
+                if backup is None:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                else:
+                    print(f"    [router] {pending[next(iter(pending))].name} slow, hedging on {backup.name}")
+                    submit(backup)
+                    continue
+
+            for future in done:
+                route = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"    [router] {route.name} failed: {str(e)[:200]}")
+                    error = e
+                    continue
+                # The losing duplicate (if any) finishes in the background and records itself
+                self._local.route = route
+                return result
+
+    # --- article bookkeeping ---
+
+    def _content_provider(self) -> str:
+        route = getattr(self._local, "route", None)
+        return route.name if route else self.provider
+
+    def _clean_content(self, text: str) -> str:
+        route = getattr(self._local, "route", None)
+        return route.rewriter._clean_content(text) if route else text
+
+    def stats(self) -> list[dict]:
+        """Per-route counters for the end-of-run summary."""
+        return [
+            {
+                "provider": r.name,
+                "calls": r.calls,
+                "failures": r.failures,
+                "avg_latency_s": round(r.latency, 2),
+                "p95_s": round(r.p95() or 0.0, 2),
+            }
+            for r in self.routes
+        ]
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for route in self.routes:
+            route.rewriter.close()
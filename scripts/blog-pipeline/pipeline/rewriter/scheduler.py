@@ -0,0 +1,242 @@
+"""Retry, backoff and rate governance shared by all LLM calls.
+
+Every rewriter sends its ``_chat``/``_run_cli`` call through a CallScheduler:
+- Errors are classified (rate limit, overloaded, timeout, transient, fatal)
+  from the status code or exception type the provider raised
+- Retryable errors back off exponentially with full jitter, or for
+  ``retry-after`` seconds when the provider says so; timeouts get fewer
+  retries, since each one already waited the provider's full timeout
+- An AIMD governor halves the allowed concurrency on throttling and grows it
+  back by one slot per window of successes
+- An optional tokens-per-minute budget delays calls that would overrun it
+
+Schedulers are shared per provider, so concurrent rewrites of one run all see
+the same throttling state.
+"""
+from __future__ import annotations
+
+import collections
+import random
+import subprocess
+import threading
+import time
+
+import httpx
+
+from pipeline.settings import Settings
+
+RATE_LIMIT = "rate_limit"
+OVERLOADED = "overloaded"
+TIMEOUT = "timeout"
+TRANSIENT = "transient"
+FATAL = "fatal"
+
+RETRYABLE = {RATE_LIMIT, OVERLOADED, TIMEOUT, TRANSIENT}
+
+
+def _retry_after(response) -> float | None:
+    """Seconds from a ``retry-after`` header, if the response carries one."""
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def classify_error(exc: Exception) -> tuple[str, float | None]:
+    """Classify an LLM call failure. Returns (kind, retry_after_seconds).
+
+    Only the status code (``status_code`` or ``response.status_code``, which
+    CliAgentError parses from the CLI's API error) and the exception type are
+    used; error messages are never searched for numbers.
+    """
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    retry_after = _retry_after(response)
+
+    if isinstance(status, int):
+        if status == 429:
+            return RATE_LIMIT, retry_after
+        if status in (503, 529):
+            return OVERLOADED, retry_after
+        if status >= 500 or status == 408:
+            return TRANSIENT, retry_after
+        return FATAL, None
+
+    if isinstance(exc, (subprocess.TimeoutExpired, httpx.TimeoutException, TimeoutError)):
+        return TIMEOUT, None
+    if isinstance(exc, (httpx.TransportError, ConnectionError)):
+        return TRANSIENT, None
+    # SDK errors without a status code (e.g. anthropic.APIConnectionError)
+    name = type(exc).__name__
+    if "Timeout" in name:
+        return TIMEOUT, None
+    if "Connection" in name:
+        return TRANSIENT, None
+    return FATAL, None
+
+
+class ConcurrencyGovernor:
+    """Additive-increase / multiplicative-decrease limit on in-flight calls."""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= max(1, int(self.limit)):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self) -> None:
+        with self._cond:
+            self.limit = max(1.0, self.limit / 2)
+
+
+class TokenBudget:
+    """Sliding one-minute window of reserved tokens (0 = unlimited)."""
+
+    def __init__(self, tokens_per_minute: int = 0):
+        self.tokens_per_minute = tokens_per_minute
+        self._window: collections.deque = collections.deque()
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> None:
+        """Block until ``tokens`` fit in the current minute, then record them."""
+        if self.tokens_per_minute <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._window and now - self._window[0][0] >= 60:
+                    self._used -= self._window.popleft()[1]
+                # A single call larger than the budget runs alone in its window
+                if self._used + tokens <= self.tokens_per_minute or not self._window:
+                    self._window.append((now, tokens))
+                    self._used += tokens
+                    return
+                wait = 60 - (now - self._window[0][0])
+            time.sleep(max(wait, 0.05))
+
+
+class CallScheduler:
+    """Runs LLM calls with classified retries, backoff and rate governance."""
+
+    def __init__(
+        self,
+        name: str,
+        max_retries: int = 5,
+        base_delay: float = 2.0,
+        max_delay: float = 120.0,
+        max_concurrency: int = 4,
+        tokens_per_minute: int = 0,
+        max_timeout_retries: int = 1,
+    ):
+        self.name = name
+        self.max_retries = max_retries
+        self.max_timeout_retries = max_timeout_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.governor = ConcurrencyGovernor(max_concurrency)
+        self.budget = TokenBudget(tokens_per_minute)
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        """Delay before retry ``attempt`` (0-based)."""
+        if retry_after is not None:
+            return min(self.max_delay, retry_after) + random.uniform(0, 1)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def call(self, fn, est_tokens: int = 0):
+        """Call ``fn()`` until it succeeds or fails with a non-retryable error.
+
+        ``est_tokens`` (from ``prompts.count_tokens``) is reserved against the
+        token budget before each attempt.
+        """
+        attempt = 0
+        timeouts = 0
+        while True:
+            self.budget.reserve(est_tokens)
+            self.governor.acquire()
+            try:
+                result = fn()
+                self.governor.on_success()
+                return result
+            except Exception as e:
+                error = e
+                kind, retry_after = classify_error(e)
+                if kind in (RATE_LIMIT, OVERLOADED):
+                    self.governor.on_throttle()
+                if kind == TIMEOUT:
+                    timeouts += 1
+                if (
+                    kind not in RETRYABLE
+                    or attempt >= self.max_retries
+                    or timeouts > self.max_timeout_retries
+                ):
+                    raise
+            finally:
+                self.governor.release()
+
+            delay = self.backoff(attempt, retry_after)
+            attempt += 1
+            print(
+                f"    [{self.name}] {kind}, retry {attempt}/{self.max_retries} "
+                f"in {delay:.1f}s: {str(error)[:200]}"
+            )
+            time.sleep(delay)
+
+
+_schedulers: dict[str, CallScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(provider: str, settings: Settings, max_concurrency: int = 1) -> CallScheduler:
+    """Return the scheduler shared by every rewriter of ``provider`` in this process."""
+    tokens_per_minute = {
+        "ollama": settings.ollama_tokens_per_minute,
+        "claude": settings.anthropic_tokens_per_minute,
+        "cli-agent": settings.cli_agent_tokens_per_minute,
+    }.get(provider, 0)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(provider)
+        if scheduler is None:
+            scheduler = CallScheduler(
+                provider,
+                max_retries=settings.llm_max_retries,
+                base_delay=settings.llm_backoff_base,
+                max_delay=settings.llm_backoff_max,
+                max_concurrency=max_concurrency,
+                tokens_per_minute=tokens_per_minute,
+                max_timeout_retries=settings.llm_max_timeout_retries,
+            )
+            _schedulers[provider] = scheduler
+        elif max_concurrency > scheduler.governor.max_concurrency:
+            scheduler.governor.max_concurrency = max_concurrency
+        return scheduler
+
+
+def reset_schedulers() -> None:
+    """Forget shared schedulers (e.g. between benchmark runs)."""
+    with _schedulers_lock:
+        _schedulers.clear()
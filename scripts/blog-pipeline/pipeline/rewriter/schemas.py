@@ -25,5 +25,8 @@ class RewrittenArticle(BaseModel):
     category_hint: str = ""
     featured_image: str = ""
 
+    # Provider that wrote the body (e.g. "ollama:llama3" behind the router)
+    provider: str = ""
+
     def to_dict(self) -> dict:
         return self.model_dump()
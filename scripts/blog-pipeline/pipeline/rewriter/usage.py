@@ -0,0 +1,87 @@
+"""Per-call LLM usage accounting.
+
+Rewriters call ``report_usage()`` from ``_complete`` with whatever the
+provider returned (token counts, cost, model); BaseRewriter times each call,
+fills in estimates for anything missing and stores one record per call in
+data/metrics.sqlite via ``record_call()``. State is thread-local, so
+concurrent rewrites never mix up their records.
+"""
+from __future__ import annotations
+
+import threading
+from functools import lru_cache
+
+from pipeline.rewriter.pricing import usd_cost
+from pipeline.settings import Settings, get_settings
+
+_local = threading.local()
+_recording = True
+
+
+@lru_cache(maxsize=1)
+def _settings() -> Settings:
+    return get_settings()
+
+
+def set_recording(enabled: bool) -> None:
+    """Turn storing usage records on or off (e.g. off for benchmarks)."""
+    global _recording
+    _recording = enabled
+
+
+def report_usage(**fields) -> None:
+    """Usage of the call that just finished on this thread.
+
+    Known fields: provider, model, input_tokens, output_tokens, cost_usd.
+    """
+    _local.usage = fields
+
+
+def take_usage() -> dict:
+    """Return and clear the usage reported on this thread."""
+    usage = getattr(_local, "usage", None) or {}
+    _local.usage = None
+    return usage
+
+
+def set_article(article: str) -> None:
+    """Article that following calls on this thread belong to."""
+    _local.article = article
+
+
+def current_article() -> str:
+    return getattr(_local, "article", "")
+
+
+def record_call(
+    provider: str,
+    model: str,
+    step: str,
+    input_tokens: int,
+    output_tokens: int,
+    latency_s: float,
+    ok: bool,
+    cost_usd: float | None = None,
+) -> None:
+    """Store one call; the cost is priced from settings when the provider gave none."""
+    from pipeline.storage.metrics_store import record_usage
+
+    if not _recording:
+        return
+    if cost_usd is None:
+        cost_usd = usd_cost(provider.split(":", 1)[0], input_tokens, output_tokens, _settings())
+    try:
+        record_usage(
+            provider=provider,
+            model=model,
+            step=step,
+            article=current_article(),
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            latency_s=latency_s,
+            cost_usd=cost_usd,
+            ok=ok,
+        )
+    except Exception as e:
+        # Accounting must never fail a rewrite
+        print(f"    Usage not recorded: {e}")
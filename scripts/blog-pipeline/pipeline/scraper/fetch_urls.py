@@ -12,10 +12,12 @@ from pathlib import Path
 
 import httpx
 from bs4 import BeautifulSoup
+from scrapy import Selector
 
 from pipeline.scraper.items import RawArticleItem
+from pipeline.scraper.spiders.base_spider import extract_content
 from pipeline.scraper.pipelines import SaveRawArticlePipeline
-from pipeline.storage.dedup_store import is_seen, mark_seen
+from pipeline.storage.dedup_store import content_hash, is_seen, mark_seen
 from pipeline.settings import RAW_DIR, ensure_dirs
 
 
@@ -35,13 +37,22 @@ CONTENT_SELECTORS = [
 TITLE_SELECTORS = ["h1.entry-title", "h1.post-title", "article h1", "h1"]
 
 
-def fetch_article(url: str, category_hint: str = "", rate_limit: float = 2.0) -> RawArticleItem | None:
+def fetch_article(
+    url: str,
+    category_hint: str = "",
+    rate_limit: float = 2.0,
+    force: bool = False,
+    source_config: dict | None = None,
+) -> RawArticleItem | None:
     """Fetch and parse a single article URL.
 
     Uses httpx with a browser-like user agent and BeautifulSoup for parsing.
-    Tries multiple common content selectors.
+    Tries multiple common content selectors. ``force`` fetches URLs that
+    were seen before (used by ``refresh``). With ``source_config`` (an
+    entry of sources.yaml) the content is extracted with that source's
+    selectors, exactly as the spiders do.
     """
-    if is_seen(url):
+    if not force and is_seen(url):
         return None
 
     headers = {
@@ -61,6 +72,13 @@ def fetch_article(url: str, category_hint: str = "", rate_limit: float = 2.0) ->
         print(f"  Failed to fetch {url}: {e}")
         return None
 
+    spider_content = None
+    if source_config is not None:
+        # Before noise removal below: the spiders only strip inside the content
+        spider_content = extract_content(
+            Selector(text=response.text), source_config.get("selectors", {})
+        )
+
     soup = BeautifulSoup(response.text, "html.parser")
 
     # Remove noise elements
@@ -85,13 +103,16 @@ def fetch_article(url: str, category_hint: str = "", rate_limit: float = 2.0) ->
     # Extract content
     content_html = ""
     content_text = ""
-    for sel in CONTENT_SELECTORS:
-        el = soup.select_one(sel)
-        if el:
-            content_html = str(el)
-            content_text = el.get_text(separator="\n", strip=True)
-            if len(content_text) >= 100:
-                break
+    if spider_content is not None:
+        content_html, content_text = spider_content
+    else:
+        for sel in CONTENT_SELECTORS:
+            el = soup.select_one(sel)
+            if el:
+                content_html = str(el)
+                content_text = el.get_text(separator="\n", strip=True)
+                if len(content_text) >= 100:
+                    break
 
     if len(content_text) < 100:
         print(f"  Content too short for {url} ({len(content_text)} chars)")
@@ -132,7 +153,7 @@ def fetch_article(url: str, category_hint: str = "", rate_limit: float = 2.0) ->
 
     item = RawArticleItem(
         source_url=url,
-        source_name="direct-url",
+        source_name=source_config.get("name", "direct-url") if source_config else "direct-url",
         raw_title=title,
         raw_content_html=content_html,
         raw_content_text=content_text,
@@ -172,7 +193,7 @@ def fetch_urls(urls: list[str], category_hint: str = "", rate_limit: float = 2.0
 
             out_path = RAW_DIR / filename
             out_path.write_text(json.dumps(data, indent=2, ensure_ascii=False))
-            mark_seen(url, "direct-url")
+            mark_seen(url, "direct-url", content_hash(item.raw_content_text))
             print(f"    -> Saved: {filename}")
             count += 1
 
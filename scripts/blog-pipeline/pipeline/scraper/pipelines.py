@@ -5,7 +5,7 @@ import hashlib
 from pathlib import Path
 
 from pipeline.settings import RAW_DIR, ensure_dirs
-from pipeline.storage.dedup_store import mark_seen
+from pipeline.storage.dedup_store import content_hash, mark_seen
 
 
 class SaveRawArticlePipeline:
@@ -32,7 +32,11 @@ class SaveRawArticlePipeline:
         out_path = RAW_DIR / filename
         out_path.write_text(json.dumps(data, indent=2, ensure_ascii=False))
 
-        mark_seen(url, data.get("source_name", "unknown"))
+        mark_seen(
+            url,
+            data.get("source_name", "unknown"),
+            content_hash(data.get("raw_content_text", "")),
+        )
         spider.logger.info(f"Saved raw article: {filename}")
 
         return item
@@ -0,0 +1,140 @@
+"""Cheap local quality checks for raw articles before they reach the LLM.
+
+Each check looks at the scraped text/HTML only (no network, no model) and
+returns a short reason when the article is not worth two LLM calls:
+- too_short: fewer than MIN_WORDS words
+- not_english: too few common English function words
+- link_dump: most of the text sits inside links (listicles, nav menus)
+- repetitive: the same lines or phrases repeated (templated stubs)
+- paywall / cookie_banner: text dominated by subscribe/consent boilerplate
+- unreadable: sentences far too long or too short to be prose
+- off_topic: no health/wellness vocabulary from categories.yaml
+
+Checks run per file so a process pool can fan them out over data/raw/.
+"""
+from __future__ import annotations
+
+import html
+import json
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+import yaml
+
+from pipeline.settings import CONFIG_DIR
+
+MIN_WORDS = 250
+MIN_ENGLISH_RATIO = 0.2
+MAX_LINK_TEXT_RATIO = 0.5
+MAX_REPEATED_TRIGRAM_RATIO = 0.35
+MAX_DUPLICATE_LINE_RATIO = 0.3
+SENTENCE_WORDS = (6, 45)
+MIN_TOPIC_HITS = 5
+
+_ENGLISH_WORDS = set(
+    """a the of and to in is that for it as with was on be by this are or from at an
+    not have has but can your you they which their more will one all also about these
+    we if so than there when how what may into some other its our been who most such
+    only after before through many should them those do does""".split()
+)
+_PAYWALL_RE = re.compile(
+    r"subscribe to (continue|read)|subscribers only|to continue reading|"
+    r"already a subscriber|create a free account|sign in to read|premium article",
+    re.IGNORECASE,
+)
+# Consent phrases only: recipes and nutrition posts mention cookies too
+_COOKIE_RE = re.compile(
+    r"accept (?:all )?cookies|(?:we|this (?:site|website)) uses? cookies|"
+    r"cookies? (?:policy|settings|preferences|consent)|consent (?:preferences|settings)|"
+    r"privacy (?:policy|settings)|manage (?:preferences|settings)|accept all",
+    re.IGNORECASE,
+)
+_LINK_RE = re.compile(r"<a\b[^>]*>(.*?)</a>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"[a-z']+")
+_SENTENCE_RE = re.compile(r"[.!?]+\s")
+
+# Health and wellness vocabulary, extended with the words in categories.yaml
+_TOPIC_WORDS = set(
+    """health healthy wellness wellbeing body mind diet food nutrition nutrient vitamin
+    mineral protein fibre fiber sugar fat digestion gut immune immunity infection cold cough
+    fever flu sleep stress anxiety mood exercise yoga meditation breathing breath ayurveda
+    ayurvedic herb herbs herbal remedy remedies tea ginger turmeric tulsi honey skin hair
+    weight heart blood pressure lungs nasal sinus congestion throat pain inflammation
+    symptoms doctor treatment disease risk study research benefits calories meal""".split()
+)
+
+
+@lru_cache(maxsize=1)
+def topic_vocabulary() -> frozenset[str]:
+    words = set(_TOPIC_WORDS)
+    path = CONFIG_DIR / "categories.yaml"
+    if path.exists():
+        mappings = (yaml.safe_load(path.read_text()) or {}).get("mappings", {})
+        for key, name in mappings.items():
+            words.update(_WORD_RE.findall(f"{key} {name}".lower().replace("-", " ")))
+    return frozenset(words)
+
+
+def _visible_text(content_html: str) -> str:
+    return html.unescape(_TAG_RE.sub(" ", content_html))
+
+
+def assess(raw: dict) -> list[str]:
+    """Reasons to reject a raw article (empty list = worth rewriting)."""
+    text = raw.get("raw_content_text", "") or _visible_text(raw.get("raw_content_html", ""))
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < MIN_WORDS:
+        return [f"too_short ({len(words)} words)"]
+
+    reasons = []
+    english = sum(1 for w in words if w in _ENGLISH_WORDS) / len(words)
+    if english < MIN_ENGLISH_RATIO:
+        reasons.append(f"not_english ({english:.0%} common English words)")
+
+    content_html = raw.get("raw_content_html", "")
+    if content_html:
+        link_chars = sum(len(_visible_text(m).strip()) for m in _LINK_RE.findall(content_html))
+        total_chars = len(" ".join(_visible_text(content_html).split())) or 1
+        if link_chars / total_chars > MAX_LINK_TEXT_RATIO:
+            reasons.append(f"link_dump ({link_chars / total_chars:.0%} of text in links)")
+
+    lines = [line.strip().lower() for line in text.splitlines() if len(line.strip()) > 20]
+    if lines:
+        duplicate_lines = 1 - len(set(lines)) / len(lines)
+        if duplicate_lines > MAX_DUPLICATE_LINE_RATIO:
+            reasons.append(f"repetitive ({duplicate_lines:.0%} duplicate lines)")
+    trigrams = Counter(zip(words, words[1:], words[2:]))
+    repeated = sum(n for n in trigrams.values() if n > 2) / max(1, len(words) - 2)
+    if repeated > MAX_REPEATED_TRIGRAM_RATIO:
+        reasons.append(f"repetitive ({repeated:.0%} repeated phrases)")
+
+    paywall_hits = len(_PAYWALL_RE.findall(text))
+    if paywall_hits and len(words) < MIN_WORDS * 2:
+        reasons.append("paywall")
+    cookie_hits = len(_COOKIE_RE.findall(text))
+    if cookie_hits * 40 > len(words):
+        reasons.append(f"cookie_banner ({cookie_hits} consent phrases)")
+
+    sentences = [s for s in _SENTENCE_RE.split(text) if s.strip()]
+    words_per_sentence = len(words) / max(1, len(sentences))
+    if not SENTENCE_WORDS[0] <= words_per_sentence <= SENTENCE_WORDS[1]:
+        reasons.append(f"unreadable ({words_per_sentence:.0f} words per sentence)")
+
+    vocabulary = topic_vocabulary()
+    title_words = _WORD_RE.findall(raw.get("raw_title", "").lower())
+    topic_hits = sum(1 for w in words + title_words if w in vocabulary)
+    if topic_hits < MIN_TOPIC_HITS:
+        reasons.append(f"off_topic ({topic_hits} health terms)")
+    return reasons
+
+
+def assess_file(path: Path) -> tuple[Path, list[str], str]:
+    """(path, reasons, source_url) for one raw JSON file; picklable for process pools."""
+    try:
+        raw = json.loads(Path(path).read_text())
+    except (OSError, json.JSONDecodeError) as e:
+        return path, [f"unreadable_file ({e.__class__.__name__})"], ""
+    return path, assess(raw), raw.get("source_url", "")
@@ -87,18 +87,7 @@ class BaseArticleSpider(scrapy.Spider):
             self.logger.warning(f"No title found for {response.url}, skipping")
             return
 
-        # Extract content HTML and text
-        content_html = ""
-        content_text = ""
-        content_selector = sel.get("content", "article")
-        content_elements = response.css(content_selector).getall()
-        if content_elements:
-            content_html = "\n".join(content_elements)
-            soup = BeautifulSoup(content_html, "html.parser")
-            # Remove script and style tags
-            for tag in soup(["script", "style", "nav", "footer", "header"]):
-                tag.decompose()
-            content_text = soup.get_text(separator="\n", strip=True)
+        content_html, content_text = extract_content(response, sel)
 
         if not content_text or len(content_text) < 100:
             self.logger.warning(f"Content too short for {response.url}, skipping")
@@ -145,6 +134,23 @@ class BaseArticleSpider(scrapy.Spider):
         return text.strip() if text else ""
 
 
+def extract_content(page, selectors: dict) -> tuple[str, str]:
+    """(content HTML, content text) of a page using a source's ``content`` selector.
+
+    ``page`` is a Scrapy response or ``scrapy.Selector``. ``refresh`` uses
+    this too, so re-fetched text hashes the same as the scraped text.
+    """
+    content_elements = page.css(selectors.get("content", "article")).getall()
+    if not content_elements:
+        return "", ""
+    content_html = "\n".join(content_elements)
+    soup = BeautifulSoup(content_html, "html.parser")
+    # Remove script and style tags
+    for tag in soup(["script", "style", "nav", "footer", "header"]):
+        tag.decompose()
+    return content_html, soup.get_text(separator="\n", strip=True)
+
+
 def load_sources(source_name: str | None = None) -> list[dict]:
     """Load source configs from sources.yaml."""
     sources_path = CONFIG_DIR / "sources.yaml"
@@ -4,9 +4,9 @@ from urllib.parse import urljoin
 
 import scrapy
 from scrapy.spiders import SitemapSpider as ScrapySitemapSpider
-from bs4 import BeautifulSoup
 
 from pipeline.scraper.items import RawArticleItem
+from pipeline.scraper.spiders.base_spider import extract_content
 from pipeline.storage.dedup_store import is_seen
 
 
@@ -57,16 +57,7 @@ class SitemapArticleSpider(ScrapySitemapSpider):
         if not title:
             return
 
-        content_html = ""
-        content_text = ""
-        content_selector = sel.get("content", "article")
-        content_elements = response.css(content_selector).getall()
-        if content_elements:
-            content_html = "\n".join(content_elements)
-            soup = BeautifulSoup(content_html, "html.parser")
-            for tag in soup(["script", "style", "nav", "footer", "header"]):
-                tag.decompose()
-            content_text = soup.get_text(separator="\n", strip=True)
+        content_html, content_text = extract_content(response, sel)
 
         if not content_text or len(content_text) < 100:
             return
@@ -9,6 +9,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 RAW_DIR = DATA_DIR / "raw"
 REWRITTEN_DIR = DATA_DIR / "rewritten"
+CHECKPOINT_DIR = DATA_DIR / "checkpoints"
 CONFIG_DIR = BASE_DIR / "config"
 
 
@@ -23,9 +24,40 @@ class Settings(BaseSettings):
 
     # LLM - Ollama
     ollama_base_url: str = "http://localhost:11434"
+    ollama_keep_alive: str = "30m"  # keep the model loaded between requests
+    ollama_num_ctx: int = 0  # fixed context size (changing it reloads the model; 0 = model default)
 
     # LLM - Claude
     anthropic_api_key: str = ""
+    anthropic_input_usd_per_mtok: float = 3.0  # also used to price cli-agent runs
+    anthropic_output_usd_per_mtok: float = 15.0
+
+    # LLM - CLI agent (warm process pool, claude CLI only)
+    cli_agent_pool: bool = True
+    cli_agent_session_reuse: int = 1  # prompts served per process before respawn
+
+    # LLM call scheduling (retries, backoff, per-provider token budgets; 0 = unlimited)
+    llm_max_retries: int = 5
+    llm_max_timeout_retries: int = 1  # each timeout already waited the full call timeout
+    llm_backoff_base: float = 2.0
+    llm_backoff_max: float = 120.0
+    ollama_tokens_per_minute: int = 0
+    anthropic_tokens_per_minute: int = 0
+    cli_agent_tokens_per_minute: int = 0
+
+    # LLM - router (several providers in one run)
+    router_hedge: bool = True  # duplicate calls that run past a provider's p95
+
+    # LLM - mock (offline provider for tests and benchmarks)
+    mock_latency_ms: float = 800.0
+    mock_latency_sigma: float = 0.5
+    mock_error_rate: float = 0.0
+    mock_output_tokens: int = 1200
+
+    # Featured images (publish --images)
+    image_store: str = "supabase"  # "supabase" (Storage bucket) or "local" (data/images/)
+    image_bucket: str = "blog-images"  # public bucket
+    image_base_url: str = ""  # public URL serving data/images/ (required with image_store=local)
 
     # Pipeline defaults
     pipeline_default_author_id: str = ""
@@ -44,5 +76,5 @@ def get_settings() -> Settings:
 
 def ensure_dirs() -> None:
     """Create data directories if they don't exist."""
-    for d in (DATA_DIR, RAW_DIR, REWRITTEN_DIR):
+    for d in (DATA_DIR, RAW_DIR, REWRITTEN_DIR, CHECKPOINT_DIR):
         d.mkdir(parents=True, exist_ok=True)
@@ -1,5 +1,11 @@
-"""SQLite-based URL deduplication tracker."""
+"""SQLite-based URL deduplication tracker and publish journal.
 
+Journal states: ``pending`` (insert sent, outcome unknown), ``inserted``
+(post row exists, tag links not confirmed) and ``done``.
+"""
+from __future__ import annotations
+
+import hashlib
 import sqlite3
 from datetime import datetime, timezone
 from pathlib import Path
@@ -12,7 +18,7 @@ DB_PATH = DATA_DIR / "dedup.sqlite"
 
 def _get_conn() -> sqlite3.Connection:
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(DB_PATH))
+    conn = sqlite3.connect(str(DB_PATH), timeout=30)
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS seen_urls (
@@ -23,10 +29,46 @@ def _get_conn() -> sqlite3.Connection:
         )
         """
     )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rejected_articles (
+            file TEXT PRIMARY KEY,
+            url TEXT,
+            reasons TEXT,
+            rejected_at TEXT
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS publish_journal (
+            key TEXT PRIMARY KEY,
+            file TEXT,
+            slug TEXT,
+            title TEXT,
+            post_id TEXT,
+            state TEXT,
+            updated_at TEXT
+        )
+        """
+    )
+    # Databases created before content hashes were stored
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(seen_urls)")}
+    if "content_hash" not in columns:
+        conn.execute("ALTER TABLE seen_urls ADD COLUMN content_hash TEXT")
+    # Journals created before titles were stored
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(publish_journal)")}
+    if "title" not in columns:
+        conn.execute("ALTER TABLE publish_journal ADD COLUMN title TEXT")
     conn.commit()
     return conn
 
 
+def content_hash(text: str) -> str:
+    """Hash of an article's text, ignoring whitespace changes."""
+    return hashlib.sha256(" ".join(text.split()).encode()).hexdigest()
+
+
 def is_seen(url: str) -> bool:
     """Check if a URL has already been scraped."""
     conn = _get_conn()
@@ -37,19 +79,50 @@ def is_seen(url: str) -> bool:
         conn.close()
 
 
-def mark_seen(url: str, source: str) -> None:
-    """Record a URL as scraped."""
+def mark_seen(url: str, source: str, text_hash: str | None = None) -> None:
+    """Record a URL as scraped, with the hash of its text (see ``content_hash``)."""
     conn = _get_conn()
     try:
         conn.execute(
-            "INSERT OR IGNORE INTO seen_urls (url, source, scraped_at) VALUES (?, ?, ?)",
-            (url, source, datetime.now(timezone.utc).isoformat()),
+            "INSERT OR IGNORE INTO seen_urls (url, source, scraped_at, content_hash) "
+            "VALUES (?, ?, ?, ?)",
+            (url, source, datetime.now(timezone.utc).isoformat(), text_hash),
         )
         conn.commit()
     finally:
         conn.close()
 
 
+def set_content_hash(url: str, text_hash: str, source: str | None = None) -> None:
+    """Store the hash of the source text a published post is now based on.
+
+    ``source`` replaces the stored source name when the hash now comes
+    from another extractor (see ``refresh``).
+    """
+    conn = _get_conn()
+    try:
+        conn.execute(
+            "UPDATE seen_urls SET content_hash = ?, scraped_at = ?, source = COALESCE(?, source) "
+            "WHERE url = ?",
+            (text_hash, datetime.now(timezone.utc).isoformat(), source, url),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_published_sources() -> dict[str, tuple[str, str | None]]:
+    """url -> (source name, content hash) of every published source URL."""
+    conn = _get_conn()
+    try:
+        rows = conn.execute(
+            "SELECT url, source, content_hash FROM seen_urls WHERE published = TRUE"
+        ).fetchall()
+        return {url: (source, text_hash) for url, source, text_hash in rows}
+    finally:
+        conn.close()
+
+
 def mark_published(url: str) -> None:
     """Mark a URL as published to Supabase."""
     conn = _get_conn()
@@ -60,6 +133,131 @@ def mark_published(url: str) -> None:
         conn.close()
 
 
+def mark_rejected(rejections: list[tuple[str, str, list[str]]]) -> None:
+    """Record raw files rejected by the quality gate as (file, url, reasons)."""
+    if not rejections:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    conn = _get_conn()
+    try:
+        conn.executemany(
+            "INSERT OR REPLACE INTO rejected_articles (file, url, reasons, rejected_at) "
+            "VALUES (?, ?, ?, ?)",
+            [(file, url, "; ".join(reasons), now) for file, url, reasons in rejections],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_rejection_reasons() -> dict[str, int]:
+    """Count of rejected articles per reason (e.g. "too_short")."""
+    conn = _get_conn()
+    try:
+        counts: dict[str, int] = {}
+        for (reasons,) in conn.execute("SELECT reasons FROM rejected_articles"):
+            for reason in reasons.split("; "):
+                kind = reason.split(" ", 1)[0]
+                counts[kind] = counts.get(kind, 0) + 1
+        return dict(sorted(counts.items(), key=lambda kv: -kv[1]))
+    finally:
+        conn.close()
+
+
+def journal_key(article: dict) -> str:
+    """Identity of an article in the publish journal: its source URL, else a content hash."""
+    if article.get("source_url"):
+        return article["source_url"]
+    digest = hashlib.sha256(
+        f"{article.get('title', '')}\n{article.get('content_html', '')}".encode()
+    ).hexdigest()
+    return f"sha256:{digest[:32]}"
+
+
+def get_journal(keys: list[str]) -> dict[str, dict]:
+    """Journal entries (file, slug, post_id, state) for ``keys``."""
+    if not keys:
+        return {}
+    conn = _get_conn()
+    try:
+        entries = {}
+        keys = list(keys)
+        for i in range(0, len(keys), 500):
+            chunk = keys[i : i + 500]
+            rows = conn.execute(
+                "SELECT key, file, slug, post_id, state FROM publish_journal "
+                f"WHERE key IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            for key, file, slug, post_id, state in rows:
+                entries[key] = {"file": file, "slug": slug, "post_id": post_id, "state": state}
+        return entries
+    finally:
+        conn.close()
+
+
+def journal_begin(entries: list[tuple[str, str, str, str]]) -> None:
+    """Record the intent to insert (key, file, slug, title) before the Supabase insert."""
+    now = datetime.now(timezone.utc).isoformat()
+    conn = _get_conn()
+    try:
+        conn.executemany(
+            "INSERT OR REPLACE INTO publish_journal "
+            "(key, file, slug, title, post_id, state, updated_at) "
+            "VALUES (?, ?, ?, ?, NULL, 'pending', ?)",
+            [(key, file, slug, title, now) for key, file, slug, title in entries],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _journal_set(entries: list[tuple[str, str, str]], state: str) -> None:
+    now = datetime.now(timezone.utc).isoformat()
+    conn = _get_conn()
+    try:
+        conn.executemany(
+            "UPDATE publish_journal SET slug = ?, post_id = ?, state = ?, updated_at = ? "
+            "WHERE key = ?",
+            [(slug, post_id, state, now, key) for key, slug, post_id in entries],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def journal_inserted(entries: list[tuple[str, str, str]]) -> None:
+    """Record (key, slug, post_id) of posts inserted whose tags are not linked yet."""
+    _journal_set(entries, "inserted")
+
+
+def journal_done(entries: list[tuple[str, str, str]]) -> None:
+    """Record (key, slug, post_id) of posts that are in blog_posts with their tags."""
+    _journal_set(entries, "done")
+
+
+def journal_forget(keys: list[str]) -> None:
+    """Drop journal entries whose insert never reached Supabase."""
+    conn = _get_conn()
+    try:
+        conn.executemany("DELETE FROM publish_journal WHERE key = ?", [(k,) for k in keys])
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_pending_journal() -> dict[str, tuple[str, str]]:
+    """key -> (slug, title) of inserts that were started but never confirmed."""
+    conn = _get_conn()
+    try:
+        rows = conn.execute(
+            "SELECT key, slug, title FROM publish_journal WHERE state = 'pending'"
+        ).fetchall()
+        return {key: (slug, title) for key, slug, title in rows}
+    finally:
+        conn.close()
+
+
 def get_stats() -> dict:
     """Return dedup stats."""
     conn = _get_conn()
@@ -68,6 +266,16 @@ def get_stats() -> dict:
         published = conn.execute(
             "SELECT COUNT(*) FROM seen_urls WHERE published = TRUE"
         ).fetchone()[0]
-        return {"total_scraped": total, "published": published, "pending": total - published}
+        rejected = conn.execute("SELECT COUNT(*) FROM rejected_articles").fetchone()[0]
+        unconfirmed = conn.execute(
+            "SELECT COUNT(*) FROM publish_journal WHERE state != 'done'"
+        ).fetchone()[0]
+        return {
+            "total_scraped": total,
+            "published": published,
+            "pending": total - published,
+            "rejected": rejected,
+            "unconfirmed_publishes": unconfirmed,
+        }
     finally:
         conn.close()
@@ -0,0 +1,68 @@
+"""SQLite cache of link check results, so a URL is checked once per TTL."""
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from pipeline.settings import DATA_DIR
+
+
+DB_PATH = DATA_DIR / "link_cache.sqlite"
+
+
+def _get_conn() -> sqlite3.Connection:
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(DB_PATH), timeout=30)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS link_checks (
+            url TEXT PRIMARY KEY,
+            ok BOOLEAN,
+            status INTEGER,
+            error TEXT,
+            checked_at TEXT
+        )
+        """
+    )
+    conn.commit()
+    return conn
+
+
+def get_fresh(urls: list[str], ttl_hours: float) -> dict[str, tuple[bool, int | None, str]]:
+    """url -> (ok, status, error) for ``urls`` checked within ``ttl_hours``."""
+    if not urls:
+        return {}
+    since = (datetime.now(timezone.utc) - timedelta(hours=ttl_hours)).isoformat()
+    conn = _get_conn()
+    try:
+        results = {}
+        urls = list(urls)
+        for i in range(0, len(urls), 500):
+            chunk = urls[i : i + 500]
+            rows = conn.execute(
+                "SELECT url, ok, status, error FROM link_checks "
+                f"WHERE checked_at >= ? AND url IN ({', '.join('?' * len(chunk))})",
+                [since, *chunk],
+            ).fetchall()
+            for url, ok, status, error in rows:
+                results[url] = (bool(ok), status, error or "")
+        return results
+    finally:
+        conn.close()
+
+
+def store(results: dict[str, tuple[bool, int | None, str]]) -> None:
+    """Save check results (url -> (ok, status, error))."""
+    if not results:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    conn = _get_conn()
+    try:
+        conn.executemany(
+            "INSERT OR REPLACE INTO link_checks (url, ok, status, error, checked_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(url, ok, status, error, now) for url, (ok, status, error) in results.items()],
+        )
+        conn.commit()
+    finally:
+        conn.close()
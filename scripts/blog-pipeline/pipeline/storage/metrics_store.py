@@ -0,0 +1,177 @@
+"""SQLite store for LLM usage records and published posts.
+
+One connection per process is opened on first use (the schema is created
+then) and shared by every thread under a lock, since a rewrite records a
+row per LLM call.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from pipeline.settings import DATA_DIR
+
+
+DB_PATH = DATA_DIR / "metrics.sqlite"
+
+_conn: sqlite3.Connection | None = None
+_conn_path: Path | None = None
+_lock = threading.RLock()
+
+
+def _get_conn() -> sqlite3.Connection:
+    """The shared connection; callers hold ``_lock`` while using it."""
+    global _conn, _conn_path
+    if _conn is not None and _conn_path == DB_PATH:
+        return _conn
+    if _conn is not None:
+        _conn.close()
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(DB_PATH), timeout=30, check_same_thread=False)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS llm_usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at TEXT,
+            provider TEXT,
+            model TEXT,
+            step TEXT,
+            article TEXT,
+            input_tokens INTEGER,
+            output_tokens INTEGER,
+            latency_s REAL,
+            cost_usd REAL,
+            ok BOOLEAN
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS published_posts (
+            slug TEXT PRIMARY KEY,
+            article TEXT,
+            published_at TEXT
+        )
+        """
+    )
+    conn.commit()
+    _conn, _conn_path = conn, DB_PATH
+    return conn
+
+
+def record_usage(
+    provider: str,
+    model: str,
+    step: str,
+    article: str,
+    input_tokens: int,
+    output_tokens: int,
+    latency_s: float,
+    cost_usd: float,
+    ok: bool = True,
+) -> None:
+    """Store one LLM call."""
+    with _lock:
+        conn = _get_conn()
+        conn.execute(
+            "INSERT INTO llm_usage (created_at, provider, model, step, article, input_tokens, "
+            "output_tokens, latency_s, cost_usd, ok) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                datetime.now(timezone.utc).isoformat(),
+                provider,
+                model,
+                step,
+                article,
+                input_tokens,
+                output_tokens,
+                latency_s,
+                cost_usd,
+                ok,
+            ),
+        )
+        conn.commit()
+
+
+def usage_since(since: str) -> tuple[int, float]:
+    """(tokens, cost) of the calls recorded at or after the ISO timestamp ``since``."""
+    with _lock:
+        tokens, cost = _get_conn().execute(
+            "SELECT SUM(input_tokens + output_tokens), SUM(cost_usd) FROM llm_usage "
+            "WHERE created_at >= ?",
+            (since,),
+        ).fetchone()
+    return tokens or 0, cost or 0.0
+
+
+def record_published(slugs: list[str], articles: list[str] | None = None) -> None:
+    """Store posts pushed to Supabase (the denominator of cost per post)."""
+    if not slugs:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    articles = articles or [""] * len(slugs)
+    with _lock:
+        conn = _get_conn()
+        conn.executemany(
+            "INSERT OR REPLACE INTO published_posts (slug, article, published_at) VALUES (?, ?, ?)",
+            [(slug, article, now) for slug, article in zip(slugs, articles)],
+        )
+        conn.commit()
+
+
+def published_count(since: str) -> int:
+    """Posts recorded as published at or after the ISO timestamp ``since``."""
+    with _lock:
+        return _get_conn().execute(
+            "SELECT COUNT(*) FROM published_posts WHERE published_at >= ?", (since,)
+        ).fetchone()[0]
+
+
+def usage_report(days: int = 30, group_by: str = "day") -> tuple[list[dict], int]:
+    """Usage per day or per provider/model over the last ``days`` days.
+
+    Returns the rows and the number of posts published in that window.
+    Rows have calls, failures, tokens, latency, output tokens/sec, cost,
+    articles rewritten and cost per post. Cost per post is always the
+    row's cost divided by the posts published in the whole window, in
+    both views, so the rows add up to the window's cost per post.
+    """
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    key = "substr(created_at, 1, 10)" if group_by == "day" else "provider || ' ' || model"
+    with _lock:
+        rows = _get_conn().execute(
+            f"""
+            SELECT {key} AS grp,
+                   COUNT(*),
+                   SUM(CASE WHEN ok THEN 0 ELSE 1 END),
+                   SUM(input_tokens),
+                   SUM(output_tokens),
+                   SUM(latency_s),
+                   SUM(cost_usd),
+                   COUNT(DISTINCT article)
+            FROM llm_usage
+            WHERE created_at >= ?
+            GROUP BY grp
+            ORDER BY grp
+            """,
+            (since,),
+        ).fetchall()
+    published = published_count(since)
+
+    report = []
+    for grp, calls, failed, tokens_in, tokens_out, latency, cost, articles in rows:
+        report.append(
+            {
+                "group": grp,
+                "calls": calls,
+                "failed": failed,
+                "input_tokens": tokens_in or 0,
+                "output_tokens": tokens_out or 0,
+                "avg_latency_s": (latency or 0) / calls,
+                "tokens_per_s": (tokens_out or 0) / latency if latency else 0.0,
+                "cost_usd": cost or 0.0,
+                "articles": articles,
+                "cost_per_post": (cost or 0.0) / published if published else None,
+            }
+        )
+    return report, published
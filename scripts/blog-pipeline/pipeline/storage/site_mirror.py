@@ -0,0 +1,287 @@
+"""Local SQLite mirror of the blog tables in Supabase.
+
+Keeps id, slug, title, status, category and tag ids of every blog_posts
+row, plus blog_categories and blog_tags, in data/site_mirror.sqlite.
+``sync()`` only fetches rows changed since the last sync (updated_at, or
+created_at for tags, as watermark); ``sync(full=True)`` rebuilds the
+mirror, which also drops rows deleted on the site. Lookups then run
+locally instead of one Supabase query per item.
+
+Between full syncs the mirror can be stale: categories, tags and posts
+deleted on the site stay in it, and a post's tag ids only change when its
+``updated_at`` does (editing blog_post_tags does not bump it). Nothing
+writes with a post's mirrored tag ids; category and tag ids that turn out
+to be gone are looked up again in Supabase (see PublisherSession) and
+corrected here with ``store_ids()``.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+
+from supabase import Client
+
+from pipeline.settings import DATA_DIR
+
+
+DB_PATH = DATA_DIR / "site_mirror.sqlite"
+# PostgREST returns at most this many rows per request
+PAGE_SIZE = 1000
+
+# table -> (columns to fetch, watermark column)
+_TABLES = {
+    "blog_posts": (
+        "id, slug, title, status, category_id, updated_at, blog_post_tags(tag_id)",
+        "updated_at",
+    ),
+    "blog_categories": ("id, name, slug, updated_at", "updated_at"),
+    "blog_tags": ("id, name, slug, created_at", "created_at"),
+}
+
+
+def _get_conn() -> sqlite3.Connection:
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(DB_PATH), timeout=30)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS posts (
+            id TEXT PRIMARY KEY,
+            slug TEXT UNIQUE,
+            title TEXT,
+            status TEXT,
+            category_id TEXT,
+            tag_ids TEXT,
+            updated_at TEXT
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS categories (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            slug TEXT UNIQUE
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tags (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            slug TEXT UNIQUE
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sync_state (
+            source TEXT PRIMARY KEY,
+            watermark TEXT
+        )
+        """
+    )
+    conn.commit()
+    return conn
+
+
+def _fetch_since(table: str, supabase: Client, watermark: str | None) -> list[dict]:
+    columns, column = _TABLES[table]
+    rows: list[dict] = []
+    start = 0
+    while True:
+        query = supabase.table(table).select(columns)
+        if watermark:
+            query = query.gte(column, watermark)
+        # Many rows share a timestamp; order by id too so offset pages never skip or repeat
+        result = query.order(column).order("id").range(start, start + PAGE_SIZE - 1).execute()
+        page = result.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+def sync(supabase: Client, full: bool = False) -> dict[str, int]:
+    """Bring the mirror up to date; returns rows fetched per table."""
+    conn = _get_conn()
+    try:
+        if full:
+            for local in ("posts", "categories", "tags", "sync_state"):
+                conn.execute(f"DELETE FROM {local}")
+        watermarks = dict(conn.execute("SELECT source, watermark FROM sync_state").fetchall())
+        fetched = {}
+        for table, (_, column) in _TABLES.items():
+            # gte, not gt: rows sharing the watermark timestamp are fetched again (upserted)
+            rows = _fetch_since(table, supabase, watermarks.get(table))
+            fetched[table] = len(rows)
+            if table == "blog_posts":
+                # A slug can move to another post; the newer row wins
+                conn.executemany(
+                    "DELETE FROM posts WHERE slug = ? AND id != ?",
+                    [(row["slug"], row["id"]) for row in rows],
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO posts (id, slug, title, status, category_id, tag_ids, "
+                    "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            row["id"],
+                            row["slug"],
+                            row.get("title", ""),
+                            row.get("status", ""),
+                            row.get("category_id"),
+                            json.dumps([t["tag_id"] for t in row.get("blog_post_tags") or []]),
+                            row.get("updated_at"),
+                        )
+                        for row in rows
+                    ],
+                )
+            else:
+                local = "categories" if table == "blog_categories" else "tags"
+                conn.executemany(
+                    f"DELETE FROM {local} WHERE slug = ? AND id != ?",
+                    [(row["slug"], row["id"]) for row in rows],
+                )
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {local} (id, name, slug) VALUES (?, ?, ?)",
+                    [(row["id"], row.get("name", ""), row["slug"]) for row in rows],
+                )
+            marks = [row.get(column) for row in rows if row.get(column)]
+            if marks:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (source, watermark) VALUES (?, ?)",
+                    (table, max(marks)),
+                )
+        conn.commit()
+        return fetched
+    finally:
+        conn.close()
+
+
+def add_posts(posts: list[tuple[str, str, str]]) -> None:
+    """Record (id, slug, title) of posts this process just inserted."""
+    if not posts:
+        return
+    conn = _get_conn()
+    try:
+        conn.executemany("INSERT OR IGNORE INTO posts (id, slug, title) VALUES (?, ?, ?)", posts)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def taken_slugs(bases: list[str]) -> set[str]:
+    """Mirrored post slugs starting with one of ``bases``."""
+    bases = sorted(set(filter(None, bases)))
+    if not bases:
+        return set()
+    conn = _get_conn()
+    try:
+        taken: set[str] = set()
+        for base in bases:
+            # Range scan on the slug index instead of LIKE (no escaping of _ or %)
+            rows = conn.execute(
+                "SELECT slug FROM posts WHERE slug >= ? AND slug < ?", (base, base + "\uffff")
+            ).fetchall()
+            taken.update(slug for (slug,) in rows)
+        return taken
+    finally:
+        conn.close()
+
+
+def existing_slugs(slugs: list[str]) -> set[str]:
+    """Which of ``slugs`` are mirrored posts."""
+    slugs = sorted(set(slugs))
+    conn = _get_conn()
+    try:
+        found: set[str] = set()
+        for i in range(0, len(slugs), 500):
+            chunk = slugs[i : i + 500]
+            rows = conn.execute(
+                f"SELECT slug FROM posts WHERE slug IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            found.update(slug for (slug,) in rows)
+        return found
+    finally:
+        conn.close()
+
+
+def normalize_title(title: str) -> str:
+    """Case- and whitespace-insensitive form of a title, for duplicate checks."""
+    return " ".join(title.lower().split())
+
+
+def existing_titles(titles: list[str]) -> set[str]:
+    """Which of ``titles`` (normalized) are titles of mirrored posts."""
+    wanted = sorted({normalize_title(t) for t in titles} - {""})
+    conn = _get_conn()
+    try:
+        found: set[str] = set()
+        for i in range(0, len(wanted), 500):
+            chunk = wanted[i : i + 500]
+            rows = conn.execute(
+                f"SELECT title FROM posts WHERE lower(trim(title)) IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            found.update(normalize_title(title) for (title,) in rows)
+        return found
+    finally:
+        conn.close()
+
+
+def store_ids(table: str, rows: list[tuple[str, str, str]]) -> None:
+    """Record (id, name, slug) of blog_categories or blog_tags rows looked up in Supabase."""
+    if not rows:
+        return
+    local = "categories" if table == "blog_categories" else "tags"
+    conn = _get_conn()
+    try:
+        conn.executemany(
+            f"DELETE FROM {local} WHERE slug = ? AND id != ?", [(slug, id_) for id_, _, slug in rows]
+        )
+        conn.executemany(f"INSERT OR REPLACE INTO {local} (id, name, slug) VALUES (?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def slug_ids(table: str) -> dict[str, str]:
+    """slug -> id of mirrored blog_categories or blog_tags."""
+    local = "categories" if table == "blog_categories" else "tags"
+    conn = _get_conn()
+    try:
+        return dict(conn.execute(f"SELECT slug, id FROM {local}").fetchall())
+    finally:
+        conn.close()
+
+
+def category_post_counts() -> dict[str, int]:
+    """category slug -> number of mirrored posts in it."""
+    conn = _get_conn()
+    try:
+        return dict(
+            conn.execute(
+                "SELECT c.slug, COUNT(*) FROM posts p JOIN categories c ON c.id = p.category_id "
+                "GROUP BY c.slug"
+            ).fetchall()
+        )
+    finally:
+        conn.close()
+
+
+def get_stats() -> dict[str, int | str | None]:
+    """Row counts and the posts watermark."""
+    conn = _get_conn()
+    try:
+        stats = {
+            local: conn.execute(f"SELECT COUNT(*) FROM {local}").fetchone()[0]
+            for local in ("posts", "categories", "tags")
+        }
+        row = conn.execute(
+            "SELECT watermark FROM sync_state WHERE source = 'blog_posts'"
+        ).fetchone()
+        stats["synced_to"] = row[0] if row else None
+        return stats
+    finally:
+        conn.close()
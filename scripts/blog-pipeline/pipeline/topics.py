@@ -0,0 +1,72 @@
+"""Topics files and resumable progress for batch `pipeline write`.
+
+A topics file has one topic per line, optionally followed by ``| category``:
+
+    # Seed the immunity category
+    Monsoon immunity tips from Ayurveda | immunity
+    Steam inhalation for blocked nose | nasal_care
+    Daily routines for better sleep
+
+Blank lines and lines starting with ``#`` are ignored. Progress is kept in
+``data/write_progress.json`` (topic key -> slug and status) so an interrupted
+batch picks up where it stopped.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+from pipeline.settings import DATA_DIR
+
+PROGRESS_FILE = DATA_DIR / "write_progress.json"
+
+
+def topic_key(topic: str) -> str:
+    """Filename-safe key for a topic (also its checkpoint name)."""
+    s = topic.lower().strip()
+    s = re.sub(r"[^\w\s-]", "", s)
+    s = re.sub(r"[\s_-]+", "-", s)
+    return s.strip("-")[:60] or "topic"
+
+
+def read_topics_file(path: Path) -> list[tuple[str, str]]:
+    """Return ``(topic, category)`` pairs, dropping duplicates by topic key."""
+    topics: list[tuple[str, str]] = []
+    seen: set[str] = set()
+    for line in Path(path).read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        topic, _, category = line.partition("|")
+        topic, category = topic.strip(), category.strip()
+        if topic and topic_key(topic) not in seen:
+            seen.add(topic_key(topic))
+            topics.append((topic, category))
+    return topics
+
+
+class TopicProgress:
+    """Thread-safe record of finished topics, saved after every update."""
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or PROGRESS_FILE
+        self._lock = threading.Lock()
+        try:
+            self.entries: dict[str, dict] = json.loads(self.path.read_text())
+        except (OSError, json.JSONDecodeError):
+            self.entries = {}
+
+    def get(self, topic: str) -> dict:
+        return self.entries.get(topic_key(topic), {})
+
+    def mark(self, topic: str, slug: str, status: str) -> None:
+        """Record ``status`` ("written" or "published") for a topic."""
+        with self._lock:
+            self.entries[topic_key(topic)] = {"topic": topic, "slug": slug, "status": status}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.entries, indent=2, ensure_ascii=False))
+            os.replace(tmp, self.path)
@@ -0,0 +1,34 @@
+"""Shared fixtures: every test gets its own data directory and SQLite files."""
+from __future__ import annotations
+
+import pytest
+
+import pipeline.cli as cli
+from pipeline import topics
+from pipeline.rewriter import ranking
+from pipeline.storage import dedup_store, link_cache, metrics_store, site_mirror
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Point the stores and the CLI's data directories at ``tmp_path``."""
+    for store in (dedup_store, link_cache, metrics_store, site_mirror):
+        monkeypatch.setattr(store, "DB_PATH", tmp_path / f"{store.__name__.rsplit('.', 1)[-1]}.sqlite")
+    for name in ("RAW_DIR", "REWRITTEN_DIR", "CHECKPOINT_DIR"):
+        path = tmp_path / name.lower().removesuffix("_dir")
+        path.mkdir()
+        monkeypatch.setattr(cli, name, path)
+    monkeypatch.setattr(ranking, "REWRITTEN_DIR", tmp_path / "rewritten")
+    monkeypatch.setattr(topics, "PROGRESS_FILE", tmp_path / "write_progress.json")
+    return tmp_path
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    """A FakeSupabase returned by every ``_get_client`` call."""
+    from pipeline.publisher import supabase_client
+    from tests.fake_supabase import FakeSupabase
+
+    fake = FakeSupabase()
+    monkeypatch.setattr(supabase_client, "_get_client", lambda settings: fake)
+    return fake
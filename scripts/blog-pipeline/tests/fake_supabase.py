@@ -0,0 +1,165 @@
+"""In-memory stand-in for the parts of the Supabase client the pipeline uses."""
+from __future__ import annotations
+
+import re
+import uuid
+from types import SimpleNamespace
+
+
+class APIError(Exception):
+    """Mimics postgrest.APIError (``code`` and ``message``)."""
+
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class _Query:
+    def __init__(self, db: "FakeSupabase", table: str):
+        self.db = db
+        self.table = table
+        self.op = "select"
+        self.payload = None
+        self.filters = []
+        self.on_conflict = None
+        self.ignore_duplicates = False
+        self.window = None
+        self.ordering = []
+        self._negate = False
+
+    # Filters
+    def _filter(self, test) -> "_Query":
+        if self._negate:
+            self._negate = False
+            self.filters.append(lambda r: not test(r))
+        else:
+            self.filters.append(test)
+        return self
+
+    @property
+    def not_(self):
+        self._negate = True
+        return self
+
+    def select(self, columns: str = "*", count=None):
+        return self
+
+    def eq(self, column, value):
+        return self._filter(lambda r: r.get(column) == value)
+
+    def in_(self, column, values):
+        values = set(values)
+        return self._filter(lambda r: r.get(column) in values)
+
+    def like(self, column, pattern):
+        rx = re.compile("^" + re.escape(pattern).replace("%", ".*").replace("\\*", ".*") + "$")
+        return self._filter(lambda r: bool(rx.match(str(r.get(column, "")))))
+
+    def or_(self, expression):
+        patterns = []
+        for part in expression.split(","):
+            column, op, value = part.split(".", 2)
+            assert op == "like", op
+            patterns.append((column, re.compile("^" + re.escape(value).replace("\\*", ".*") + "$")))
+        return self._filter(lambda r: any(rx.match(str(r.get(c, ""))) for c, rx in patterns))
+
+    def gte(self, column, value):
+        return self._filter(lambda r: (r.get(column) or "") >= value)
+
+    def order(self, column, desc=False):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self.window = (0, n - 1)
+        return self
+
+    def range(self, start, end):
+        self.window = (start, end)
+        return self
+
+    # Writes
+    def insert(self, data):
+        self.op, self.payload = "insert", data
+        return self
+
+    def upsert(self, data, on_conflict=None, ignore_duplicates=False):
+        self.op, self.payload = "upsert", data
+        self.on_conflict, self.ignore_duplicates = on_conflict, ignore_duplicates
+        return self
+
+    def update(self, data):
+        self.op, self.payload = "update", data
+        return self
+
+    def delete(self):
+        self.op = "delete"
+        return self
+
+    def _matches(self, row) -> bool:
+        return all(f(row) for f in self.filters)
+
+    def execute(self):
+        self.db.calls.append((self.table, self.op))
+        hook = self.db.fail.get((self.table, self.op))
+        if hook is not None:
+            hook(self)
+        rows = self.db.tables.setdefault(self.table, [])
+        if self.op == "select":
+            out = [dict(r) for r in rows if self._matches(r)]
+            for column, desc in reversed(self.ordering):
+                out.sort(key=lambda r: r.get(column) or "", reverse=desc)
+            if self.window:
+                out = out[self.window[0] : self.window[1] + 1]
+            return SimpleNamespace(data=out)
+        if self.op == "update":
+            out = []
+            for row in rows:
+                if self._matches(row):
+                    row.update(self.payload)
+                    out.append(dict(row))
+            return SimpleNamespace(data=out)
+        if self.op == "delete":
+            self.db.tables[self.table] = [r for r in rows if not self._matches(r)]
+            return SimpleNamespace(data=[dict(r) for r in rows if self._matches(r)])
+
+        items = self.payload if isinstance(self.payload, list) else [self.payload]
+        out = []
+        for item in items:
+            if self.on_conflict:
+                keys = self.on_conflict.split(",")
+                existing = [r for r in rows if all(r.get(k) == item.get(k) for k in keys)]
+                if existing:
+                    if not self.ignore_duplicates:
+                        existing[0].update(item)
+                        out.append(dict(existing[0]))
+                    continue
+            for column in self.db.unique.get(self.table, ()):
+                if any(r.get(column) == item.get(column) for r in rows):
+                    raise APIError(
+                        "23505",
+                        f"duplicate key value violates unique constraint {self.table}_{column}_key",
+                    )
+            row = {"id": str(uuid.uuid4()), **item}
+            rows.append(row)
+            out.append(dict(row))
+        return SimpleNamespace(data=out)
+
+
+class FakeSupabase:
+    """Tables are lists of dicts; ``fail[(table, op)]`` hooks can raise."""
+
+    def __init__(self):
+        self.tables: dict[str, list[dict]] = {}
+        self.calls: list[tuple[str, str]] = []
+        self.unique = {"blog_posts": ["slug"], "blog_tags": ["slug"], "blog_categories": ["slug"]}
+        self.fail: dict[tuple[str, str], object] = {}
+        self.rpcs: dict[str, object] = {}
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    def rpc(self, name: str, params: dict):
+        self.calls.append(("rpc", name))
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=self.rpcs[name](self, params)))
@@ -0,0 +1,39 @@
+"""gate: only raw articles that have not been processed yet are judged."""
+from __future__ import annotations
+
+import json
+
+from click.testing import CliRunner
+
+import pipeline.cli as cli
+from pipeline.storage import dedup_store
+
+THIN = {"raw_title": "Thin", "raw_content_text": "Too short.", "raw_content_html": "<p>Too short.</p>"}
+
+
+def _raw(name: str, url: str):
+    path = cli.RAW_DIR / f"{name}.json"
+    path.write_text(json.dumps({**THIN, "source_url": url}))
+    return path
+
+
+def test_processed_raw_articles_are_not_rejected():
+    rewritten = _raw("rewritten", "https://example.com/a")
+    (cli.REWRITTEN_DIR / "rewritten.json").write_text("{}")
+    published = _raw("published", "https://example.com/b")
+    (cli.REWRITTEN_DIR / "done").mkdir()
+    (cli.REWRITTEN_DIR / "done" / "renamed.json").write_text(
+        json.dumps({"source_url": "https://example.com/b"})
+    )
+    marked = _raw("marked", "https://example.com/c")
+    dedup_store.mark_seen("https://example.com/c", "test")
+    dedup_store.mark_published("https://example.com/c")
+    fresh = _raw("fresh", "https://example.com/d")
+
+    result = CliRunner().invoke(cli.cli, ["gate", "-w", "1"])
+
+    assert result.exit_code == 0, result.output
+    assert rewritten.exists() and published.exists() and marked.exists()
+    assert not fresh.exists()
+    assert (cli.RAW_DIR / "rejected" / "fresh.json").exists()
+    assert dedup_store.get_stats()["rejected"] == 1
@@ -0,0 +1,73 @@
+"""Featured images: only publicly reachable URLs are published."""
+from __future__ import annotations
+
+import hashlib
+import json
+
+import pytest
+from click.testing import CliRunner
+
+import pipeline.cli as cli
+from pipeline.publisher import images
+from pipeline.settings import Settings
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def test_local_store_needs_a_public_base_url():
+    with pytest.raises(ValueError):
+        images.get_image_store(Settings(image_store="local", image_base_url=""))
+
+
+def test_publish_with_unusable_store_publishes_nothing(supabase, monkeypatch):
+    monkeypatch.setenv("IMAGE_STORE", "local")
+    monkeypatch.setenv("IMAGE_BASE_URL", "")
+    (cli.REWRITTEN_DIR / "a.json").write_text(
+        json.dumps({"title": "Ginger Tea", "featured_image": "https://src.example/a.png"})
+    )
+
+    result = CliRunner().invoke(cli.cli, ["publish", "--author-id", "a", "--images"])
+
+    assert "Image store not usable" in result.output
+    assert supabase.tables.get("blog_posts", []) == []
+    assert (cli.REWRITTEN_DIR / "a.json").exists()
+
+
+def test_local_store_urls_are_public(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "Image", None)
+    monkeypatch.setattr(
+        images,
+        "download_images",
+        lambda urls: {"https://src.example/a.png": PNG, "https://src.example/b.bin": b"%PDF-1.4"},
+    )
+    store = images.LocalImageStore("https://cdn.example.com/images", root=tmp_path / "images")
+    articles = [
+        {"featured_image": "https://src.example/a.png"},
+        {"featured_image": "https://src.example/b.bin"},
+    ]
+
+    replaced = images.optimise_featured_images(articles, store, processes=1)
+
+    assert articles[0]["featured_image"].startswith("https://cdn.example.com/images/blog/")
+    assert articles[0]["featured_image"].endswith("/original.png")
+    # Not a known image format: the original URL is kept
+    assert articles[1]["featured_image"] == "https://src.example/b.bin"
+    assert list(replaced) == ["https://src.example/a.png"]
+
+
+def test_partial_upload_from_an_earlier_run_is_uploaded_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "Image", None)
+    monkeypatch.setattr(images, "download_images", lambda urls: {url: PNG for url in urls})
+    store = images.LocalImageStore("https://cdn.example.com/images", root=tmp_path / "images")
+    folder = tmp_path / "images" / "blog" / hashlib.sha256(PNG).hexdigest()[:24]
+    folder.mkdir(parents=True)
+    (folder / "640.webp").write_bytes(b"partial")
+    uploads = []
+    upload = store.upload
+    monkeypatch.setattr(store, "upload", lambda *args: uploads.append(args[0]) or upload(*args))
+
+    images.optimise_featured_images([{"featured_image": "https://src.example/a.png"}], store, 1)
+    images.optimise_featured_images([{"featured_image": "https://src.example/b.png"}], store, 1)
+
+    # Uploaded once: the second run finds the featured variant
+    assert uploads == [f"blog/{folder.name}/original.png"]
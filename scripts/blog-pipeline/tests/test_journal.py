@@ -0,0 +1,145 @@
+"""Publish journal: reruns never duplicate posts, lose tags or skip unpublished articles."""
+from __future__ import annotations
+
+import json
+
+import httpx
+import pytest
+from click.testing import CliRunner
+
+import pipeline.cli as cli
+from pipeline.publisher.supabase_client import PublisherSession
+from pipeline.storage import dedup_store
+from tests.fake_supabase import APIError
+
+ARTICLE = {
+    "title": "Ginger Tea for Colds",
+    "slug": "ginger-tea-for-colds",
+    "content_html": "<p>Ginger tea.</p>",
+    "tags": ["Ginger", "Immunity"],
+    "category_hint": "",
+    "source_url": "https://example.com/ginger",
+}
+KEY = ARTICLE["source_url"]
+
+
+def _session(supabase) -> PublisherSession:
+    return PublisherSession(supabase=supabase, warm=True)
+
+
+def _save(article: dict = ARTICLE):
+    path = cli.REWRITTEN_DIR / "ginger.json"
+    path.write_text(json.dumps(article))
+    return path
+
+
+def _publish():
+    return CliRunner().invoke(cli.cli, ["publish", "--author-id", "author-1"])
+
+
+def _insert_then_time_out(supabase):
+    """The insert lands but the response is lost."""
+
+    def hook(query):
+        del supabase.fail[("blog_posts", "insert")]
+        query.execute()
+        raise httpx.ReadTimeout("timed out")
+
+    supabase.fail[("blog_posts", "insert")] = hook
+
+
+def test_publish_marks_done_after_tags(supabase):
+    slug = _session(supabase).publish(ARTICLE, author_id="a", journal_key=KEY, file="g.json")
+
+    entry = dedup_store.get_journal([KEY])[KEY]
+    assert entry["state"] == "done" and entry["slug"] == slug
+    assert len(supabase.tables["blog_post_tags"]) == 2
+
+
+def test_rejected_insert_is_forgotten(supabase):
+    supabase.tables["blog_posts"] = [{"id": "p0", "slug": "ginger-tea-for-colds", "title": "Other"}]
+
+    def conflict(query):
+        raise APIError("23505", "duplicate key value violates unique constraint")
+
+    supabase.fail[("blog_posts", "insert")] = conflict
+    with pytest.raises(APIError):
+        _session(supabase).publish(ARTICLE, author_id="a", journal_key=KEY, file="g.json")
+
+    # The slug belongs to another post: nothing may confirm this article
+    assert dedup_store.get_journal([KEY]) == {}
+
+
+def test_unknown_outcome_stays_pending_and_is_confirmed(supabase):
+    _insert_then_time_out(supabase)
+    with pytest.raises(httpx.ReadTimeout):
+        _session(supabase).publish(ARTICLE, author_id="a", journal_key=KEY, file="g.json")
+    assert dedup_store.get_journal([KEY])[KEY]["state"] == "pending"
+
+    path = _save()
+    result = _publish()
+
+    assert result.exit_code == 0, result.output
+    assert len(supabase.tables["blog_posts"]) == 1
+    assert len(supabase.tables["blog_post_tags"]) == 2
+    assert dedup_store.get_journal([KEY])[KEY]["state"] == "done"
+    assert not path.exists() and (cli.REWRITTEN_DIR / "done" / path.name).exists()
+
+
+def test_pending_slug_of_another_post_is_dropped(supabase):
+    dedup_store.journal_begin([(KEY, "ginger.json", "ginger-tea-for-colds", ARTICLE["title"])])
+    supabase.tables["blog_posts"] = [
+        {"id": "p0", "slug": "ginger-tea-for-colds", "title": "Someone Else's Post"}
+    ]
+
+    assert _session(supabase).reconcile_journal() == (0, 1)
+    assert dedup_store.get_journal([KEY]) == {}
+
+    _save()
+    result = _publish()
+    # Published for real, under the next free slug
+    assert result.exit_code == 0, result.output
+    assert sorted(p["slug"] for p in supabase.tables["blog_posts"]) == [
+        "ginger-tea-for-colds",
+        "ginger-tea-for-colds-2",
+    ]
+
+
+def test_failed_tag_links_are_retried_without_a_new_post(supabase):
+    def tags_down(query):
+        raise httpx.ConnectError("connection reset")
+
+    supabase.fail[("blog_post_tags", "upsert")] = tags_down
+    with pytest.raises(httpx.ConnectError):
+        _session(supabase).publish(ARTICLE, author_id="a", journal_key=KEY, file="g.json")
+    assert dedup_store.get_journal([KEY])[KEY]["state"] == "inserted"
+    assert dedup_store.get_stats()["unconfirmed_publishes"] == 1
+
+    del supabase.fail[("blog_post_tags", "upsert")]
+    _save()
+    result = _publish()
+
+    assert result.exit_code == 0, result.output
+    assert len(supabase.tables["blog_posts"]) == 1
+    assert len(supabase.tables["blog_post_tags"]) == 2
+    assert dedup_store.get_journal([KEY])[KEY]["state"] == "done"
+
+
+def test_update_keeps_the_old_tags_when_writing_the_new_ones_fails(supabase):
+    session = _session(supabase)
+    slug = session.publish(ARTICLE, author_id="a")
+    post_id = next(p["id"] for p in supabase.tables["blog_posts"] if p["slug"] == slug)
+    old = {row["tag_id"] for row in supabase.tables["blog_post_tags"]}
+
+    def tags_down(query):
+        raise httpx.ConnectError("connection reset")
+
+    supabase.fail[("blog_post_tags", "upsert")] = tags_down
+    with pytest.raises(httpx.ConnectError):
+        session.update(post_id, {**ARTICLE, "tags": ["Ginger", "Honey"]})
+    assert {row["tag_id"] for row in supabase.tables["blog_post_tags"]} == old
+
+    del supabase.fail[("blog_post_tags", "upsert")]
+    session.update(post_id, {**ARTICLE, "tags": ["Ginger", "Honey"]})
+    tags = {t["id"]: t["slug"] for t in supabase.tables["blog_tags"]}
+    assert sorted(tags[row["tag_id"]] for row in supabase.tables["blog_post_tags"]) == ["ginger", "honey"]
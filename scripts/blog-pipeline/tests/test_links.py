@@ -0,0 +1,103 @@
+"""Link checks: extraction, the result cache and blocking before publish."""
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from click.testing import CliRunner
+
+import pipeline.cli as cli
+from pipeline.publisher import links
+from pipeline.storage import link_cache
+
+
+def test_extract_links_resolves_and_dedupes():
+    html = (
+        '<a href="/products/tulsi#buy">x</a>'
+        "<A class=cta HREF='https://shop.example/p?a=1&amp;b=2'>y</A>"
+        '<a href="mailto:hi@example.com">m</a><a href="#top">t</a>'
+        '<a href="https://site.example/products/tulsi">again</a>'
+    )
+
+    assert links.extract_links(html, "https://site.example") == [
+        "https://site.example/products/tulsi",
+        "https://shop.example/p?a=1&b=2",
+    ]
+
+
+def test_cache_honours_ttl(data_dir):
+    link_cache.store({"https://a.example/": (True, 200, ""), "https://b.example/": (False, 404, "")})
+
+    assert set(link_cache.get_fresh(["https://a.example/", "https://b.example/"], 1)) == {
+        "https://a.example/",
+        "https://b.example/",
+    }
+    conn = link_cache._get_conn()
+    old = (datetime.now(timezone.utc) - timedelta(hours=2)).isoformat()
+    conn.execute("UPDATE link_checks SET checked_at = ? WHERE url = ?", (old, "https://b.example/"))
+    conn.commit()
+    conn.close()
+    assert set(link_cache.get_fresh(["https://a.example/", "https://b.example/"], 1)) == {
+        "https://a.example/"
+    }
+
+
+def _transport(handler):
+    real = httpx.Client
+
+    def client(**kwargs):
+        return real(transport=httpx.MockTransport(handler), **kwargs)
+
+    return client
+
+
+def test_only_definitive_statuses_are_cached(monkeypatch):
+    def handler(request):
+        if request.url.host == "down.example":
+            raise httpx.ConnectTimeout("timed out")
+        if request.url.host == "busy.example":
+            return httpx.Response(429)
+        if request.url.path == "/nohead" and request.method == "HEAD":
+            return httpx.Response(405)
+        return httpx.Response(404 if request.url.path == "/gone" else 200)
+
+    monkeypatch.setattr(links.httpx, "Client", _transport(handler))
+    urls = [
+        "https://shop.example/ok",
+        "https://shop.example/nohead",
+        "https://shop.example/gone",
+        "https://down.example/",
+        "https://busy.example/",
+    ]
+
+    results = links.check_links(urls, workers=2)
+
+    assert {url: ok for url, (ok, _, _) in results.items()} == {
+        "https://shop.example/ok": True,
+        "https://shop.example/nohead": True,
+        "https://shop.example/gone": False,
+        "https://down.example/": False,
+        "https://busy.example/": True,
+    }
+    assert set(link_cache.get_fresh(urls, 24)) == {
+        "https://shop.example/ok",
+        "https://shop.example/nohead",
+        "https://shop.example/gone",
+    }
+
+
+def test_block_holds_articles_back_when_the_check_fails(supabase, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("link cache unavailable")
+
+    monkeypatch.setattr(links, "broken_links", fail)
+    (cli.REWRITTEN_DIR / "a.json").write_text(
+        json.dumps({"title": "Ginger Tea", "content_html": '<a href="https://x.example/">x</a>'})
+    )
+
+    result = CliRunner().invoke(cli.cli, ["publish", "--author-id", "a", "--check-links", "block"])
+
+    assert "1 held back" in result.output
+    assert supabase.tables.get("blog_posts", []) == []
+    assert (cli.REWRITTEN_DIR / "a.json").exists()
@@ -0,0 +1,47 @@
+"""--metadata local: titles come from the rewrite, not the scraped headline."""
+from __future__ import annotations
+
+from pipeline.rewriter.local_metadata import KeywordCorpus, fit_length, generate_local_metadata
+from pipeline.rewriter.mock_rewriter import MockRewriter
+
+HTML = (
+    "<h2>Why Warm Ginger Tea Soothes a Sore Throat</h2>"
+    "<p>Ginger has warming compounds that calm an irritated throat and ease congestion.</p>"
+)
+
+
+def _rewriter():
+    rewriter = MockRewriter(latency_ms=1)
+    rewriter.metadata_mode = "local"
+    return rewriter
+
+
+def test_rewrite_title_comes_from_rewritten_html():
+    raw = {"raw_title": "10 Proven Benefits of Ginger (Competitor Headline)", "raw_content_text": "..."}
+
+    metadata = _rewriter()._local_metadata(raw, HTML)
+
+    assert metadata["title"] == "Why Warm Ginger Tea Soothes a Sore Throat"
+    assert "Competitor" not in metadata["meta_title"]
+
+
+def test_topic_only_run_uses_the_topic():
+    raw = {"topic_only": True, "topic": "Ginger tea for winter sore throats", "raw_title": "x"}
+
+    metadata = _rewriter()._local_metadata(raw, HTML)
+
+    assert metadata["title"] == "Ginger tea for winter sore throats"
+
+
+def test_lead_sentence_when_there_is_no_heading():
+    metadata = generate_local_metadata(
+        "<p>Steam inhalation opens blocked nasal passages quickly. It is cheap.</p>",
+        corpus=KeywordCorpus(),
+    )
+
+    assert metadata["title"] == "Steam inhalation opens blocked nasal passages quickly"
+
+
+def test_fit_length_cuts_at_a_word_boundary():
+    assert fit_length("ginger tea, honey", 0, 12) == "ginger tea"
+    assert fit_length("a" * 20, 0, 10) == "a" * 10
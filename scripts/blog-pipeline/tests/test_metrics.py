@@ -0,0 +1,60 @@
+"""Metrics store: one shared connection, one cost-per-post definition."""
+from __future__ import annotations
+
+import threading
+
+from click.testing import CliRunner
+
+import pipeline.cli as cli
+from pipeline.storage import metrics_store
+
+
+def _record(provider: str, article: str, cost: float) -> None:
+    metrics_store.record_usage(provider, "m", "content", article, 100, 50, 1.0, cost)
+
+
+def test_cost_per_post_uses_posts_published_in_the_window():
+    _record("claude", "a", 0.3)
+    _record("ollama", "b", 0.0)
+    _record("claude", "c", 0.3)
+    metrics_store.record_published(["post-a", "post-c"])
+
+    by_day, published = metrics_store.usage_report(group_by="day")
+    by_provider, _ = metrics_store.usage_report(group_by="provider")
+
+    assert published == 2
+    assert [round(r["cost_per_post"], 3) for r in by_day] == [0.3]
+    assert {r["group"]: round(r["cost_per_post"], 3) for r in by_provider} == {
+        "claude m": 0.3,
+        "ollama m": 0.0,
+    }
+    assert sum(r["cost_per_post"] for r in by_provider) == sum(r["cost_per_post"] for r in by_day)
+
+
+def test_calls_share_one_connection(monkeypatch):
+    connects = []
+    real_connect = metrics_store.sqlite3.connect
+    monkeypatch.setattr(
+        metrics_store.sqlite3, "connect", lambda *a, **k: connects.append(1) or real_connect(*a, **k)
+    )
+
+    threads = [
+        threading.Thread(target=_record, args=("claude", f"a{i}", 0.01)) for i in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(connects) == 1
+    assert metrics_store.usage_report()[0][0]["calls"] == 20
+
+
+def test_stats_llm_prints_one_cost_per_post():
+    _record("claude", "a", 0.5)
+    metrics_store.record_published(["post-a"])
+
+    result = CliRunner().invoke(cli.cli, ["stats", "llm", "--by", "provider"])
+
+    assert result.exit_code == 0, result.output
+    assert "1 posts published, $0.500/post" in result.output
@@ -0,0 +1,117 @@
+"""Site mirror: incremental sync, and stale category/tag ids after site deletions."""
+from __future__ import annotations
+
+import pytest
+
+from pipeline.publisher.supabase_client import PublisherSession
+from pipeline.storage import site_mirror
+from tests.fake_supabase import APIError
+
+ARTICLE = {
+    "title": "Ginger Tea for Colds",
+    "slug": "ginger-tea-for-colds",
+    "content_html": "<p>Ginger tea.</p>",
+    "tags": ["Ginger"],
+    "category_hint": "immunity",
+}
+
+
+def _post(id_: str, slug: str, updated_at: str, tag_ids=()) -> dict:
+    return {
+        "id": id_,
+        "slug": slug,
+        "title": slug.title(),
+        "status": "published",
+        "category_id": None,
+        "updated_at": updated_at,
+        "blog_post_tags": [{"tag_id": t} for t in tag_ids],
+    }
+
+
+def test_sync_fetches_only_rows_changed_since_the_watermark(supabase):
+    supabase.tables["blog_posts"] = [_post("p1", "a", "2026-01-01"), _post("p2", "b", "2026-01-02")]
+    assert site_mirror.sync(supabase)["blog_posts"] == 2
+
+    supabase.tables["blog_posts"].append(_post("p3", "c", "2026-01-03"))
+    # The row at the watermark is fetched again (gte), older ones are not
+    assert site_mirror.sync(supabase)["blog_posts"] == 2
+    assert site_mirror.existing_slugs(["a", "b", "c"]) == {"a", "b", "c"}
+
+
+def test_pages_of_rows_sharing_a_timestamp_neither_skip_nor_repeat(supabase, monkeypatch):
+    monkeypatch.setattr(site_mirror, "PAGE_SIZE", 2)
+    supabase.tables["blog_posts"] = [_post(f"p{i}", f"s{i}", "2026-01-01") for i in (4, 1, 3, 0, 2)]
+
+    rows = site_mirror._fetch_since("blog_posts", supabase, None)
+
+    assert [r["id"] for r in rows] == ["p0", "p1", "p2", "p3", "p4"]
+
+
+def test_full_sync_drops_posts_deleted_on_the_site(supabase):
+    supabase.tables["blog_posts"] = [_post("p1", "a", "2026-01-01"), _post("p2", "b", "2026-01-02")]
+    site_mirror.sync(supabase)
+    supabase.tables["blog_posts"] = [_post("p2", "b", "2026-01-02")]
+
+    site_mirror.sync(supabase)
+    assert site_mirror.existing_slugs(["a"]) == {"a"}
+
+    site_mirror.sync(supabase, full=True)
+    assert site_mirror.existing_slugs(["a", "b"]) == {"b"}
+
+
+def _reject_missing(supabase, table: str, column: str, valid: str):
+    """Foreign key check on ``column`` of rows written to ``table``."""
+
+    def hook(query):
+        rows = query.payload if isinstance(query.payload, list) else [query.payload]
+        known = {row["id"] for row in supabase.tables.get(valid, [])}
+        if any(row.get(column) and row[column] not in known for row in rows):
+            raise APIError("23503", f"insert on {table} violates foreign key constraint")
+
+    return hook
+
+
+def _mirrored_session(supabase) -> PublisherSession:
+    """A session whose mirror still has a category and tag deleted on the site since."""
+    supabase.tables["blog_categories"] = [{"id": "c-old", "name": "Immunity", "slug": "immunity"}]
+    supabase.tables["blog_tags"] = [{"id": "t-old", "name": "Ginger", "slug": "ginger"}]
+    site_mirror.sync(supabase)
+    supabase.tables["blog_categories"] = []
+    supabase.tables["blog_tags"] = []
+    supabase.fail[("blog_posts", "insert")] = _reject_missing(
+        supabase, "blog_posts", "category_id", "blog_categories"
+    )
+    supabase.fail[("blog_post_tags", "upsert")] = _reject_missing(
+        supabase, "blog_post_tags", "tag_id", "blog_tags"
+    )
+    session = PublisherSession(supabase=supabase, warm=True, mirror=True)
+    assert session.category_ids["immunity"] == "c-old"
+    return session
+
+
+def test_stale_mirror_ids_are_resolved_again_after_a_foreign_key_error(supabase):
+    session = _mirrored_session(supabase)
+
+    slug = session.publish(ARTICLE, author_id="a")
+
+    category = supabase.tables["blog_categories"][0]
+    tag = supabase.tables["blog_tags"][0]
+    post = next(p for p in supabase.tables["blog_posts"] if p["slug"] == slug)
+    assert post["category_id"] == category["id"] != "c-old"
+    links = [(row["post_id"], row["tag_id"]) for row in supabase.tables["blog_post_tags"]]
+    assert links == [(post["id"], tag["id"])]
+    # The mirror is corrected, so the next run starts from the right ids
+    assert site_mirror.slug_ids("blog_categories") == {"immunity": category["id"]}
+    assert site_mirror.slug_ids("blog_tags") == {"ginger": tag["id"]}
+
+
+def test_other_errors_are_not_retried(supabase):
+    session = _mirrored_session(supabase)
+
+    def hook(query):
+        raise APIError("42501", "permission denied")
+
+    supabase.fail[("blog_posts", "insert")] = hook
+    with pytest.raises(APIError):
+        session.publish(ARTICLE, author_id="a")
+    assert supabase.calls.count(("blog_posts", "insert")) == 1
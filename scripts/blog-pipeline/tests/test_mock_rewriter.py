@@ -0,0 +1,59 @@
+"""Mock provider: reproducible retries, counted per call."""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pipeline.rewriter import scheduler
+from pipeline.rewriter.mock_rewriter import MockProviderError, MockRewriter
+
+
+def _mock() -> MockRewriter:
+    return MockRewriter(
+        latency_ms=1,
+        latency_sigma=0.0,
+        error_rate=0.5,
+        scheduler=scheduler.CallScheduler("mock", max_retries=50),
+    )
+
+
+def _first_attempt_fails(rewriter: MockRewriter, prompt: str) -> bool:
+    try:
+        rewriter._respond(prompt)
+    except MockProviderError:
+        return True
+    return False
+
+
+def test_concurrent_calls_of_one_prompt_retry_independently(monkeypatch):
+    monkeypatch.setattr(scheduler.time, "sleep", lambda s: None)
+    expected = _mock()._complete("system", "prompt")
+    rewriter = _mock()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: rewriter._complete("system", "prompt"), range(16)))
+
+    assert results == [expected] * 16
+
+
+def test_call_after_exhausted_retries_starts_over(monkeypatch):
+    monkeypatch.setattr(scheduler.time, "sleep", lambda s: None)
+    rewriter = MockRewriter(
+        latency_ms=1,
+        latency_sigma=0.0,
+        error_rate=0.5,
+        scheduler=scheduler.CallScheduler("mock", max_retries=0),
+    )
+    prompt = next(p for p in (f"prompt {i}" for i in range(100)) if _first_attempt_fails(rewriter, p))
+
+    for _ in range(2):
+        with pytest.raises(MockProviderError):
+            rewriter._complete("system", prompt)
+
+
+def test_retries_of_a_prompt_are_reproducible(monkeypatch):
+    monkeypatch.setattr(scheduler.time, "sleep", lambda s: None)
+    first, second = _mock(), _mock()
+
+    assert first._complete("system", "prompt") == second._complete("system", "prompt")
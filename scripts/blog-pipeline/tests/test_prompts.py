@@ -0,0 +1,98 @@
+"""Source fitting: summaries only past the context budget, with their own prompt."""
+from __future__ import annotations
+
+import threading
+
+from pipeline.rewriter import prompts
+from pipeline.rewriter.base import BaseRewriter
+
+
+def _paragraphs(n: int, words: int = 100) -> str:
+    return "\n".join(f"Paragraph {i}. " + " ".join(["word"] * words) + "." for i in range(n))
+
+
+def test_text_within_budget_is_not_summarised():
+    calls = []
+
+    text = prompts.fit_to_budget("Short text.", 100, summarize=calls.append)
+
+    assert text == "Short text."
+    assert calls == []
+
+
+def test_long_text_is_summarised_per_section():
+    calls = []
+    lock = threading.Lock()
+
+    def summarize(prompt: str) -> str:
+        with lock:
+            calls.append(prompt)
+        return "summary."
+
+    text = _paragraphs(60)
+    result = prompts.fit_to_budget(text, 500, summarize=summarize, title="Ginger")
+
+    assert len(calls) == len(prompts._split_sections(text, prompts.SUMMARY_SECTION_TOKENS, ""))
+    assert all('"Ginger"' in prompt for prompt in calls)
+    assert result == "\n".join(["summary."] * len(calls))
+
+
+def test_source_budget_follows_the_context_window():
+    small = prompts.source_token_budget("ollama", 4096)
+    large = prompts.source_token_budget("claude")
+
+    assert small == prompts.SOURCE_TOKEN_BUDGET
+    assert large > 190_000
+    assert prompts.source_token_budget("ollama", 32768) > 28_000
+
+
+class RecordingRewriter(BaseRewriter):
+    provider = "ollama"
+
+    def __init__(self, context_tokens: int):
+        self.context_tokens = context_tokens
+        self.calls: list[tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+    def _complete(self, system: str, user: str) -> str:
+        with self._lock:
+            self.calls.append((system, user))
+        return "Condensed."
+
+
+def test_sources_that_fit_the_context_are_not_condensed():
+    rewriter = RecordingRewriter(context_tokens=32768)
+    source = _paragraphs(40)  # ~3,000 tokens: over the old fixed budget
+
+    _, prompt = rewriter._build_rewrite_prompt({"raw_title": "T", "raw_content_text": source})
+
+    assert rewriter.calls == []
+    assert "Paragraph 39." in prompt
+
+
+def test_summaries_use_the_summary_system_prompt():
+    rewriter = RecordingRewriter(context_tokens=4096)
+
+    rewriter._build_rewrite_prompt({"raw_title": "T", "raw_content_text": _paragraphs(40)})
+
+    assert rewriter.calls
+    assert {system for system, _ in rewriter.calls} == {prompts.get_summary_system_prompt()}
+    assert prompts.get_summary_system_prompt() != prompts.get_system_prompt()
+
+
+def test_format_all_lists_the_whole_catalogue():
+    from pipeline.rewriter.product_index import ProductIndex
+
+    index = ProductIndex(
+        {
+            "brand_name": "HeldeeLife",
+            "brand_url": "https://www.heldeelife.com",
+            "products": [{"name": f"Product {i}", "url": f"https://x/{i}"} for i in range(5)],
+        },
+        default_k=2,
+    )
+
+    listing = index.format_all()
+
+    assert all(f"Product {i}" in listing for i in range(5))
+    assert index.format_for_prompt("unrelated") != listing
@@ -0,0 +1,53 @@
+"""Quality gate: cookie_banner needs consent phrases, not the word "cookies"."""
+from __future__ import annotations
+
+from pipeline.scraper.quality import assess
+
+RECIPE = " ".join(
+    [
+        "These ginger oat cookies are a healthy snack for cold winter evenings at home.",
+        "Bake the cookies with whole oats, honey and a little turmeric for colour and warmth.",
+        "Fresh ginger gives the cookies a gentle heat that many people find soothing for digestion.",
+        "Swap refined sugar for jaggery or dates if you want the cookies to have a lower glycaemic load.",
+        "Each cookie has about four grams of fibre, which helps keep blood sugar steady after a meal.",
+        "Children usually like the cookies best when they are still slightly soft in the middle.",
+        "Store the cookies in an airtight jar and they will keep for up to a week without losing flavour.",
+        "A cup of tulsi tea with two cookies makes a calming evening ritual before sleep.",
+        "If you are watching your weight, bake smaller cookies and freeze half of the dough for later.",
+        "Ayurveda treats ginger as a warming herb, so these cookies suit the cooler months of the year.",
+        "People with nut allergies can leave out the almonds without changing how the cookies bake.",
+        "Toasting the oats first brings out a nutty taste and makes the cookies a little crisper.",
+        "A pinch of black pepper helps the body absorb the turmeric in the cookies more easily.",
+        "Serve the cookies with yoghurt and fruit for a breakfast that has protein as well as fibre.",
+        "Talk to your doctor about portion sizes if you manage diabetes or high blood pressure.",
+        "Our family has made these cookies every winter for years, and the recipe keeps improving.",
+        "Try adding cardamom or cinnamon to the cookies for a different flavour on festive days.",
+        "Let the cookies cool on a rack for ten minutes so the bottoms do not turn soggy.",
+        "Whole grains and spices make these cookies a better choice than most packaged biscuits.",
+        "Share the cookies with friends and ask them which spice they would like you to try next.",
+    ]
+)
+
+BANNER = " ".join(
+    [
+        "We use cookies to improve your experience on this website and to show you relevant ads.",
+        "Accept all cookies or manage preferences to choose which partners may process your data.",
+        "Read our cookie policy and privacy policy to learn how health information is stored.",
+        "You can change your cookie settings at any time from the link at the bottom of the page.",
+    ]
+)
+
+
+def test_recipe_mentioning_cookies_is_not_a_cookie_banner():
+    reasons = assess({"raw_title": "Ginger Oat Cookies", "raw_content_text": RECIPE})
+
+    assert not any(r.startswith("cookie_banner") for r in reasons), reasons
+
+
+def test_consent_boilerplate_is_a_cookie_banner():
+    # Banner at the top and the bottom of the page
+    text = f"{BANNER} {' '.join(RECIPE.split()[:200])} {BANNER}"
+
+    reasons = assess({"raw_title": "Ginger Oat Cookies", "raw_content_text": text})
+
+    assert any(r.startswith("cookie_banner") for r in reasons), reasons
@@ -0,0 +1,112 @@
+"""Rewrite queue: category gaps from the site mirror, unreadable files, budgets."""
+from __future__ import annotations
+
+import json
+import time
+
+from click.testing import CliRunner
+
+import pipeline.cli as cli
+from pipeline.rewriter import base, ranking
+from pipeline.settings import get_settings
+from pipeline.storage import metrics_store, site_mirror
+
+
+def _mirror(categories: dict[str, str], posts: list[tuple[str, str]]) -> None:
+    conn = site_mirror._get_conn()
+    conn.executemany(
+        "INSERT INTO categories (id, name, slug) VALUES (?, ?, ?)",
+        [(cid, slug, slug) for slug, cid in categories.items()],
+    )
+    conn.executemany("INSERT INTO posts (id, slug, category_id) VALUES (?, ?, ?)", posts)
+    conn.commit()
+    conn.close()
+
+
+def _raw(name: str, category: str = "health", words: int = 500) -> None:
+    (cli.RAW_DIR / f"{name}.json").write_text(
+        json.dumps(
+            {"raw_title": name, "category_hint": category, "raw_content_text": "word " * words}
+        )
+    )
+
+
+def test_category_counts_come_from_the_mirror(data_dir):
+    _mirror(
+        {"health": "c1", "skin-care": "c2"},
+        [("p1", "a", "c1"), ("p2", "b", "c1"), ("p3", "c", "c2")],
+    )
+    (cli.REWRITTEN_DIR / "pending.json").write_text(json.dumps({"category_hint": "skin-care"}))
+    (cli.REWRITTEN_DIR / "done").mkdir()
+    # Already counted through the mirror
+    (cli.REWRITTEN_DIR / "done" / "old.json").write_text(json.dumps({"category_hint": "health"}))
+
+    counts = ranking.category_counts({})
+
+    assert counts == {"health": 2, "skin-care": 2}
+    assert ranking.category_gap_score("hair-care", counts) == 1.0
+
+
+def test_category_counts_fall_back_to_done_files_without_a_mirror(data_dir):
+    (cli.REWRITTEN_DIR / "done").mkdir()
+    (cli.REWRITTEN_DIR / "done" / "old.json").write_text(json.dumps({"category_hint": "health"}))
+
+    assert ranking.category_counts({}) == {"health": 1}
+
+
+def test_unreadable_raw_files_are_reported(data_dir):
+    _raw("good")
+    (cli.RAW_DIR / "broken.json").write_text("{not json")
+    skipped = []
+
+    paths = sorted(cli.RAW_DIR.glob("*.json"))
+
+    queue = ranking.build_queue(paths, "mock", get_settings(), skipped=skipped)
+
+    assert [item.path.name for item in queue] == ["good.json"]
+    assert [path.name for path, _ in skipped] == ["broken.json"]
+
+
+def test_apply_budget_counts_recorded_usage():
+    queue = [
+        ranking.QueueItem(cli.RAW_DIR / f"{i}.json", 1.0, input_tokens=60, output_tokens=40, cost_usd=0.1)
+        for i in range(3)
+    ]
+
+    assert len(ranking.apply_budget(queue, budget_tokens=300)) == 3
+    assert len(ranking.apply_budget(queue, budget_tokens=300, spent_tokens=150)) == 1
+    assert ranking.apply_budget(queue, budget_usd=0.3, spent_usd=0.4) == []
+
+
+class UsageRewriter:
+    """Records far more usage per article than was estimated."""
+
+    def __init__(self):
+        self.written: list[str] = []
+
+    def rewrite(self, raw: dict, checkpoint=None) -> dict:
+        time.sleep(0.2)
+        self.written.append(raw["raw_title"])
+        metrics_store.record_usage("mock", "m", "rewrite", raw["raw_title"], 30000, 15000, 0.2, 0.0)
+        return {"title": raw["raw_title"], "content_html": "<p>x</p>"}
+
+    def close(self) -> None:
+        pass
+
+
+def test_rewrite_stops_when_recorded_usage_exhausts_the_budget(data_dir, monkeypatch):
+    for name in ("a", "b", "c", "d"):
+        _raw(name)
+    rewriter = UsageRewriter()
+    monkeypatch.setattr(base, "get_rewriter", lambda *a, **k: rewriter)
+
+    result = CliRunner().invoke(
+        cli.cli,
+        ["rewrite", "--provider", "mock", "-w", "1", "--metadata", "local", "--budget-tokens", "40000"],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "skipping 2 articles" in result.output
+    # The first article and the one already running when its usage came in
+    assert len(rewriter.written) == 2
+    assert "Recorded: 90,000 tokens" in result.output
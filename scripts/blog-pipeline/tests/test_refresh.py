@@ -0,0 +1,75 @@
+"""refresh: re-fetched sources are hashed with the extractor that scraped them."""
+from __future__ import annotations
+
+import httpx
+from click.testing import CliRunner
+from scrapy.http import HtmlResponse
+
+import pipeline.cli as cli
+from pipeline.scraper import fetch_urls
+from pipeline.scraper.spiders import base_spider
+from pipeline.storage import dedup_store
+
+URL = "https://example.com/nutrition/ginger"
+SOURCE = {
+    "name": "example-nutrition",
+    "selectors": {"title": "h1", "content": ".story"},
+    "category_hint": "nutrition",
+}
+# The aside inside .story is kept by the spider but dropped by the generic fetcher
+PAGE = f"""<html><body><article>
+<h1>Ginger for digestion</h1>
+<div class="story">
+<p>{"Ginger has been used for digestion for centuries. " * 10}</p>
+<aside>Related: turmeric and black pepper</aside>
+</div>
+</article></body></html>"""
+
+
+def _scraped_text() -> str:
+    spider = base_spider.BaseArticleSpider(source_config=SOURCE)
+    response = HtmlResponse(url=URL, body=PAGE, encoding="utf-8")
+    (item,) = spider.parse_article(response)
+    return item["raw_content_text"]
+
+
+def _serve_page(monkeypatch):
+    def get(url, **kwargs):
+        return httpx.Response(200, text=PAGE, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(fetch_urls.httpx, "get", get)
+    monkeypatch.setattr(fetch_urls.time, "sleep", lambda s: None)
+    monkeypatch.setattr(base_spider, "load_sources", lambda name=None: [SOURCE])
+
+
+def _published(source: str, text: str) -> None:
+    dedup_store.mark_seen(URL, source, dedup_store.content_hash(text))
+    dedup_store.mark_published(URL)
+    dedup_store.journal_begin([(URL, "ginger.json", "ginger", "Ginger for digestion")])
+    dedup_store.journal_done([(URL, "ginger", "post-1")])
+
+
+def test_unchanged_spider_article_is_unchanged(monkeypatch):
+    _serve_page(monkeypatch)
+    text = _scraped_text()
+    # The generic extractor alone would see a different text
+    generic = fetch_urls.fetch_article(URL, force=True)
+    assert dedup_store.content_hash(generic.raw_content_text) != dedup_store.content_hash(text)
+
+    _published(SOURCE["name"], text)
+    result = CliRunner().invoke(cli.cli, ["refresh", "--dry-run"])
+
+    assert result.exit_code == 0, result.output
+    assert "0 changed, 1 unchanged" in result.output
+
+
+def test_unknown_source_takes_new_baseline(monkeypatch):
+    _serve_page(monkeypatch)
+    _published("removed-source", "old text")
+
+    result = CliRunner().invoke(cli.cli, ["refresh", "--dry-run"])
+
+    assert "0 changed, 1 unchanged" in result.output
+    source, text_hash = dedup_store.get_published_sources()[URL]
+    assert source == "direct-url"
+    assert text_hash == dedup_store.content_hash(fetch_urls.fetch_article(URL, force=True).raw_content_text)
@@ -0,0 +1,44 @@
+"""RevalidationQueue: close() never races a debounced send."""
+from __future__ import annotations
+
+import threading
+import time
+
+from pipeline.publisher import revalidator
+from pipeline.settings import Settings
+
+
+def test_close_waits_for_debounced_send(monkeypatch):
+    started = threading.Event()
+
+    def slow_send(slugs, settings, client):
+        started.set()
+        time.sleep(0.2)
+        assert not client.is_closed
+        return []
+
+    monkeypatch.setattr(revalidator, "trigger_batch_revalidation", slow_send)
+    queue = revalidator.RevalidationQueue(Settings(revalidation_secret="s"), debounce_s=0.01)
+    queue.add("ginger-tea")
+    assert started.wait(1)
+
+    queue.close()
+
+    assert queue.sent == ["ginger-tea"]
+    assert queue.failed == []
+
+
+def test_close_sends_pending_slugs_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        revalidator, "trigger_batch_revalidation", lambda slugs, settings, client: calls.append(slugs) or []
+    )
+    queue = revalidator.RevalidationQueue(Settings(revalidation_secret="s"), debounce_s=10)
+    queue.add("a")
+    queue.add("b")
+    queue.add("a")
+
+    queue.close()
+
+    assert calls == [["a", "b"]]
+    assert queue.sent == ["a", "b"]
@@ -0,0 +1,63 @@
+"""rewrite: metadata batching only for providers that support it."""
+from __future__ import annotations
+
+import json
+
+from click.testing import CliRunner
+
+import pipeline.cli as cli
+from pipeline.rewriter import base
+
+
+class StubRewriter:
+    """Records whether articles went through rewrite() or draft()/finish_batch()."""
+
+    def __init__(self, batches_metadata: bool):
+        self.batches_metadata = batches_metadata
+        self.calls: list[str] = []
+
+    def rewrite(self, raw: dict, checkpoint=None) -> dict:
+        self.calls.append("rewrite")
+        return {"title": raw["raw_title"], "content_html": "<p>x</p>"}
+
+    def draft(self, raw: dict, checkpoint=None) -> dict:
+        self.calls.append("draft")
+        return {"content_html": "<p>x</p>"}
+
+    def finish_batch(self, jobs: list) -> list:
+        self.calls.append(f"batch:{len(jobs)}")
+        return [{"title": raw["raw_title"], "content_html": "<p>x</p>"} for raw, _, _ in jobs]
+
+    def close(self) -> None:
+        pass
+
+
+def _rewrite(monkeypatch, rewriter: StubRewriter, provider: str):
+    for name in ("a", "b"):
+        (cli.RAW_DIR / f"{name}.json").write_text(
+            json.dumps({"raw_title": name, "raw_content_text": "word " * 300})
+        )
+    monkeypatch.setattr(base, "get_rewriter", lambda *a, **k: rewriter)
+    return CliRunner().invoke(
+        cli.cli, ["rewrite", "--provider", provider, "--metadata-batch", "2"]
+    )
+
+
+def test_metadata_batch_is_ignored_without_provider_support(monkeypatch):
+    rewriter = StubRewriter(batches_metadata=False)
+
+    result = _rewrite(monkeypatch, rewriter, "mock")
+
+    assert result.exit_code == 0, result.output
+    assert "does not batch metadata" in result.output
+    assert rewriter.calls == ["rewrite", "rewrite"]
+
+
+def test_metadata_batch_groups_articles_when_supported(monkeypatch):
+    rewriter = StubRewriter(batches_metadata=True)
+
+    result = _rewrite(monkeypatch, rewriter, "ollama")
+
+    assert result.exit_code == 0, result.output
+    assert rewriter.calls == ["draft", "draft", "batch:2"]
+    assert sorted(p.name for p in cli.REWRITTEN_DIR.glob("*.json")) == ["a.json", "b.json"]
@@ -0,0 +1,53 @@
+"""Router: every route call is stored, including failures and hedge losers."""
+from __future__ import annotations
+
+import time
+
+from pipeline.rewriter.base import BaseRewriter
+from pipeline.rewriter.router_rewriter import Route, RouterRewriter
+from pipeline.storage import metrics_store
+
+
+class _Stub(BaseRewriter):
+    provider = "stub"
+
+    def __init__(self, model: str, delay: float = 0.0, fail: bool = False):
+        self.model = model
+        self.delay = delay
+        self.fail = fail
+
+    def _complete(self, system: str, user: str) -> str:
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("down")
+        return self.model
+
+
+def _calls() -> dict[str, tuple[int, int]]:
+    rows, _ = metrics_store.usage_report(group_by="provider")
+    return {r["group"]: (r["calls"], r["failed"]) for r in rows}
+
+
+def test_failed_route_call_is_recorded():
+    router = RouterRewriter(
+        [Route("down", _Stub("a", fail=True), 1), Route("up", _Stub("b"), 1)], hedge=False
+    )
+
+    assert router._call("system", "user", "content", article="post") == "b"
+    assert router._content_provider() == "up"
+    assert _calls() == {"down a": (1, 1), "up b": (1, 0)}
+
+
+def test_hedge_loser_is_recorded():
+    slow = Route("slow", _Stub("a", delay=0.3), 1, min_samples=1)
+    fast = Route("fast", _Stub("b"), 1, min_samples=1)
+    # Slow looks best, so it is tried first and hedged once it passes its p95
+    slow.record(0.01, True)
+    fast.record(1.0, True)
+    router = RouterRewriter([slow, fast])
+
+    assert router._call("system", "user", "content", article="post") == "b"
+    router._executor.shutdown(wait=True)
+
+    assert router._content_provider() == "fast"
+    assert _calls() == {"fast b": (1, 0), "slow a": (1, 0)}
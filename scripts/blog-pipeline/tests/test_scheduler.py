@@ -0,0 +1,109 @@
+"""Call scheduler: error classification, retry limits and the AIMD governor."""
+from __future__ import annotations
+
+import subprocess
+
+import httpx
+import pytest
+
+from pipeline.rewriter import scheduler
+from pipeline.rewriter.agent_pool import CliAgentError
+from pipeline.rewriter.mock_rewriter import MockProviderError
+from pipeline.rewriter.scheduler import CallScheduler, ConcurrencyGovernor, classify_error
+
+
+def _http_error(status: int, headers: dict | None = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://localhost:11434/api/chat")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+@pytest.mark.parametrize(
+    "error, kind",
+    [
+        (_http_error(429), scheduler.RATE_LIMIT),
+        (_http_error(503), scheduler.OVERLOADED),
+        (MockProviderError(529), scheduler.OVERLOADED),
+        (_http_error(500), scheduler.TRANSIENT),
+        (_http_error(400), scheduler.FATAL),
+        (subprocess.TimeoutExpired(["claude"], 600), scheduler.TIMEOUT),
+        (httpx.ConnectError("refused"), scheduler.TRANSIENT),
+        (CliAgentError("CLI agent error", 'API Error: 429 {"type":"error"}'), scheduler.RATE_LIMIT),
+        (
+            CliAgentError("CLI agent error", '{"error":{"type":"overloaded_error"}}'),
+            scheduler.OVERLOADED,
+        ),
+        # Numbers in free text are not status codes
+        (CliAgentError("CLI agent error", "Processed 429 items, port 5030 busy"), scheduler.FATAL),
+        (RuntimeError("upstream said 503"), scheduler.FATAL),
+    ],
+)
+def test_classify_error(error, kind):
+    assert classify_error(error)[0] == kind
+
+
+def test_retry_after_header_is_honoured():
+    assert classify_error(_http_error(429, {"retry-after": "7"})) == (scheduler.RATE_LIMIT, 7.0)
+
+
+def _failing(errors: list[Exception]):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+
+    return fn, calls
+
+
+def test_retryable_errors_are_retried(monkeypatch):
+    monkeypatch.setattr(scheduler.time, "sleep", lambda s: None)
+    fn, calls = _failing([_http_error(429), _http_error(503)])
+
+    assert CallScheduler("test", max_retries=3).call(fn) == "ok"
+    assert len(calls) == 3
+
+
+def test_timeouts_have_their_own_retry_limit(monkeypatch):
+    monkeypatch.setattr(scheduler.time, "sleep", lambda s: None)
+    timeout = subprocess.TimeoutExpired(["claude"], 600)
+    fn, calls = _failing([timeout, timeout, timeout])
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        CallScheduler("test", max_retries=5, max_timeout_retries=1).call(fn)
+    assert len(calls) == 2
+
+
+def test_fatal_errors_are_not_retried(monkeypatch):
+    monkeypatch.setattr(scheduler.time, "sleep", lambda s: None)
+    fn, calls = _failing([_http_error(400)])
+
+    with pytest.raises(httpx.HTTPStatusError):
+        CallScheduler("test").call(fn)
+    assert len(calls) == 1
+
+
+def test_governor_halves_on_throttle_and_grows_back():
+    governor = ConcurrencyGovernor(8)
+
+    governor.on_throttle()
+    governor.on_throttle()
+    assert governor.limit == 2.0
+
+    governor.on_success()
+    assert governor.limit == 2.5
+    for _ in range(100):
+        governor.on_success()
+    assert governor.limit == 8
+
+
+def test_throttling_lowers_the_concurrency_limit(monkeypatch):
+    monkeypatch.setattr(scheduler.time, "sleep", lambda s: None)
+    limited = CallScheduler("test", max_concurrency=4)
+    fn, _ = _failing([_http_error(429)])
+
+    limited.call(fn)
+
+    assert limited.governor.limit < 4
@@ -0,0 +1,85 @@
+"""SEO score fixes, reading time and the seo-audit command."""
+from __future__ import annotations
+
+import json
+
+import pytest
+from click.testing import CliRunner
+
+import pipeline.cli as cli
+from pipeline.publisher.seo import (
+    calculate_reading_time,
+    calculate_seo_score,
+    html_to_text,
+    seo_fixes,
+)
+from pipeline.storage import site_mirror
+
+GOOD = {
+    "title": "Ginger Tea for Colds: Benefits and Recipe",
+    "meta_description": "m" * 140,
+    "content": "<p>" + "word " * 300 + "</p>",
+    "featured_image": "https://example.com/ginger.webp",
+    "meta_keywords": ["ginger", "tea", "colds"],
+    "excerpt": "e" * 120,
+}
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"title": "Ginger"},
+        {"title": ""},
+        {"meta_description": "Short."},
+        {"meta_description": ""},
+        {"content": "<p>" + "word " * 150 + "</p>"},
+        {"content": "<p>Short.</p>"},
+        {"featured_image": ""},
+        {"meta_keywords": ["ginger"]},
+        {"meta_keywords": []},
+        {"excerpt": "Short."},
+        {"excerpt": ""},
+    ],
+)
+def test_fix_points_match_the_score_they_restore(changes):
+    post = {**GOOD, **changes}
+
+    fixes = seo_fixes(**post)
+
+    assert calculate_seo_score(**GOOD) == 100
+    assert len(fixes) == 1
+    assert calculate_seo_score(**post) + fixes[0][1] == 100
+    assert fixes[0][2] == ("content" not in changes)
+
+
+def test_complete_post_needs_no_fixes():
+    assert seo_fixes(**GOOD) == []
+
+
+def test_reading_time_counts_visible_words_only():
+    link = '<a href="https://example.com/a/very/long/path" title="several words here">x</a> '
+
+    assert calculate_reading_time(link * 150) == 1
+    assert calculate_reading_time("<p>" + "word " * 401 + "</p>") == 3
+
+
+def test_html_to_text_keeps_one_block_per_line():
+    html = "<h2>Tea &amp; Honey</h2><ul><li>Ginger</li><li><b>Lemon</b> zest</li></ul>"
+
+    assert html_to_text(html) == "Tea & Honey\nGinger\nLemon zest"
+
+
+def test_site_audit_pages_through_all_posts(supabase, monkeypatch, tmp_path):
+    monkeypatch.setattr(site_mirror, "PAGE_SIZE", 2)
+    supabase.tables["blog_posts"] = [
+        {**GOOD, "slug": f"post-{i}", "status": "published"} for i in range(5)
+    ]
+    output = tmp_path / "audit.json"
+
+    result = CliRunner().invoke(
+        cli.cli, ["seo-audit", "--site", "--format", "json", "-o", str(output), "-w", "1"]
+    )
+
+    assert result.exit_code == 0, result.output
+    slugs = sorted(a["slug"] for a in json.loads(output.read_text()))
+    assert slugs == [f"post-{i}" for i in range(5)]
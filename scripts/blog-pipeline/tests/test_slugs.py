@@ -0,0 +1,85 @@
+"""Slug allocation: suffixes within a batch, and retries after another writer's insert."""
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from pipeline.publisher.slug_generator import SlugAllocator
+from pipeline.publisher.supabase_client import PublisherSession
+from tests.fake_supabase import APIError
+
+ARTICLE = {"title": "Ginger Tea", "slug": "ginger-tea", "content_html": "<p>Tea.</p>", "tags": []}
+
+
+def test_batch_gets_suffixes_from_one_prefix_query(supabase):
+    supabase.tables["blog_posts"] = [{"id": "p1", "slug": "ginger-tea"}]
+    slugs = SlugAllocator(supabase)
+
+    allocated = [slugs.allocate("ginger-tea") for _ in range(3)]
+
+    assert allocated == ["ginger-tea-2", "ginger-tea-3", "ginger-tea-4"]
+    assert supabase.calls.count(("blog_posts", "select")) == 1
+
+
+def test_article_slugs_are_normalised_before_the_prefix_query(supabase):
+    supabase.tables["blog_posts"] = [{"id": "p1", "slug": "ginger-tea-hot"}]
+    session = PublisherSession(supabase=supabase)
+
+    slug = session.publish({**ARTICLE, "slug": "Ginger, Tea (Hot)"}, author_id="a")
+
+    assert slug == "ginger-tea-hot-2"
+
+
+def test_released_slug_is_handed_out_again(supabase):
+    slugs = SlugAllocator(supabase)
+
+    first = slugs.allocate("ginger-tea")
+    slugs.release(first)
+
+    assert slugs.allocate("ginger-tea") == first
+
+
+def test_parallel_allocations_never_collide(supabase):
+    slugs = SlugAllocator(supabase)
+    allocated = []
+    lock = threading.Lock()
+
+    def allocate():
+        slug = slugs.allocate("ginger-tea")
+        with lock:
+            allocated.append(slug)
+
+    threads = [threading.Thread(target=allocate) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(allocated)) == 20
+
+
+def test_conflict_with_a_stale_lookup_refetches_from_supabase_and_retries(supabase):
+    # The mirror does not know about a post another writer just inserted
+    supabase.tables["blog_posts"] = [{"id": "p1", "slug": "ginger-tea", "title": "Other"}]
+    session = PublisherSession(supabase=supabase)
+    session.slugs = SlugAllocator(supabase, lookup=lambda bases: set())
+
+    slug = session.publish(ARTICLE, author_id="a")
+
+    assert slug == "ginger-tea-2"
+    assert supabase.calls.count(("blog_posts", "insert")) == 2
+    assert supabase.calls.count(("blog_posts", "select")) == 1
+
+
+def test_slug_retries_are_bounded(supabase):
+    def hook(query):
+        raise APIError("23505", "duplicate key value violates unique constraint blog_posts_slug_key")
+
+    supabase.fail[("blog_posts", "insert")] = hook
+    session = PublisherSession(supabase=supabase)
+
+    with pytest.raises(APIError):
+        session.publish(ARTICLE, author_id="a")
+    assert supabase.calls.count(("blog_posts", "insert")) == PublisherSession.SLUG_RETRIES + 1
+    assert session.slugs.taken == set()
@@ -0,0 +1,100 @@
+"""write: topics already on the site are skipped and drafts never share a file."""
+from __future__ import annotations
+
+import json
+
+import pytest
+from click.testing import CliRunner
+
+import pipeline.cli as cli
+from pipeline.rewriter import base
+
+
+class StubRewriter:
+    """Returns a fixed draft per topic."""
+
+    def __init__(self, drafts: dict[str, dict]):
+        self.drafts = drafts
+        self.written: list[str] = []
+
+    def rewrite(self, raw: dict, checkpoint=None) -> dict:
+        self.written.append(raw["topic"])
+        draft = self.drafts[raw["topic"]]
+        return {"content_html": "<p>Body</p>", "tags": [], "category_hint": "", **draft}
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    def install(drafts):
+        rewriter = StubRewriter(drafts)
+        monkeypatch.setattr(base, "get_rewriter", lambda *a, **k: rewriter)
+        return rewriter
+
+    return install
+
+
+def _write(tmp_path, lines: list[str], *extra: str):
+    topics_file = tmp_path / "topics.txt"
+    topics_file.write_text("\n".join(lines))
+    return CliRunner().invoke(
+        cli.cli, ["write", "--topics-file", str(topics_file), "--author-id", "author-1", *extra]
+    )
+
+
+def test_topic_with_site_title_is_skipped_before_writing(tmp_path, supabase, stub):
+    supabase.tables["blog_posts"] = [
+        {"id": "p1", "slug": "steam-guide", "title": "Steam Inhalation for Blocked Nose"}
+    ]
+    rewriter = stub({})
+
+    result = _write(tmp_path, ["steam inhalation for  blocked nose"])
+
+    assert "Skipping (already on site)" in result.output
+    assert rewriter.written == []
+
+
+def test_drafted_title_already_on_site_is_not_published(tmp_path, supabase, stub):
+    supabase.tables["blog_posts"] = [
+        {"id": "p1", "slug": "older-slug", "title": "Ginger Tea for Colds"}
+    ]
+    stub({"ginger tea": {"title": "Ginger Tea for Colds", "slug": "ginger-tea-for-colds"}})
+
+    result = _write(tmp_path, ["ginger tea"])
+
+    assert "already on site" in result.output
+    assert len(supabase.tables["blog_posts"]) == 1
+    assert list(cli.REWRITTEN_DIR.rglob("*.json")) == []
+
+
+def test_parallel_topics_with_same_slug_get_separate_files(tmp_path, supabase, stub):
+    stub(
+        {
+            "ginger tea": {"title": "Ginger Tea Benefits", "slug": "ginger-tea"},
+            "ginger tea recipe": {"title": "Ginger Tea Recipe", "slug": "ginger-tea"},
+        }
+    )
+
+    result = _write(tmp_path, ["ginger tea", "ginger tea recipe"], "-w", "2", "--no-publish")
+
+    assert result.exit_code == 0, result.output
+    files = {f.stem: json.loads(f.read_text())["title"] for f in cli.REWRITTEN_DIR.glob("*.json")}
+    assert set(files) == {"ginger-tea", "ginger-tea-2"}
+    assert set(files.values()) == {"Ginger Tea Benefits", "Ginger Tea Recipe"}
+
+
+def test_same_drafted_title_in_one_batch_is_written_once(tmp_path, supabase, stub):
+    stub(
+        {
+            "ginger tea": {"title": "Ginger Tea Benefits", "slug": "ginger-tea"},
+            "ginger tea again": {"title": "ginger tea  benefits", "slug": "ginger-tea-benefits"},
+        }
+    )
+
+    result = _write(tmp_path, ["ginger tea", "ginger tea again"], "-w", "2", "--no-publish")
+
+    assert result.exit_code == 0, result.output
+    assert len(list(cli.REWRITTEN_DIR.glob("*.json"))) == 1
+    assert "already on site or in this batch" in result.output
@@ -0,0 +1,62 @@
+-- Bulk blog post insertion for the blog pipeline (`pipeline publish --bulk`)
+-- Inserts a batch of posts and their tag links in one transaction: either
+-- every post of the batch is stored with its tags, or none is.
+--
+-- posts: JSON array of objects with the blog_posts columns (title, slug,
+-- content, excerpt, featured_image, author_id, category_id, status,
+-- published_at, meta_title, meta_description, meta_keywords, reading_time,
+-- seo_score) plus tag_ids (array of blog_tags ids).
+-- Returns one row per post: its index in the array, new id and slug.
+
+CREATE OR REPLACE FUNCTION blog_bulk_insert_posts(posts jsonb)
+RETURNS TABLE(post_index integer, post_id uuid, post_slug text)
+LANGUAGE plpgsql
+SET search_path = public
+AS $$
+#variable_conflict use_column
+DECLARE
+  post jsonb;
+  item_index integer := 0;
+  new_id uuid;
+BEGIN
+  FOR post IN SELECT value FROM jsonb_array_elements(posts) LOOP
+    INSERT INTO blog_posts (
+      title, slug, content, excerpt, featured_image, author_id, category_id,
+      status, published_at, meta_title, meta_description, meta_keywords,
+      reading_time, seo_score
+    )
+    VALUES (
+      post->>'title',
+      post->>'slug',
+      post->>'content',
+      post->>'excerpt',
+      NULLIF(post->>'featured_image', ''),
+      (post->>'author_id')::uuid,
+      NULLIF(post->>'category_id', '')::uuid,
+      COALESCE(post->>'status', 'draft'),
+      (post->>'published_at')::timestamptz,
+      post->>'meta_title',
+      post->>'meta_description',
+      ARRAY(SELECT jsonb_array_elements_text(COALESCE(post->'meta_keywords', '[]'::jsonb))),
+      COALESCE((post->>'reading_time')::integer, 0),
+      COALESCE((post->>'seo_score')::integer, 0)
+    )
+    RETURNING blog_posts.id INTO new_id;
+
+    INSERT INTO blog_post_tags (post_id, tag_id)
+    SELECT new_id, tag.value::uuid
+    FROM jsonb_array_elements_text(COALESCE(post->'tag_ids', '[]'::jsonb)) AS tag(value)
+    ON CONFLICT (post_id, tag_id) DO NOTHING;
+
+    post_index := item_index;
+    post_id := new_id;
+    post_slug := post->>'slug';
+    RETURN NEXT;
+    item_index := item_index + 1;
+  END LOOP;
+END;
+$$;
+
+-- Only the service role (the pipeline) may bulk insert
+REVOKE EXECUTE ON FUNCTION blog_bulk_insert_posts(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION blog_bulk_insert_posts(jsonb) TO service_role;